@@ -0,0 +1,141 @@
+"""
+Response compression for JSON, CSV and NDJSON.
+
+Uses brotli when the ``brotli`` package is installed and the client accepts
+it, gzip otherwise. Whole responses are compressed only above
+``COMPRESSION_MIN_SIZE`` bytes. Streaming responses (exports) are compressed
+chunk by chunk and flushed after every chunk, so rows still reach the client
+as they are produced. PDFs, ZIPs and other non-text types are passed through
+untouched, as are responses that already carry a Content-Encoding.
+
+Settings:
+    COMPRESSION_ENABLED     true
+    COMPRESSION_MIN_SIZE    smallest body worth compressing, in bytes (1024)
+    COMPRESSION_GZIP_LEVEL  1-9 (6)
+    COMPRESSION_BROTLI_QUALITY  0-11 (4; higher levels cost far more CPU)
+"""
+from starlette.datastructures import Headers, MutableHeaders
+import zlib
+import os
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+COMPRESSION_ENABLED = os.getenv("COMPRESSION_ENABLED", "true").lower() == "true"
+COMPRESSION_MIN_SIZE = int(os.getenv("COMPRESSION_MIN_SIZE", "1024"))
+COMPRESSION_GZIP_LEVEL = int(os.getenv("COMPRESSION_GZIP_LEVEL", "6"))
+COMPRESSION_BROTLI_QUALITY = int(os.getenv("COMPRESSION_BROTLI_QUALITY", "4"))
+
+COMPRESSIBLE_TYPES = ("application/json", "application/x-ndjson", "text/csv", "text/plain", "text/html")
+
+def _accepted_encodings(header: str) -> set:
+    encodings = set()
+    for part in header.split(","):
+        name, _, params = part.strip().partition(";")
+        if params.strip().replace(" ", "") in ("q=0", "q=0.0", "q=0.00", "q=0.000"):
+            continue
+        if name:
+            encodings.add(name.strip().lower())
+    return encodings
+
+def choose_encoding(accept_encoding: str):
+    accepted = _accepted_encodings(accept_encoding)
+    if brotli is not None and "br" in accepted:
+        return "br"
+    if "gzip" in accepted or "*" in accepted:
+        return "gzip"
+    return None
+
+class _GzipStream:
+    def __init__(self):
+        self._compressor = zlib.compressobj(COMPRESSION_GZIP_LEVEL, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+
+    def compress(self, data: bytes, final: bool) -> bytes:
+        output = self._compressor.compress(data)
+        return output + self._compressor.flush(zlib.Z_FINISH if final else zlib.Z_SYNC_FLUSH)
+
+class _BrotliStream:
+    def __init__(self):
+        self._compressor = brotli.Compressor(quality=COMPRESSION_BROTLI_QUALITY)
+
+    def compress(self, data: bytes, final: bool) -> bytes:
+        output = self._compressor.process(data)
+        return output + (self._compressor.finish() if final else self._compressor.flush())
+
+_STREAMS = {"gzip": _GzipStream, "br": _BrotliStream}
+
+class CompressionMiddleware:
+    """Pure ASGI middleware, so streaming responses are never buffered"""
+
+    def __init__(self, app, minimum_size: int = COMPRESSION_MIN_SIZE):
+        self.app = app
+        self.minimum_size = minimum_size
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not COMPRESSION_ENABLED:
+            await self.app(scope, receive, send)
+            return
+        encoding = choose_encoding(Headers(scope=scope).get("accept-encoding", ""))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+        await _CompressingResponder(self.app, encoding, self.minimum_size)(scope, receive, send)
+
+class _CompressingResponder:
+    def __init__(self, app, encoding: str, minimum_size: int):
+        self.app = app
+        self.encoding = encoding
+        self.minimum_size = minimum_size
+        self.send = None
+        self.start_message = None
+        self.stream = None
+        # None until the first body chunk decides whether to compress
+        self.compressing = None
+
+    async def __call__(self, scope, receive, send):
+        self.send = send
+        await self.app(scope, receive, self.send_compressed)
+
+    def _should_compress(self, headers: Headers) -> bool:
+        if "content-encoding" in headers or self.start_message["status"] in (204, 304):
+            return False
+        content_type = headers.get("content-type", "").split(";", 1)[0].strip().lower()
+        return content_type in COMPRESSIBLE_TYPES
+
+    async def send_compressed(self, message):
+        if message["type"] == "http.response.start":
+            # Hold the headers until the first body chunk shows what to do
+            self.start_message = message
+            return
+        if message["type"] != "http.response.body":
+            await self.send(message)
+            return
+
+        body = message.get("body", b"")
+        more_body = message.get("more_body", False)
+
+        if self.compressing is None:
+            headers = MutableHeaders(raw=self.start_message["headers"])
+            if not self._should_compress(headers):
+                self.compressing = False
+            else:
+                headers.add_vary_header("Accept-Encoding")
+                self.compressing = more_body or len(body) >= self.minimum_size
+            if self.compressing:
+                self.stream = _STREAMS[self.encoding]()
+                headers["Content-Encoding"] = self.encoding
+                if more_body:
+                    del headers["Content-Length"]
+                else:
+                    body = self.stream.compress(body, final=True)
+                    headers["Content-Length"] = str(len(body))
+                    await self.send(self.start_message)
+                    await self.send({"type": "http.response.body", "body": body})
+                    return
+            await self.send(self.start_message)
+
+        if self.compressing:
+            message = {"type": "http.response.body", "body": self.stream.compress(body, final=not more_body), "more_body": more_body}
+        await self.send(message)
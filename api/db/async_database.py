@@ -0,0 +1,266 @@
+import asyncpg
+from dotenv import load_dotenv
+from functools import lru_cache
+from contextlib import asynccontextmanager
+from contextvars import ContextVar
+from db.instrumentation import record_query
+from db.errors import query_failed
+import asyncio
+import time
+import json
+import os
+import re
+import uuid
+import logging
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+load_dotenv()
+
+USER = os.getenv("user")
+PASSWORD = os.getenv("password")
+HOST = os.getenv("host")
+PORT = os.getenv("port")
+DBNAME = os.getenv("dbname")
+
+# Async connection pool settings
+ASYNC_POOL_MIN_SIZE = int(os.getenv("DB_ASYNC_POOL_MIN_SIZE", "1"))
+ASYNC_POOL_MAX_SIZE = int(os.getenv("DB_ASYNC_POOL_MAX_SIZE", "20"))
+ASYNC_POOL_TIMEOUT = float(os.getenv("DB_ASYNC_POOL_TIMEOUT", "30"))
+# Supabase's pooler (port 6543) runs PgBouncer in transaction mode, which
+# does not support prepared statements, so the statement cache is off by default.
+ASYNC_STATEMENT_CACHE_SIZE = int(os.getenv("DB_ASYNC_STATEMENT_CACHE_SIZE", "0"))
+
+_PLACEHOLDER_RE = re.compile(r"%\((\w+)\)s|%s|%%")
+
+@lru_cache(maxsize=512)
+def _translate_query(query):
+    """Convert psycopg2 ``%s`` / ``%(name)s`` placeholders into asyncpg ``$n`` form.
+
+    Returns the rewritten query and either the number of positional
+    parameters or the tuple of parameter names in ``$n`` order.
+    """
+    names = []
+    positional = 0
+
+    def replace(match):
+        nonlocal positional
+        token = match.group(0)
+        if token == "%%":
+            return "%"
+        if token == "%s":
+            positional += 1
+            return f"${positional}"
+        name = match.group(1)
+        if name not in names:
+            names.append(name)
+        return f"${names.index(name) + 1}"
+
+    translated = _PLACEHOLDER_RE.sub(replace, query)
+    if names and positional:
+        raise ValueError("Query mixes positional and named placeholders")
+    return translated, tuple(names) if names else positional
+
+def _prepare(query, params):
+    translated, spec = _translate_query(query)
+    if isinstance(spec, tuple):
+        return translated, [params[name] for name in spec]
+    return translated, list(params or ())
+
+def _record_to_dict(record):
+    # Match psycopg2's RealDictCursor output: UUIDs come back as strings
+    return {key: str(value) if isinstance(value, uuid.UUID) else value for key, value in record.items()}
+
+def _encode_json(value):
+    # Services already serialize JSON columns with json.dumps before binding
+    return value if isinstance(value, str) else json.dumps(value)
+
+async def _init_connection(conn):
+    for type_name in ("json", "jsonb"):
+        await conn.set_type_codec(type_name, encoder=_encode_json, decoder=json.loads, schema="pg_catalog")
+
+class AsyncDatabase:
+    """asyncio counterpart of ``db.database.Database`` backed by an asyncpg pool.
+
+    Accepts the same psycopg2-style queries and returns rows as plain dicts,
+    so services can share SQL between the sync and async code paths. The pool
+    is created on first use, inside the running event loop.
+    """
+
+    def __init__(self):
+        self.pool = None
+        self._lock = asyncio.Lock()
+        # Connection of the transaction open in this task
+        self._transaction = ContextVar(f"async_db_transaction_{id(self)}", default=None)
+
+    async def connect(self):
+        if self.pool:
+            return self.pool
+        async with self._lock:
+            if self.pool:
+                return self.pool
+            try:
+                self.pool = await asyncpg.create_pool(
+                    user=USER,
+                    password=PASSWORD,
+                    host=HOST,
+                    port=int(PORT) if PORT else None,
+                    database=DBNAME,
+                    min_size=ASYNC_POOL_MIN_SIZE,
+                    max_size=ASYNC_POOL_MAX_SIZE,
+                    statement_cache_size=ASYNC_STATEMENT_CACHE_SIZE,
+                    init=_init_connection
+                )
+                logger.info(f"Async database pool ready (min={ASYNC_POOL_MIN_SIZE}, max={ASYNC_POOL_MAX_SIZE})")
+            except (OSError, asyncpg.PostgresError) as e:
+                logger.error(f"Async database connection failed: {e}")
+                raise Exception(f"Database connection failed: Unable to connect to database server. Please check connection settings.")
+            return self.pool
+
+    @asynccontextmanager
+    async def _acquire(self):
+        """A pooled connection, or the enclosing transaction's one"""
+        conn = self._transaction.get()
+        if conn is not None:
+            yield conn
+            return
+        pool = await self.connect()
+        async with pool.acquire(timeout=ASYNC_POOL_TIMEOUT) as conn:
+            yield conn
+
+    @asynccontextmanager
+    async def transaction(self):
+        """Run the queries in the block as one transaction that commits once: ``async with async_db.transaction():``
+
+        Every ``fetch_*``/``execute`` call awaited inside the block uses the
+        transaction's connection, so they must not run concurrently (no
+        ``asyncio.gather`` inside). Nested blocks open a savepoint, so an error
+        inside one rolls back only that block.
+        """
+        conn = self._transaction.get()
+        if conn is not None:
+            # asyncpg turns a nested transaction into a savepoint
+            async with conn.transaction():
+                yield conn
+            return
+
+        try:
+            async with self._acquire() as conn:
+                transaction = conn.transaction()
+                await transaction.start()
+                token = self._transaction.set(conn)
+                try:
+                    yield conn
+                    started = time.perf_counter()
+                    await transaction.commit()
+                    record_query("COMMIT", time.perf_counter() - started, 0)
+                except BaseException:
+                    try:
+                        await transaction.rollback()
+                    except (OSError, asyncpg.PostgresError, asyncpg.InterfaceError):
+                        pass  # the pool resets or replaces the connection on release
+                    raise
+                finally:
+                    self._transaction.reset(token)
+        except asyncio.TimeoutError:
+            logger.error("Async database pool exhausted in transaction")
+            raise Exception("Database query failed: timed out waiting for a database connection")
+        except asyncpg.IntegrityConstraintViolationError as e:
+            logger.error(f"Database integrity error: {e}")
+            raise Exception(f"Data integrity violation: {str(e)}")
+        except asyncpg.PostgresError as e:
+            logger.error(f"Database query error in transaction: {e}")
+            raise query_failed(e)
+
+    async def fetch_all(self, query, params=None):
+        started = time.perf_counter()
+        sql, args = _prepare(query, params)
+        try:
+            async with self._acquire() as conn:
+                rows = await conn.fetch(sql, *args)
+            record_query(query, time.perf_counter() - started, len(rows))
+            return [_record_to_dict(row) for row in rows]
+        except asyncio.TimeoutError:
+            logger.error("Async database pool exhausted in fetch_all")
+            raise Exception("Database query failed: timed out waiting for a database connection")
+        except asyncpg.PostgresError as e:
+            logger.error(f"Database query error in fetch_all: {e}")
+            raise query_failed(e)
+
+    async def fetch_one(self, query, params=None):
+        started = time.perf_counter()
+        sql, args = _prepare(query, params)
+        try:
+            async with self._acquire() as conn:
+                row = await conn.fetchrow(sql, *args)
+            record_query(query, time.perf_counter() - started, 1 if row else 0)
+            return _record_to_dict(row) if row else None
+        except asyncio.TimeoutError:
+            logger.error("Async database pool exhausted in fetch_one")
+            raise Exception("Database query failed: timed out waiting for a database connection")
+        except asyncpg.PostgresError as e:
+            logger.error(f"Database query error in fetch_one: {e}")
+            raise query_failed(e)
+
+    async def execute(self, query, params=None):
+        started = time.perf_counter()
+        sql, args = _prepare(query, params)
+        try:
+            async with self._acquire() as conn:
+                status = await conn.execute(sql, *args)
+            # Status looks like "UPDATE 3"; the trailing number is the row count
+            last = status.rsplit(" ", 1)[-1]
+            rowcount = int(last) if last.isdigit() else -1
+            record_query(query, time.perf_counter() - started, rowcount)
+            return rowcount
+        except asyncio.TimeoutError:
+            logger.error("Async database pool exhausted in execute")
+            raise Exception("Database query failed: timed out waiting for a database connection")
+        except asyncpg.IntegrityConstraintViolationError as e:
+            logger.error(f"Database integrity error: {e}")
+            raise Exception(f"Data integrity violation: {str(e)}")
+        except asyncpg.PostgresError as e:
+            logger.error(f"Database query error in execute: {e}")
+            raise query_failed(e)
+
+    async def fetch_returning(self, query, params=None):
+        """Run a write with a ``RETURNING`` clause and return the affected rows as dicts"""
+        started = time.perf_counter()
+        sql, args = _prepare(query, params)
+        try:
+            async with self._acquire() as conn:
+                rows = await conn.fetch(sql, *args)
+            record_query(query, time.perf_counter() - started, len(rows))
+            return [_record_to_dict(row) for row in rows]
+        except asyncio.TimeoutError:
+            logger.error("Async database pool exhausted in fetch_returning")
+            raise Exception("Database query failed: timed out waiting for a database connection")
+        except asyncpg.IntegrityConstraintViolationError as e:
+            logger.error(f"Database integrity error: {e}")
+            raise Exception(f"Data integrity violation: {str(e)}")
+        except asyncpg.PostgresError as e:
+            logger.error(f"Database query error in fetch_returning: {e}")
+            raise query_failed(e)
+
+    def pool_stats(self):
+        """Async pool size snapshot"""
+        if not self.pool:
+            return {}
+        size = self.pool.get_size()
+        idle = self.pool.get_idle_size()
+        return {
+            "size": size,
+            "idle": idle,
+            "in_use": size - idle,
+            "max_size": self.pool.get_max_size(),
+        }
+
+    async def close(self):
+        if self.pool:
+            await self.pool.close()
+            self.pool = None
+            logger.info("Async database pool closed")
+
+# Shared async database handle; connects lazily on first query
+async_db = AsyncDatabase()
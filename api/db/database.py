@@ -1,8 +1,16 @@
 import psycopg2
 from psycopg2.extras import RealDictCursor
-from psycopg2 import OperationalError, DatabaseError, IntegrityError
+from psycopg2 import OperationalError, DatabaseError, IntegrityError, InterfaceError
 from dotenv import load_dotenv
+from db.pool import ConnectionPool, PoolTimeout, PoolClosed
+from db.instrumentation import record_query
+from db.errors import query_failed
+from contextlib import contextmanager
+from contextvars import ContextVar
+import threading
+import time
 import os
+import uuid
 import logging
 
 # Configure logging
@@ -16,22 +24,66 @@ HOST = os.getenv("host")
 PORT = os.getenv("port")
 DBNAME = os.getenv("dbname")
 
+# Connection pool settings
+POOL_MIN_SIZE = int(os.getenv("DB_POOL_MIN_SIZE", "1"))
+POOL_MAX_SIZE = int(os.getenv("DB_POOL_MAX_SIZE", "10"))
+POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "30"))
+POOL_HEALTH_CHECK_INTERVAL = float(os.getenv("DB_POOL_HEALTH_CHECK_INTERVAL", "30"))
+
+class _RecordingCursorMixin:
+    def execute(self, query, vars=None):
+        started = time.perf_counter()
+        result = super().execute(query, vars)
+        # execute_values/execute_batch pass composed statements as bytes
+        statement = query.decode() if isinstance(query, bytes) else str(query)
+        record_query(statement, time.perf_counter() - started, self.rowcount)
+        return result
+
+class RecordingCursor(_RecordingCursorMixin, psycopg2.extensions.cursor):
+    """Cursor for raw multi-statement work that reports each statement like ``fetch_*``/``execute`` do"""
+    pass
+
+class RecordingDictCursor(_RecordingCursorMixin, RealDictCursor):
+    """``RealDictCursor`` that reports each statement to the SQL instrumentation"""
+    pass
+
 class Database:
+    """Sync database access over a pooled set of psycopg2 connections.
+
+    The pool is created on first use (or by ``connect()`` at startup), so
+    importing this module never opens a connection.
+    """
+
     def __init__(self):
-        self.connection = None
-        self.connect()
+        self.pool = None
+        self._lock = threading.Lock()
+        # (connection, savepoint depth) of the transaction open in this context
+        self._transaction = ContextVar(f"db_transaction_{id(self)}", default=None)
 
     def connect(self):
+        if self.pool:
+            return self.pool
+        with self._lock:
+            if self.pool:
+                return self.pool
+            self.pool = self._create_pool()
+            return self.pool
+
+    def _create_pool(self):
         try:
-            self.connection = psycopg2.connect(
+            pool = ConnectionPool(
+                minconn=POOL_MIN_SIZE,
+                maxconn=POOL_MAX_SIZE,
+                timeout=POOL_TIMEOUT,
+                health_check_interval=POOL_HEALTH_CHECK_INTERVAL,
                 user=USER,
                 password=PASSWORD,
                 host=HOST,
                 port=PORT,
                 dbname=DBNAME
             )
-            self.connection.autocommit = True
-            logger.info("Database connection successful!")
+            logger.info(f"Database connection pool ready (min={POOL_MIN_SIZE}, max={POOL_MAX_SIZE})")
+            return pool
         except OperationalError as e:
             logger.error(f"Database connection failed - Operational Error: {e}")
             raise Exception(f"Database connection failed: Unable to connect to database server. Please check connection settings.")
@@ -42,49 +94,199 @@ class Database:
             logger.error(f"Database connection failed - Unexpected Error: {e}")
             raise Exception(f"Database connection failed: {str(e)}")
 
+    @contextmanager
+    def connection(self):
+        """Check out a pooled connection for multi-statement work: ``with db.connection() as conn:``
+
+        Inside ``transaction()`` this is the transaction's connection.
+        """
+        active = self._transaction.get()
+        if active:
+            yield active[0]
+            return
+        with self.connect().connection() as conn:
+            yield conn
+
+    @contextmanager
+    def transaction(self):
+        """Run the queries in the block as one transaction that commits once: ``with db.transaction() as conn:``
+
+        Every ``fetch_*``/``execute`` call made inside the block (in the same
+        thread or task) uses the transaction's connection. Nested blocks open a
+        savepoint, so an error inside one rolls back only that block. The
+        outermost block commits on success and rolls back on any exception.
+        """
+        active = self._transaction.get()
+        if active:
+            conn, depth = active
+            savepoint = f"sp_{depth + 1}"
+            self._run(conn, f"SAVEPOINT {savepoint}")
+            token = self._transaction.set((conn, depth + 1))
+            try:
+                yield conn
+            except BaseException:
+                self._run(conn, f"ROLLBACK TO SAVEPOINT {savepoint}", quiet=True)
+                raise
+            else:
+                self._run(conn, f"RELEASE SAVEPOINT {savepoint}")
+            finally:
+                self._transaction.reset(token)
+            return
+
+        try:
+            with self.connect().connection() as conn:
+                # putconn restores autocommit when the connection goes back
+                conn.autocommit = False
+                token = self._transaction.set((conn, 0))
+                try:
+                    yield conn
+                    started = time.perf_counter()
+                    conn.commit()
+                    record_query("COMMIT", time.perf_counter() - started, 0)
+                except BaseException:
+                    try:
+                        conn.rollback()
+                    except psycopg2.Error:
+                        pass  # a broken connection is discarded by the pool
+                    raise
+                finally:
+                    self._transaction.reset(token)
+        except (PoolTimeout, PoolClosed) as e:
+            logger.error(f"Database pool unavailable in transaction: {e}")
+            raise Exception(f"Database query failed: {str(e)}")
+        except IntegrityError as e:
+            logger.error(f"Database integrity error: {e}")
+            raise Exception(f"Data integrity violation: {str(e)}")
+        except psycopg2.Error as e:
+            logger.error(f"Database query error in transaction: {e}")
+            raise query_failed(e)
+
+    def _run(self, conn, statement, quiet=False):
+        """Run a transaction-control statement on ``conn``"""
+        started = time.perf_counter()
+        try:
+            with conn.cursor() as cursor:
+                cursor.execute(statement)
+        except psycopg2.Error:
+            if quiet:
+                return
+            raise
+        record_query(statement, time.perf_counter() - started, 0)
+
     def fetch_all(self, query, params=None):
-        if not self.connection:
-            raise Exception("Database not connected")
-        
+        started = time.perf_counter()
         try:
-            with self.connection.cursor(cursor_factory=RealDictCursor) as cursor:
-                cursor.execute(query, params or ())
-                return cursor.fetchall()
+            with self.connection() as conn:
+                with conn.cursor(cursor_factory=RealDictCursor) as cursor:
+                    cursor.execute(query, params or ())
+                    rows = cursor.fetchall()
+            record_query(query, time.perf_counter() - started, len(rows))
+            return rows
+        except (PoolTimeout, PoolClosed) as e:
+            logger.error(f"Database pool unavailable in fetch_all: {e}")
+            raise Exception(f"Database query failed: {str(e)}")
         except psycopg2.Error as e:
             logger.error(f"Database query error in fetch_all: {e}")
-            raise Exception(f"Database query failed: {str(e)}")
+            raise query_failed(e)
 
     def fetch_one(self, query, params=None):
-        if not self.connection:
-            raise Exception("Database not connected")
-            
+        started = time.perf_counter()
         try:
-            with self.connection.cursor(cursor_factory=RealDictCursor) as cursor:
-                cursor.execute(query, params or ())
-                return cursor.fetchone()
+            with self.connection() as conn:
+                with conn.cursor(cursor_factory=RealDictCursor) as cursor:
+                    cursor.execute(query, params or ())
+                    row = cursor.fetchone()
+            record_query(query, time.perf_counter() - started, 1 if row else 0)
+            return row
+        except (PoolTimeout, PoolClosed) as e:
+            logger.error(f"Database pool unavailable in fetch_one: {e}")
+            raise Exception(f"Database query failed: {str(e)}")
         except psycopg2.Error as e:
             logger.error(f"Database query error in fetch_one: {e}")
-            raise Exception(f"Database query failed: {str(e)}")
+            raise query_failed(e)
 
     def execute(self, query, params=None):
-        if not self.connection:
-            raise Exception("Database not connected")
-            
+        started = time.perf_counter()
         try:
-            with self.connection.cursor() as cursor:
-                cursor.execute(query, params or ())
-                self.connection.commit()
+            with self.connection() as conn:
+                with conn.cursor() as cursor:
+                    cursor.execute(query, params or ())
+                    rowcount = cursor.rowcount
+            record_query(query, time.perf_counter() - started, rowcount)
+            return rowcount
+        except (PoolTimeout, PoolClosed) as e:
+            logger.error(f"Database pool unavailable in execute: {e}")
+            raise Exception(f"Database query failed: {str(e)}")
         except IntegrityError as e:
             logger.error(f"Database integrity error: {e}")
             raise Exception(f"Data integrity violation: {str(e)}")
         except psycopg2.Error as e:
             logger.error(f"Database query error in execute: {e}")
+            raise query_failed(e)
+
+    def fetch_returning(self, query, params=None):
+        """Run a write with a ``RETURNING`` clause and return the affected rows as dicts"""
+        started = time.perf_counter()
+        try:
+            with self.connection() as conn:
+                with conn.cursor(cursor_factory=RealDictCursor) as cursor:
+                    cursor.execute(query, params or ())
+                    rows = cursor.fetchall()
+            record_query(query, time.perf_counter() - started, len(rows))
+            return rows
+        except (PoolTimeout, PoolClosed) as e:
+            logger.error(f"Database pool unavailable in fetch_returning: {e}")
+            raise Exception(f"Database query failed: {str(e)}")
+        except IntegrityError as e:
+            logger.error(f"Database integrity error: {e}")
+            raise Exception(f"Data integrity violation: {str(e)}")
+        except psycopg2.Error as e:
+            logger.error(f"Database query error in fetch_returning: {e}")
+            raise query_failed(e)
+
+    def stream(self, query, params=None, batch_size=1000):
+        """Yield lists of rows from a server-side (named) cursor, ``batch_size`` rows at a time.
+
+        Only one batch is held in memory, so large exports run in constant space.
+        The connection stays checked out until the generator is exhausted or closed.
+        """
+        pool = self.connect()
+        conn = pool.getconn()
+        discard = False
+        try:
+            # Named cursors only live inside a transaction
+            conn.autocommit = False
+            with conn.cursor(name=f"stream_{uuid.uuid4().hex}", cursor_factory=RealDictCursor) as cursor:
+                cursor.itersize = batch_size
+                cursor.execute(query, params or ())
+                while True:
+                    rows = cursor.fetchmany(batch_size)
+                    if not rows:
+                        break
+                    yield rows
+        except (OperationalError, InterfaceError) as e:
+            discard = True
+            logger.error(f"Database connection lost in stream: {e}")
             raise Exception(f"Database query failed: {str(e)}")
+        except psycopg2.Error as e:
+            logger.error(f"Database query error in stream: {e}")
+            raise query_failed(e)
+        finally:
+            # putconn rolls back the read-only transaction and restores autocommit
+            pool.putconn(conn, discard=discard)
+
+    def pool_stats(self):
+        """Connection pool usage and wait metrics"""
+        if not self.pool:
+            return {}
+        return self.pool.stats()
 
     def close(self):
-        if self.connection:
-            self.connection.close()
-            logger.info("Database connection closed")
+        with self._lock:
+            pool, self.pool = self.pool, None
+        if pool:
+            pool.closeall()
+            logger.info("Database connection pool closed")
 
-# Initialize database connection
+# Shared database handle; connects lazily on first query
 db = Database()
@@ -0,0 +1,22 @@
+"""
+Exceptions raised by ``Database`` and ``AsyncDatabase``.
+
+Failed queries surface as plain ``Exception("Database query failed: ...")``
+so callers and routers can treat them uniformly. A few failures callers
+react to get a subclass carrying the same message.
+"""
+
+# SQLSTATE for a reference to a table that does not exist
+UNDEFINED_TABLE = "42P01"
+
+class UndefinedTableError(Exception):
+    """A query referenced a missing table, e.g. before its migration was applied"""
+    pass
+
+def query_failed(error) -> Exception:
+    """Exception to raise for a driver error (psycopg2 ``pgcode`` / asyncpg ``sqlstate``)"""
+    message = f"Database query failed: {str(error)}"
+    sqlstate = getattr(error, "pgcode", None) or getattr(error, "sqlstate", None)
+    if sqlstate == UNDEFINED_TABLE:
+        return UndefinedTableError(message)
+    return Exception(message)
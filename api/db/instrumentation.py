@@ -0,0 +1,135 @@
+"""
+Request-scoped SQL instrumentation.
+
+``Database`` and ``AsyncDatabase`` report every statement to the collector
+held in a context variable. The HTTP middleware opens one collector per
+request, turns the totals into a ``Server-Timing`` header and warns when the
+same statement shape runs more than ``SQL_REPEAT_WARNING_THRESHOLD`` times
+(the usual sign of an N+1 query).
+
+In tests, ``assert_query_budget`` checks how many queries a block of code or
+an HTTP request issued::
+
+    with assert_query_budget(max_queries=3, max_repeats=1):
+        client.get("/invoices")
+"""
+from contextlib import contextmanager
+from contextvars import ContextVar
+from collections import Counter
+from typing import List, Optional
+import threading
+import re
+import os
+import logging
+
+logger = logging.getLogger(__name__)
+
+SQL_REPEAT_WARNING_THRESHOLD = int(os.getenv("SQL_REPEAT_WARNING_THRESHOLD", "5"))
+
+_LITERAL_RE = re.compile(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b")
+_WHITESPACE_RE = re.compile(r"\s+")
+
+def statement_shape(query: str) -> str:
+    """Normalize a statement so repeats with different literals compare equal"""
+    return _WHITESPACE_RE.sub(" ", _LITERAL_RE.sub("?", query)).strip()
+
+class QueryRecord:
+    __slots__ = ("statement", "duration", "rows")
+
+    def __init__(self, statement: str, duration: float, rows: int):
+        self.statement = statement
+        self.duration = duration
+        self.rows = rows
+
+class QueryCollector:
+    """Statements run while this collector is current"""
+
+    def __init__(self, name: str = None):
+        self.name = name
+        self.queries: List[QueryRecord] = []
+        self._lock = threading.Lock()
+
+    def record(self, statement: str, duration: float, rows: int):
+        with self._lock:
+            self.queries.append(QueryRecord(statement, duration, rows))
+
+    @property
+    def count(self) -> int:
+        return len(self.queries)
+
+    @property
+    def total_time(self) -> float:
+        return sum(query.duration for query in self.queries)
+
+    def repeated(self) -> Counter:
+        """Number of executions per statement shape"""
+        return Counter(statement_shape(query.statement) for query in self.queries)
+
+    def server_timing(self) -> str:
+        return f'db;dur={self.total_time * 1000:.1f};desc="{self.count} queries"'
+
+    def warn_repeats(self, threshold: int = SQL_REPEAT_WARNING_THRESHOLD):
+        for shape, times in self.repeated().items():
+            if times > threshold:
+                logger.warning(f"Possible N+1 in {self.name or 'unknown endpoint'}: statement ran {times} times: {shape[:200]}")
+
+_current: ContextVar[Optional[QueryCollector]] = ContextVar("sql_query_collector", default=None)
+
+# Callbacks notified when a request's collector finishes (see capture_queries)
+_listeners = []
+
+# Callbacks notified of every statement, inside a request or not (see metrics.py)
+_observers = []
+
+def add_query_observer(observer):
+    """Call ``observer(statement, duration, rows)`` after every statement"""
+    _observers.append(observer)
+
+def record_query(statement: str, duration: float, rows: int):
+    collector = _current.get()
+    if collector is not None:
+        collector.record(statement, duration, rows)
+    for observer in _observers:
+        observer(statement, duration, rows)
+
+@contextmanager
+def collect_queries(name: str = None):
+    """Make a new collector current for the duration of the block"""
+    collector = QueryCollector(name)
+    token = _current.set(collector)
+    try:
+        yield collector
+    finally:
+        _current.reset(token)
+        for listener in list(_listeners):
+            listener(collector)
+
+@contextmanager
+def capture_queries():
+    """Collect queries run in this context and by any request that finishes inside the block"""
+    captured = QueryCollector("captured")
+
+    def listener(collector):
+        captured.queries.extend(collector.queries)
+
+    _listeners.append(listener)
+    try:
+        # Queries run directly in this context reach the listener when the block exits
+        with collect_queries("captured"):
+            yield captured
+    finally:
+        _listeners.remove(listener)
+
+@contextmanager
+def assert_query_budget(max_queries: int = None, max_repeats: int = None):
+    """Fail with AssertionError if the block issues more queries than allowed"""
+    with capture_queries() as captured:
+        yield captured
+
+    if max_queries is not None and captured.count > max_queries:
+        statements = "\n".join(f"  {statement_shape(query.statement)[:160]}" for query in captured.queries)
+        raise AssertionError(f"Expected at most {max_queries} queries, got {captured.count}:\n{statements}")
+    if max_repeats is not None:
+        for shape, times in captured.repeated().items():
+            if times > max_repeats:
+                raise AssertionError(f"Statement ran {times} times (max {max_repeats}): {shape[:160]}")
@@ -1,18 +1,25 @@
 from fastapi import FastAPI, Request, HTTPException
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, Response
 from fastapi.exceptions import RequestValidationError
 from starlette.exceptions import HTTPException as StarletteHTTPException
-import traceback
 import logging
+import random
+import uuid
 from datetime import datetime
+from db.instrumentation import collect_queries
+from log_config import setup_logging, request_id_var, LOG_SAMPLE_2XX
+from responses import FastJSONResponse
+from compression import CompressionMiddleware
+import metrics
 from routers import customers, products, invoices, payments, invoice_items, dashboard, additional_charges, company
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
 import docs
+import time
 import os
 
 # Configure logging
-logging.basicConfig(level=logging.INFO)
+setup_logging()
 logger = logging.getLogger(__name__)
 
 app = FastAPI(
@@ -61,7 +68,8 @@ app = FastAPI(
     },
     docs_url="/api-docs",  # Custom docs URL
     redoc_url="/api-redoc",  # Alternative docs URL
-    openapi_url="/api-openapi.json"  # OpenAPI schema URL
+    openapi_url="/api-openapi.json",  # OpenAPI schema URL
+    default_response_class=FastJSONResponse  # orjson / pydantic-core serialization
 )
 
 # Add CORS middleware
@@ -80,9 +88,13 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["GET", "POST", "PUT", "DELETE", "OPTIONS"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "X-Prev-Cursor", "ETag", "X-Request-ID"],  # Pagination cursors, PDF cache validator, log correlation
     max_age=3600,  # Cache preflight responses for 1 hour
 )
 
+# Compress JSON/CSV/NDJSON responses (PDFs and ZIPs pass through)
+app.add_middleware(CompressionMiddleware)
+
 # Global exception handler for validation errors
 @app.exception_handler(RequestValidationError)
 async def validation_exception_handler(request: Request, exc: RequestValidationError):
@@ -94,7 +106,7 @@ async def validation_exception_handler(request: Request, exc: RequestValidationE
             "type": error["type"]
         })
     
-    logger.error(f"Validation error on {request.method} {request.url}: {error_details}")
+    logger.warning(f"Validation error on {request.method} {request.url.path}: {error_details}")
     
     return JSONResponse(
         status_code=422,
@@ -110,7 +122,10 @@ async def validation_exception_handler(request: Request, exc: RequestValidationE
 # Global exception handler for HTTP exceptions
 @app.exception_handler(StarletteHTTPException)
 async def http_exception_handler(request: Request, exc: StarletteHTTPException):
-    logger.error(f"HTTP error on {request.method} {request.url}: {exc.status_code} - {exc.detail}")
+    logger.log(
+        logging.ERROR if exc.status_code >= 500 else logging.WARNING,
+        f"HTTP error on {request.method} {request.url.path}: {exc.status_code} - {exc.detail}"
+    )
     
     return JSONResponse(
         status_code=exc.status_code,
@@ -119,14 +134,15 @@ async def http_exception_handler(request: Request, exc: StarletteHTTPException):
             "message": exc.detail,
             "timestamp": datetime.now().isoformat(),
             "path": str(request.url)
-        }
+        },
+        headers=getattr(exc, "headers", None)  # e.g. Retry-After on 503
     )
 
 # Global exception handler for all other exceptions
 @app.exception_handler(Exception)
 async def global_exception_handler(request: Request, exc: Exception):
-    error_trace = traceback.format_exc()
-    logger.error(f"Unhandled exception on {request.method} {request.url}: {str(exc)}\n{error_trace}")
+    # The traceback is formatted on the log listener thread, not here
+    logger.error(f"Unhandled exception on {request.method} {request.url.path}: {str(exc)}", exc_info=exc)
     
     # Different error messages for different exception types
     if "psycopg2" in str(type(exc)) or "database" in str(exc).lower():
@@ -156,30 +172,43 @@ async def global_exception_handler(request: Request, exc: Exception):
         }
     )
 
-# Enhanced request logging middleware
+# Per-request instrumentation: request id, Prometheus metrics, Server-Timing
+# header, N+1 warnings and the sampled access log
 @app.middleware("http")
-async def log_requests(request: Request, call_next):
-    start_time = datetime.now()
-    
-    # Log request details
-    logger.info(f"🔵 {request.method} {request.url}")
-    
+async def instrument_requests(request: Request, call_next):
+    started = time.perf_counter()
+    request_id = request.headers.get("x-request-id") or uuid.uuid4().hex
+    # Not reset afterwards: each request runs in its own task, and the
+    # exception handlers outside this middleware still need the id
+    request_id_var.set(request_id)
+    route = metrics.route_template(app.router.routes, request.scope)
+    status = 500
     try:
-        response = await call_next(request)
-        
-        # Calculate response time
-        process_time = (datetime.now() - start_time).total_seconds()
-        
-        # Log response details
-        status_emoji = "🟢" if response.status_code < 400 else "🔴"
-        logger.info(f"{status_emoji} {request.method} {request.url} - {response.status_code} ({process_time:.3f}s)")
-        
-        return response
-        
-    except Exception as e:
-        process_time = (datetime.now() - start_time).total_seconds()
-        logger.error(f"🔴 {request.method} {request.url} - ERROR ({process_time:.3f}s): {str(e)}")
-        raise
+        with metrics.track_in_progress(request.method, route):
+            with collect_queries(f"{request.method} {route}") as collector:
+                response = await call_next(request)
+        status = response.status_code
+    finally:
+        elapsed = time.perf_counter() - started
+        metrics.observe_request(request.method, route, status, elapsed)
+        metrics.refresh_pool_gauges()
+        # Successful requests are sampled; errors are always logged
+        if status >= 400 or random.random() < LOG_SAMPLE_2XX:
+            logger.info(
+                f"{request.method} {request.url.path} {status} {elapsed * 1000:.1f}ms",
+                extra={
+                    "method": request.method,
+                    "path": request.url.path,
+                    "route": route,
+                    "status": status,
+                    "duration_ms": round(elapsed * 1000, 1),
+                    "db_queries": collector.count,
+                }
+            )
+    response.headers["Server-Timing"] = f'{collector.server_timing()}, app;dur={elapsed * 1000:.1f}'
+    response.headers["X-Request-ID"] = request_id
+    collector.warn_repeats()
+    return response
 
 # Include routers
 app.include_router(customers.router)
@@ -195,7 +224,54 @@ app.include_router(docs.router)  # Custom API documentation
 # Health check endpoint
 @app.get("/health")
 async def health_check():
-    return {"status": "healthy", "timestamp": datetime.now().isoformat()}
+    from db.database import db
+    from db.async_database import async_db
+    from services.pdf_cache import pdf_cache
+    from services.pdf_renderer import pdf_renderer
+    from services.dashboard_cache import dashboard_cache
+    return {
+        "status": "healthy",
+        "timestamp": datetime.now().isoformat(),
+        "database_pool": db.pool_stats(),
+        "async_database_pool": async_db.pool_stats(),
+        "pdf_cache": pdf_cache.stats(),
+        "pdf_renderer": pdf_renderer.stats(),
+        "dashboard_cache": dashboard_cache.stats()
+    }
+
+# Prometheus scrape endpoint
+@app.get("/metrics", include_in_schema=False)
+async def prometheus_metrics():
+    if not metrics.METRICS_ENABLED:
+        raise HTTPException(status_code=503, detail="Metrics are disabled")
+    return Response(content=metrics.render_latest(), media_type=metrics.CONTENT_TYPE_LATEST)
+
+@app.on_event("startup")
+async def open_database_pool():
+    # Pools are created lazily on the first query. Long-running servers can
+    # set DB_CONNECT_ON_STARTUP=true to pay the connection cost up front;
+    # serverless cold starts should leave it off.
+    if os.getenv("DB_CONNECT_ON_STARTUP", "false").lower() != "true":
+        return
+    from db.database import db
+    from db.async_database import async_db
+    from starlette.concurrency import run_in_threadpool
+    try:
+        await run_in_threadpool(db.connect)
+        await async_db.connect()
+    except Exception as e:
+        # Keep serving; the next query retries the connection
+        logger.warning(f"Database warm-up failed: {e}")
+
+@app.on_event("shutdown")
+async def close_database_pool():
+    from db.database import db
+    from db.async_database import async_db
+    from services.pdf_renderer import pdf_renderer
+    pdf_renderer.shutdown()
+    await async_db.close()
+    db.close()
+    metrics.mark_process_dead()
 
 # Simple stats endpoint for testing
 @app.get("/dashboard/stats-simple")
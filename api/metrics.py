@@ -0,0 +1,157 @@
+"""
+Prometheus metrics, exported in text format at ``GET /metrics``.
+
+Covers request latency per route and status, in-flight requests, SQL query
+durations, database pool usage, PDF render timings, and PDF and dashboard
+cache lookups.
+
+With several worker processes (``uvicorn --workers N``, gunicorn), point
+``PROMETHEUS_MULTIPROC_DIR`` at an empty directory shared by the workers and
+wipe it on every deploy. Each worker then writes its samples there and
+``/metrics`` aggregates all of them, whichever worker serves the scrape.
+Without it, every worker reports only its own samples.
+
+Set ``METRICS_ENABLED=false`` to turn collection off. If ``prometheus_client``
+is not installed, metrics are disabled and ``/metrics`` returns 503.
+"""
+from contextlib import nullcontext
+from typing import Optional
+from starlette.routing import Match
+from db.instrumentation import add_query_observer
+import os
+import logging
+
+logger = logging.getLogger(__name__)
+
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "true").lower() == "true"
+MULTIPROC_DIR = os.getenv("PROMETHEUS_MULTIPROC_DIR")
+
+try:
+    from prometheus_client import (
+        CollectorRegistry, Counter, Gauge, Histogram, REGISTRY,
+        CONTENT_TYPE_LATEST, generate_latest, multiprocess,
+    )
+except ImportError:
+    if METRICS_ENABLED:
+        logger.warning("prometheus_client is not installed; metrics are disabled")
+    METRICS_ENABLED = False
+    CONTENT_TYPE_LATEST = "text/plain; version=0.0.4; charset=utf-8"
+
+# Request latency buckets, in seconds
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+QUERY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+RENDER_BUCKETS = (0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+if METRICS_ENABLED:
+    HTTP_REQUEST_DURATION = Histogram(
+        "http_request_duration_seconds", "Time to response headers, per route and status",
+        ["method", "route", "status"], buckets=LATENCY_BUCKETS
+    )
+    HTTP_REQUESTS_IN_PROGRESS = Gauge(
+        "http_requests_in_progress", "Requests currently being handled",
+        ["method", "route"], multiprocess_mode="livesum"
+    )
+    DB_QUERY_DURATION = Histogram(
+        "db_query_duration_seconds", "SQL statement duration, including pool checkout",
+        ["operation"], buckets=QUERY_BUCKETS
+    )
+    DB_POOL_CONNECTIONS = Gauge(
+        "db_pool_connections", "Pooled database connections by state",
+        ["pool", "state"], multiprocess_mode="livesum"
+    )
+    PDF_RENDER_DURATION = Histogram(
+        "pdf_render_duration_seconds", "Time spent rendering one invoice PDF",
+        buckets=RENDER_BUCKETS
+    )
+    PDF_RENDER_QUEUE_WAIT = Histogram(
+        "pdf_render_queue_wait_seconds", "Time a render waited for a free worker",
+        buckets=RENDER_BUCKETS
+    )
+    PDF_RENDERS = Counter(
+        "pdf_renders", "Finished PDF renders by outcome (ok, failed, rejected, cancelled)",
+        ["outcome"]
+    )
+    PDF_CACHE_LOOKUPS = Counter(
+        "pdf_cache_lookups", "PDF cache lookups by result (hit, miss)",
+        ["result"]
+    )
+    DASHBOARD_CACHE_LOOKUPS = Counter(
+        "dashboard_cache_lookups", "Dashboard cache lookups by result (hit, stale, miss)",
+        ["result"]
+    )
+
+_SQL_OPERATIONS = {"select", "insert", "update", "delete", "with"}
+
+def _sql_operation(statement: str) -> str:
+    words = statement.split(None, 1)
+    operation = words[0].lower() if words else ""
+    return operation if operation in _SQL_OPERATIONS else "other"
+
+def route_template(routes, scope) -> str:
+    """Path template of the route serving ``scope`` (``/invoices/{invoice_id}``), to keep label cardinality bounded"""
+    partial = None
+    for route in routes:
+        match, _ = route.matches(scope)
+        if match == Match.FULL:
+            return route.path
+        if match == Match.PARTIAL and partial is None:
+            partial = route.path
+    return partial or "unmatched"
+
+def observe_request(method: str, route: str, status: int, duration: float):
+    if METRICS_ENABLED:
+        HTTP_REQUEST_DURATION.labels(method, route, str(status)).observe(duration)
+
+def track_in_progress(method: str, route: str):
+    """Gauge context manager counting the requests in flight for a route"""
+    if not METRICS_ENABLED:
+        return nullcontext()
+    return HTTP_REQUESTS_IN_PROGRESS.labels(method, route).track_inprogress()
+
+def observe_query(statement: str, duration: float, rows: int):
+    if METRICS_ENABLED:
+        DB_QUERY_DURATION.labels(_sql_operation(statement)).observe(duration)
+
+if METRICS_ENABLED:
+    add_query_observer(observe_query)
+
+def observe_pdf_render(render_time: Optional[float], queue_wait: Optional[float], outcome: str = "ok"):
+    if not METRICS_ENABLED:
+        return
+    PDF_RENDERS.labels(outcome).inc()
+    if render_time is not None:
+        PDF_RENDER_DURATION.observe(render_time)
+    if queue_wait is not None:
+        PDF_RENDER_QUEUE_WAIT.observe(queue_wait)
+
+def observe_pdf_cache(hit: bool):
+    if METRICS_ENABLED:
+        PDF_CACHE_LOOKUPS.labels("hit" if hit else "miss").inc()
+
+def observe_dashboard_cache(result: str):
+    if METRICS_ENABLED:
+        DASHBOARD_CACHE_LOOKUPS.labels(result).inc()
+
+def refresh_pool_gauges():
+    """Copy the current pool sizes into gauges (cheap; done after every request)"""
+    if not METRICS_ENABLED:
+        return
+    from db.database import db
+    from db.async_database import async_db
+    for name, stats in (("sync", db.pool_stats()), ("async", async_db.pool_stats())):
+        for state in ("in_use", "idle"):
+            DB_POOL_CONNECTIONS.labels(name, state).set(stats.get(state, 0))
+
+def render_latest() -> bytes:
+    """All metrics in Prometheus text format, aggregated across workers when configured"""
+    refresh_pool_gauges()
+    if MULTIPROC_DIR:
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return generate_latest(registry)
+    return generate_latest(REGISTRY)
+
+def mark_process_dead():
+    """Drop this worker's live gauges from the shared directory on shutdown"""
+    if METRICS_ENABLED and MULTIPROC_DIR:
+        multiprocess.mark_process_dead(os.getpid())
@@ -6,6 +6,7 @@ import json
 
 # Invoice item structure for requests
 class InvoiceItemRequest(BaseModel):
+    id: Optional[str] = None  # Existing line to update (invoice updates only); omit for new lines
     product_id: Optional[str] = None
     description: str
     hsn_sac_code: Optional[str] = None
@@ -69,6 +70,17 @@ class InvoiceCreateRequest(BaseModel):
                 raise ValueError('shipping_address must be valid JSON string or dictionary')
         return v
 
+class InvoiceBulkCreateRequest(BaseModel):
+    invoices: List[InvoiceCreateRequest] = Field(min_length=1, max_length=1000)
+
+class InvoicePdfBatchRequest(BaseModel):
+    invoice_ids: Optional[List[str]] = Field(default=None, min_length=1, max_length=500)
+    # Used when invoice_ids is not given
+    date_from: Optional[DateType] = None
+    date_to: Optional[DateType] = None
+    status: Optional[str] = None
+    format: str = Field(default="zip", pattern="^(zip|pdf)$")  # ZIP of PDFs or one merged PDF
+
 class InvoiceUpdateRequest(BaseModel):
     customer_id: Optional[str] = None
     date: Optional[DateType] = None
@@ -201,3 +213,17 @@ class InvoiceResponse(BaseModel):
 
     class Config:
         from_attributes = True
+
+# Bulk creation results
+class InvoiceBulkResult(BaseModel):
+    index: int  # Position of the invoice in the request
+    status: str  # 'created' or 'failed'
+    id: Optional[str] = None
+    invoice_number: Optional[str] = None
+    total_amount: Optional[float] = None
+    error: Optional[str] = None
+
+class InvoiceBulkCreateResponse(BaseModel):
+    created: int
+    failed: int
+    results: List[InvoiceBulkResult]
@@ -0,0 +1,67 @@
+"""
+JSON responses serialized with orjson and pydantic-core.
+
+``FastJSONResponse`` is the app's default response class. Routes that return
+models validated by a service can wrap them in it directly
+(``return FastJSONResponse(invoices)``): FastAPI then skips its own
+dump-and-revalidate pass over ``response_model`` and the models are written
+to JSON by pydantic-core in one step. ``response_model`` stays on the route
+for the OpenAPI schema.
+
+``etag_matches`` and ``cache_headers`` support conditional GETs: resources
+carry a weak ETag built from a hash of their rows, and a matching
+``If-None-Match`` is answered with 304 before the response is built.
+"""
+from functools import lru_cache
+from decimal import Decimal
+from typing import List, Optional
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel, TypeAdapter
+import orjson
+
+@lru_cache(maxsize=None)
+def _adapter(model: type) -> TypeAdapter:
+    return TypeAdapter(model)
+
+@lru_cache(maxsize=None)
+def _list_adapter(model: type) -> TypeAdapter:
+    return TypeAdapter(List[model])
+
+def _default(value):
+    if isinstance(value, BaseModel):
+        return value.model_dump(mode="json")
+    if isinstance(value, Decimal):
+        return float(value)
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+def dumps(content) -> bytes:
+    """Serialize models, lists of models or plain JSON-compatible data"""
+    if isinstance(content, BaseModel):
+        return _adapter(type(content)).dump_json(content)
+    if isinstance(content, list) and content and isinstance(content[0], BaseModel):
+        model = type(content[0])
+        if all(type(item) is model for item in content):
+            return _list_adapter(model).dump_json(content)
+    return orjson.dumps(content, default=_default, option=orjson.OPT_NON_STR_KEYS)
+
+class FastJSONResponse(JSONResponse):
+    def render(self, content) -> bytes:
+        return dumps(content)
+
+def cache_headers(version: str) -> dict:
+    """Validator headers for a resource version; clients must revalidate before reuse"""
+    return {"ETag": f'W/"{version}"', "Cache-Control": "private, no-cache"}
+
+def etag_matches(if_none_match: Optional[str], version: str) -> bool:
+    """Weak comparison of an If-None-Match header against the current version"""
+    if not if_none_match:
+        return False
+    for tag in if_none_match.split(","):
+        tag = tag.strip()
+        if tag == "*":
+            return True
+        if tag.startswith("W/"):
+            tag = tag[2:]
+        if tag.strip('"') == version:
+            return True
+    return False
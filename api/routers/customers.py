@@ -1,14 +1,18 @@
-from fastapi import APIRouter, HTTPException, Query
+from fastapi import APIRouter, HTTPException, Query, Response, Header
 from typing import List, Optional
-from services.customer_service import (
+from services.async_customer_service import (
     get_all_customers,
+    get_customers_page,
     search_customers,
     get_all_customers_including_inactive,
     get_customer_by_id,
+    get_customer_version,
     create_customer,
     update_customer,
     delete_customer
 )
+from responses import FastJSONResponse, cache_headers, etag_matches
+from services.pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, set_pagination_headers
 from models.customer_models import CustomerCreateRequest, CustomerUpdateRequest, CustomerResponse
 
 router = APIRouter(
@@ -36,14 +40,32 @@ router = APIRouter(
     **Returns:**
     - List of customer objects with complete information
     - Empty list if no active customers exist
+
+    **Pagination (optional):**
+    - `limit`: Page size (1-200); enables keyset pagination
+    - `after`: Cursor from the `X-Next-Cursor` header to fetch the next page
+    - `before`: Cursor from the `X-Prev-Cursor` header to fetch the previous page
+    - Without any of these parameters the full list is returned
     """
 )
-async def get_customers(search: Optional[str] = Query(default=None, description="Search by name/email/phone/contact/company")):
+async def get_customers(
+    search: Optional[str] = Query(default=None, description="Search by name/email/phone/contact/company"),
+    limit: Optional[int] = Query(default=None, ge=1, le=MAX_PAGE_SIZE, description="Page size; enables cursor pagination"),
+    after: Optional[str] = Query(default=None, description="Cursor of the last row of the previous page"),
+    before: Optional[str] = Query(default=None, description="Cursor of the first row of the next page")
+):
     """Get all active customers or search by term"""
     try:
-        if search:
-            return search_customers(search)
-        return get_all_customers()
+        if limit is None and after is None and before is None:
+            if search:
+                return FastJSONResponse(await search_customers(search))
+            return FastJSONResponse(await get_all_customers())
+        customers, next_cursor, prev_cursor = await get_customers_page(limit or DEFAULT_PAGE_SIZE, after, before, search)
+        response = FastJSONResponse(customers)
+        set_pagination_headers(response, next_cursor, prev_cursor)
+        return response
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -64,7 +86,7 @@ async def get_customers(search: Optional[str] = Query(default=None, description=
 async def get_all_customers_endpoint():
     """Get all customers including inactive ones"""
     try:
-        return get_all_customers_including_inactive()
+        return FastJSONResponse(await get_all_customers_including_inactive())
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -75,24 +97,35 @@ async def get_all_customers_endpoint():
     description="""
     Retrieve a specific customer by their unique ID.
 
+    Responses carry a weak `ETag`; send it back in `If-None-Match` to get
+    `304 Not Modified` without the body while the customer is unchanged.
+
     **Parameters:**
     - `customer_id`: UUID of the customer to retrieve
 
     **Returns:**
     - Customer object with complete information
+    - 304 Not Modified if `If-None-Match` matches the current `ETag`
 
     **Errors:**
     - 404: Customer with the specified ID does not exist
     - 422: Invalid UUID format
     """
 )
-async def get_customer(customer_id: str):
+async def get_customer(customer_id: str, if_none_match: Optional[str] = Header(None)):
     """Get a specific customer by ID"""
     try:
-        customer = get_customer_by_id(customer_id)
+        version = await get_customer_version(customer_id)
+        if not version:
+            raise HTTPException(status_code=404, detail=f"Customer not found: {customer_id}")
+        headers = cache_headers(version)
+        if etag_matches(if_none_match, version):
+            return Response(status_code=304, headers=headers)
+
+        customer = await get_customer_by_id(customer_id)
         if not customer:
             raise HTTPException(status_code=404, detail=f"Customer not found: {customer_id}")
-        return customer
+        return FastJSONResponse(customer, headers=headers)
     except HTTPException:
         raise
     except Exception as e:
@@ -129,7 +162,7 @@ async def get_customer(customer_id: str):
 async def create_new_customer(customer_data: CustomerCreateRequest):
     """Create a new customer"""
     try:
-        return create_customer(customer_data)
+        return await create_customer(customer_data)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -159,7 +192,7 @@ async def create_new_customer(customer_data: CustomerCreateRequest):
 async def update_existing_customer(customer_id: str, customer_data: CustomerUpdateRequest):
     """Update an existing customer"""
     try:
-        updated_customer = update_customer(customer_id, customer_data)
+        updated_customer = await update_customer(customer_id, customer_data)
         if not updated_customer:
             raise HTTPException(status_code=404, detail=f"Customer not found: {customer_id}")
         return updated_customer
@@ -194,7 +227,7 @@ async def update_existing_customer(customer_id: str, customer_data: CustomerUpda
 async def delete_existing_customer(customer_id: str):
     """Soft delete a customer (sets is_active to false)"""
     try:
-        success = delete_customer(customer_id)
+        success = await delete_customer(customer_id)
         if not success:
             raise HTTPException(status_code=404, detail=f"Customer not found: {customer_id}")
         return {"message": "Customer deactivated successfully"}
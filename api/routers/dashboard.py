@@ -1,7 +1,10 @@
-from fastapi import APIRouter, HTTPException
-from typing import Dict, Any, List
-from pydantic import BaseModel
+from fastapi import APIRouter, HTTPException, Query
+from typing import Dict, Any, List, Optional
+from datetime import date
+from pydantic import BaseModel, Field
+from responses import FastJSONResponse
 from services.dashboard_service import get_dashboard_stats
+from services.revenue_service import get_revenue_series, MAX_REVENUE_PERIODS
 
 router = APIRouter()
 
@@ -33,6 +36,26 @@ class DashboardStats(BaseModel):
     recent_invoices: List[RecentInvoice]
     revenue_trend: List[RevenueTrend]
 
+class RevenuePoint(BaseModel):
+    period: str
+    start: date
+    key: Optional[str] = None
+    label: Optional[str] = None
+    invoice_count: Optional[int] = None
+    revenue: float
+    collected: Optional[float] = None
+    quantity: Optional[float] = None
+
+class RevenueSeries(BaseModel):
+    from_date: date = Field(alias="from")
+    to_date: date = Field(alias="to")
+    granularity: str
+    group_by: Optional[str] = None
+    total_revenue: float
+    total_collected: Optional[float] = None
+    total_invoices: Optional[int] = None
+    series: List[RevenuePoint]
+
 @router.get(
     "/stats", 
     response_model=DashboardStats,
@@ -57,7 +80,54 @@ class DashboardStats(BaseModel):
 async def get_stats():
     """Get dashboard statistics"""
     try:
-        stats = get_dashboard_stats()
+        stats = await get_dashboard_stats()
         return stats
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to get dashboard stats: {str(e)}")
+
+@router.get(
+    "/revenue",
+    response_model=RevenueSeries,
+    summary="Get revenue trend",
+    description=f"""
+    Revenue over a date range, bucketed by day, ISO week (Monday start), month
+    or quarter and optionally split by customer, product or invoice status.
+    
+    Served from per-day rollups maintained by the database, so multi-year
+    ranges cost one row per day and group rather than a scan of every
+    invoice. Cancelled invoices are excluded; dates are invoice dates.
+    
+    **Query parameters:**
+    - `from`, `to`: inclusive date range (default: the last 12 months)
+    - `granularity`: `day`, `week`, `month` (default) or `quarter`
+    - `group_by`: `customer`, `product` or `status` (default: one series)
+    
+    **Returns:**
+    - `series`: one point per period (and group), ordered by period then revenue.
+      `revenue` is the invoiced amount, `collected` the amount paid. When grouped
+      by product, `revenue` is the sum of line totals and `quantity` the units
+      sold; lines without a product are not counted.
+    - Ungrouped series include a zero point for every empty period
+    
+    **Errors:**
+    - 400: `from` after `to`, or more than {MAX_REVENUE_PERIODS} periods
+    - 422: Unknown granularity or group_by
+    
+    **Use cases:**
+    - Revenue trend charts
+    - Top customers or products per period
+    """
+)
+async def get_revenue(
+    from_date: Optional[date] = Query(default=None, alias="from", description="Start date (inclusive)"),
+    to_date: Optional[date] = Query(default=None, alias="to", description="End date (inclusive)"),
+    granularity: str = Query(default="month", pattern="^(day|week|month|quarter)$", description="Bucket size"),
+    group_by: Optional[str] = Query(default=None, pattern="^(customer|product|status)$", description="Split each period by")
+):
+    """Get revenue bucketed by period"""
+    try:
+        return FastJSONResponse(await get_revenue_series(from_date, to_date, granularity, group_by))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to get revenue trend: {str(e)}")
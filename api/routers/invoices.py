@@ -1,16 +1,34 @@
-from fastapi import APIRouter, HTTPException, Query
-from fastapi.responses import Response
+from fastapi import APIRouter, HTTPException, Query, Response, Header
+from fastapi.responses import StreamingResponse
 from typing import List, Optional
+from datetime import date
 from pydantic import BaseModel
-from services.invoice_service import (
+from services.async_invoice_service import (
     get_all_invoices,
+    get_invoices_page,
     get_invoice_by_id,
+    get_invoice_version,
     create_invoice,
     update_invoice,
     cancel_invoice,
-    generate_invoice_pdf
+    get_invoice_pdf_fingerprint,
+    get_cached_invoice_pdf
+)
+from services.invoice_service import create_invoices_bulk
+from services.pdf_renderer import PdfRenderBusy
+from services.pdf_batch_service import select_invoices, start_zip_stream, merged_pdf
+from starlette.concurrency import run_in_threadpool
+from services.export_service import export_invoices, start_stream, EXPORT_MEDIA_TYPES
+from responses import FastJSONResponse, cache_headers, etag_matches
+from services.pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, set_pagination_headers
+from models.invoice_models import (
+    InvoiceCreateRequest,
+    InvoiceUpdateRequest,
+    InvoiceResponse,
+    InvoiceBulkCreateRequest,
+    InvoiceBulkCreateResponse,
+    InvoicePdfBatchRequest
 )
-from models.invoice_models import InvoiceCreateRequest, InvoiceUpdateRequest, InvoiceResponse
 
 # Request model for cancellation
 class CancelInvoiceRequest(BaseModel):
@@ -40,8 +58,14 @@ router = APIRouter(
     - Calculated totals (subtotal, tax, total)
     
     **Returns:**
-    - List of invoice objects with complete information
+    - List of invoice objects with complete information, newest first
     - Empty list if no invoices exist
+
+    **Pagination (optional):**
+    - `limit`: Page size (1-200); enables keyset pagination
+    - `after`: Cursor from the `X-Next-Cursor` header to fetch the next page
+    - `before`: Cursor from the `X-Prev-Cursor` header to fetch the previous page
+    - Without any of these parameters the full list is returned
     
     **Use cases:**
     - Invoice listing and management
@@ -49,20 +73,75 @@ router = APIRouter(
     - Customer account statements
     """
 )
-async def get_invoices():
+async def get_invoices(
+    limit: Optional[int] = Query(default=None, ge=1, le=MAX_PAGE_SIZE, description="Page size; enables cursor pagination"),
+    after: Optional[str] = Query(default=None, description="Cursor of the last row of the previous page"),
+    before: Optional[str] = Query(default=None, description="Cursor of the first row of the next page")
+):
     """Get all invoices with embedded customer and product details"""
     try:
-        return get_all_invoices()
+        if limit is None and after is None and before is None:
+            return FastJSONResponse(await get_all_invoices())
+        invoices, next_cursor, prev_cursor = await get_invoices_page(limit or DEFAULT_PAGE_SIZE, after, before)
+        response = FastJSONResponse(invoices)
+        set_pagination_headers(response, next_cursor, prev_cursor)
+        return response
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@router.get(
+    "/export",
+    summary="Export invoices",
+    description="""
+    Stream invoices as NDJSON (one JSON object per line) or CSV.
+
+    Rows are read from the database in batches and written to the response
+    as they arrive, so exports of any size use constant server memory.
+
+    **Query parameters:**
+    - `format`: `ndjson` (default) or `csv`
+    - `date_from` / `date_to`: Inclusive invoice date range
+    - `status`: Only invoices with this status
+    - `customer_id`: Only invoices for this customer
+
+    **Returns:**
+    - Invoice header rows (without line items), oldest first
+
+    **Use cases:**
+    - Month-end exports and GST filing
+    - Loading invoices into spreadsheets or BI tools
+    """
+)
+async def export_invoices_endpoint(
+    format: str = Query(default="ndjson", pattern="^(ndjson|csv)$", description="Output format"),
+    date_from: Optional[date] = Query(default=None, description="Invoice date from (inclusive)"),
+    date_to: Optional[date] = Query(default=None, description="Invoice date to (inclusive)"),
+    status: Optional[str] = Query(default=None, description="Filter by invoice status"),
+    customer_id: Optional[str] = Query(default=None, description="Filter by customer")
+):
+    """Stream invoices as NDJSON or CSV"""
+    try:
+        chunks = await start_stream(export_invoices(format, date_from, date_to, status, customer_id))
+        return StreamingResponse(
+            chunks,
+            media_type=EXPORT_MEDIA_TYPES[format],
+            headers={"Content-Disposition": f"attachment; filename=invoices-export.{format}"}
+        )
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Invoice export failed: {str(e)}")
+
 @router.get(
     "/{invoice_id}", 
     response_model=InvoiceResponse,
     summary="Get invoice by ID",
     description="""
     Retrieve a specific invoice by its unique ID with complete details.
-    
+
+    Responses carry a weak `ETag`; send it back in `If-None-Match` to get
+    `304 Not Modified` without the body while the invoice is unchanged.
+
     **Parameters:**
     - `invoice_id`: UUID of the invoice to retrieve
     
@@ -73,6 +152,7 @@ async def get_invoices():
       - Line items with full product information
       - Financial calculations (subtotals, taxes, discounts)
       - Payment information and status
+    - 304 Not Modified if `If-None-Match` matches the current `ETag`
     
     **Errors:**
     - 404: Invoice with the specified ID does not exist
@@ -84,13 +164,20 @@ async def get_invoices():
     - Invoice editing
     """
 )
-async def get_invoice(invoice_id: str):
+async def get_invoice(invoice_id: str, if_none_match: Optional[str] = Header(None)):
     """Get a specific invoice by ID with embedded items and product details"""
     try:
-        invoice = get_invoice_by_id(invoice_id)
+        version = await get_invoice_version(invoice_id)
+        if not version:
+            raise HTTPException(status_code=404, detail=f"Invoice not found: {invoice_id}")
+        headers = cache_headers(version)
+        if etag_matches(if_none_match, version):
+            return Response(status_code=304, headers=headers)
+
+        invoice = await get_invoice_by_id(invoice_id)
         if not invoice:
             raise HTTPException(status_code=404, detail=f"Invoice not found: {invoice_id}")
-        return invoice
+        return FastJSONResponse(invoice, headers=headers)
     except HTTPException:
         raise
     except Exception as e:
@@ -139,10 +226,103 @@ async def get_invoice(invoice_id: str):
 async def create_new_invoice(invoice_data: InvoiceCreateRequest):
     """Create a new invoice with items"""
     try:
-        return create_invoice(invoice_data)
+        return await create_invoice(invoice_data)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@router.post(
+    "/bulk",
+    response_model=InvoiceBulkCreateResponse,
+    summary="Create invoices in bulk",
+    description="""
+    Create up to 1000 invoices in a single request, e.g. for nightly ERP imports.
+
+    All referenced customers and products are loaded with one query each,
+    and the invoice headers and line items are written with multi-row
+    inserts inside a single transaction.
+
+    **Request body:**
+    - `invoices`: List of invoice objects, same shape as `POST /invoices/`
+
+    **Returns:**
+    - `created` / `failed` counts
+    - `results`: One entry per submitted invoice, in request order, with
+      the new invoice ID and number or the reason it was rejected
+
+    **Business Rules:**
+    - Invoices referencing unknown customers or products are rejected individually
+    - All accepted invoices are committed together; a database error rolls back the whole batch
+    - Totals are calculated from the line items
+    """
+)
+async def create_invoices_in_bulk(bulk_data: InvoiceBulkCreateRequest):
+    """Create many invoices in one transaction"""
+    try:
+        return await run_in_threadpool(create_invoices_bulk, bulk_data.invoices)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.post(
+    "/pdf/batch",
+    summary="Download many invoice PDFs at once",
+    description="""
+    Download the PDFs of many invoices in one request, e.g. every invoice of a
+    month for GST filing.
+
+    Select invoices either by `invoice_ids` or by a `date_from` / `date_to` /
+    `status` filter (up to 500 invoices, `PDF_BATCH_MAX_INVOICES`). Invoice data is
+    loaded with a few batched queries, previously rendered PDFs are reused
+    from the PDF cache and the rest are rendered in parallel.
+
+    **Request body:**
+    - `invoice_ids`: List of invoice UUIDs (optional)
+    - `date_from`, `date_to`: Invoice date range, inclusive (optional)
+    - `status`: Invoice status (optional)
+    - `format`: `zip` (default) or `pdf`
+
+    **Returns:**
+    - `zip`: ZIP archive with one `invoice-<number>.pdf` per invoice, streamed
+      as each PDF finishes rendering. Invoices that fail to render are listed
+      in `errors.txt` inside the archive.
+    - `pdf`: One merged PDF, invoices in request order (ids) or by date and
+      number (filter)
+
+    **Errors:**
+    - 400: Invalid IDs, no selection criteria, or too many matching invoices
+    - 404: One or more of the given invoice IDs do not exist
+    - 503: The PDF renderer is saturated; retry after `Retry-After` seconds
+    """
+)
+async def download_invoice_pdfs(batch: InvoicePdfBatchRequest):
+    """Download a ZIP or merged PDF for many invoices"""
+    try:
+        entries = await select_invoices(batch.invoice_ids, batch.date_from, batch.date_to, batch.status)
+        if not entries:
+            raise HTTPException(status_code=404, detail="No invoices match the given filter")
+
+        if batch.format == "pdf":
+            return Response(
+                content=await merged_pdf(entries),
+                media_type="application/pdf",
+                headers={"Content-Disposition": "attachment; filename=invoices.pdf"}
+            )
+
+        return StreamingResponse(
+            await start_zip_stream(entries),
+            media_type="application/zip",
+            headers={"Content-Disposition": "attachment; filename=invoices.zip"}
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except LookupError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except PdfRenderBusy as e:
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "2"})
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"PDF generation failed: {str(e)}")
+
 @router.put(
     "/{invoice_id}", 
     response_model=InvoiceResponse,
@@ -155,13 +335,17 @@ async def create_new_invoice(invoice_data: InvoiceCreateRequest):
     
     **Request body:**
     - All fields are optional for updates
-    - Line items can be added, modified, or removed
+    - Line items can be added, modified, or removed: when `items` is sent,
+      items with an `id` update that line, items without one are added, and
+      existing lines left out are removed
+    - Only changed lines are written, in one transaction
     - Totals are automatically recalculated
     
     **Returns:**
     - Updated invoice object with new information
     
     **Errors:**
+    - 400: An item `id` that does not belong to this invoice, or is repeated
     - 404: Invoice with the specified ID does not exist
     - 422: Invalid data format or validation errors
     
@@ -175,12 +359,14 @@ async def create_new_invoice(invoice_data: InvoiceCreateRequest):
 async def update_existing_invoice(invoice_id: str, invoice_data: InvoiceUpdateRequest):
     """Update an existing invoice and its items"""
     try:
-        updated_invoice = update_invoice(invoice_id, invoice_data)
+        updated_invoice = await update_invoice(invoice_id, invoice_data)
         if not updated_invoice:
             raise HTTPException(status_code=404, detail=f"Invoice not found: {invoice_id}")
         return updated_invoice
     except HTTPException:
         raise
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -219,7 +405,7 @@ async def update_existing_invoice(invoice_id: str, invoice_data: InvoiceUpdateRe
 async def cancel_existing_invoice(invoice_id: str, cancel_data: CancelInvoiceRequest):
     """Cancel an invoice (soft delete equivalent)"""
     try:
-        cancelled_invoice = cancel_invoice(invoice_id, cancel_data.reason)
+        cancelled_invoice = await cancel_invoice(invoice_id, cancel_data.reason)
         if not cancelled_invoice:
             raise HTTPException(status_code=404, detail=f"Invoice not found: {invoice_id}")
         return cancelled_invoice
@@ -234,15 +420,23 @@ async def cancel_existing_invoice(invoice_id: str, cancel_data: CancelInvoiceReq
     description="""
     Generate and download a PDF version of the invoice.
 
+    Rendered PDFs are cached by a fingerprint of everything the PDF shows
+    (invoice, items, additional charges, customer and company settings), so
+    repeat downloads skip rendering until the invoice changes. The fingerprint
+    is returned as an `ETag`; send it back in `If-None-Match` to get a
+    `304 Not Modified` without downloading the file again.
+
     **Parameters:**
     - `invoice_id`: UUID of the invoice to generate PDF for
 
     **Returns:**
     - PDF file as binary response with appropriate headers
+    - 304 Not Modified if `If-None-Match` matches the current `ETag`
 
     **Errors:**
     - 404: Invoice with the specified ID does not exist
     - 500: PDF generation failed
+    - 503: Too many PDFs are being rendered; retry after `Retry-After` seconds
 
     **Use cases:**
     - Invoice printing and archiving
@@ -250,23 +444,31 @@ async def cancel_existing_invoice(invoice_id: str, cancel_data: CancelInvoiceReq
     - Customer delivery
     """
 )
-async def generate_pdf(invoice_id: str):
+async def generate_pdf(invoice_id: str, if_none_match: Optional[str] = Header(None)):
     """Generate PDF for an invoice"""
     try:
-        pdf_content = generate_invoice_pdf(invoice_id)
+        fingerprint = await get_invoice_pdf_fingerprint(invoice_id)
+        if not fingerprint:
+            raise HTTPException(status_code=404, detail=f"Invoice not found: {invoice_id}")
+
+        # Renders of the same content are equivalent but not byte-identical, hence a weak ETag
+        headers = cache_headers(fingerprint)
+        if etag_matches(if_none_match, fingerprint):
+            return Response(status_code=304, headers=headers)
+
+        pdf_content = await get_cached_invoice_pdf(invoice_id, fingerprint)
         if not pdf_content:
             raise HTTPException(status_code=404, detail=f"Invoice not found: {invoice_id}")
 
+        headers["Content-Disposition"] = f"attachment; filename=invoice-{invoice_id}.pdf"
         return Response(
             content=pdf_content,
             media_type="application/pdf",
-            headers={
-                "Content-Disposition": f"attachment; filename=invoice-{invoice_id}.pdf"
-            }
+            headers=headers
         )
+    except PdfRenderBusy as e:
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "2"})
     except HTTPException:
         raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"PDF generation failed: {str(e)}")
-
-# Note: No delete endpoint - invoices should be cancelled using the cancel endpoint instead
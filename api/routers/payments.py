@@ -1,13 +1,19 @@
 from fastapi import APIRouter, HTTPException, Query
+from fastapi.responses import StreamingResponse
 from typing import List, Optional
+from datetime import date
 from pydantic import BaseModel
-from services.payment_service import (
+from services.async_payment_service import (
     get_all_payments,
+    get_payments_page,
     get_payment_by_id,
     create_payment,
     update_payment,
     refund_payment
 )
+from services.export_service import export_payments, start_stream, EXPORT_MEDIA_TYPES
+from responses import FastJSONResponse
+from services.pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, set_pagination_headers
 from models.payment_models import PaymentCreateRequest, PaymentUpdateRequest, PaymentResponse
 
 # Request model for refund
@@ -38,8 +44,14 @@ router = APIRouter(
     - Payment status and timestamps
     
     **Returns:**
-    - List of payment objects with complete information
+    - List of payment objects with complete information, newest first
     - Empty list if no payments exist
+
+    **Pagination (optional):**
+    - `limit`: Page size (1-200); enables keyset pagination
+    - `after`: Cursor from the `X-Next-Cursor` header to fetch the next page
+    - `before`: Cursor from the `X-Prev-Cursor` header to fetch the previous page
+    - Without any of these parameters the full list is returned
     
     **Use cases:**
     - Payment history and tracking
@@ -48,13 +60,67 @@ router = APIRouter(
     - Cash flow management
     """
 )
-async def get_payments():
+async def get_payments(
+    limit: Optional[int] = Query(default=None, ge=1, le=MAX_PAGE_SIZE, description="Page size; enables cursor pagination"),
+    after: Optional[str] = Query(default=None, description="Cursor of the last row of the previous page"),
+    before: Optional[str] = Query(default=None, description="Cursor of the first row of the next page")
+):
     """Get all payments"""
     try:
-        return get_all_payments()
+        if limit is None and after is None and before is None:
+            return FastJSONResponse(await get_all_payments())
+        payments, next_cursor, prev_cursor = await get_payments_page(limit or DEFAULT_PAGE_SIZE, after, before)
+        response = FastJSONResponse(payments)
+        set_pagination_headers(response, next_cursor, prev_cursor)
+        return response
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@router.get(
+    "/export",
+    summary="Export payments",
+    description="""
+    Stream payments as NDJSON (one JSON object per line) or CSV.
+
+    Rows are read from the database in batches and written to the response
+    as they arrive, so exports of any size use constant server memory.
+
+    **Query parameters:**
+    - `format`: `ndjson` (default) or `csv`
+    - `date_from` / `date_to`: Inclusive payment date range
+    - `customer_id`: Only payments from this customer
+    - `method`: Only payments made with this method
+    - `is_refund`: `true` for refunds only, `false` to exclude refunds
+
+    **Returns:**
+    - Payment rows with invoice number and customer name, oldest first
+
+    **Use cases:**
+    - Month-end reconciliation
+    - Loading payments into spreadsheets or accounting tools
+    """
+)
+async def export_payments_endpoint(
+    format: str = Query(default="ndjson", pattern="^(ndjson|csv)$", description="Output format"),
+    date_from: Optional[date] = Query(default=None, description="Payment date from (inclusive)"),
+    date_to: Optional[date] = Query(default=None, description="Payment date to (inclusive)"),
+    customer_id: Optional[str] = Query(default=None, description="Filter by customer"),
+    method: Optional[str] = Query(default=None, description="Filter by payment method"),
+    is_refund: Optional[bool] = Query(default=None, description="Filter refunds")
+):
+    """Stream payments as NDJSON or CSV"""
+    try:
+        chunks = await start_stream(export_payments(format, date_from, date_to, customer_id, method, is_refund))
+        return StreamingResponse(
+            chunks,
+            media_type=EXPORT_MEDIA_TYPES[format],
+            headers={"Content-Disposition": f"attachment; filename=payments-export.{format}"}
+        )
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Payment export failed: {str(e)}")
+
 @router.get(
     "/{payment_id}", 
     response_model=PaymentResponse,
@@ -85,7 +151,7 @@ async def get_payments():
 async def get_payment(payment_id: str):
     """Get a specific payment by ID"""
     try:
-        payment = get_payment_by_id(payment_id)
+        payment = await get_payment_by_id(payment_id)
         if not payment:
             raise HTTPException(status_code=404, detail=f"Payment not found: {payment_id}")
         return payment
@@ -137,7 +203,7 @@ async def get_payment(payment_id: str):
 async def create_new_payment(payment_data: PaymentCreateRequest):
     """Create a new payment"""
     try:
-        return create_payment(payment_data)
+        return await create_payment(payment_data)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -173,7 +239,7 @@ async def create_new_payment(payment_data: PaymentCreateRequest):
 async def update_existing_payment(payment_id: str, payment_data: PaymentUpdateRequest):
     """Update an existing payment"""
     try:
-        updated_payment = update_payment(payment_id, payment_data)
+        updated_payment = await update_payment(payment_id, payment_data)
         if not updated_payment:
             raise HTTPException(status_code=404, detail=f"Payment not found: {payment_id}")
         return updated_payment
@@ -219,7 +285,7 @@ async def update_existing_payment(payment_id: str, payment_data: PaymentUpdateRe
 async def refund_existing_payment(payment_id: str, refund_data: RefundRequest):
     """Create a refund for a payment (soft delete equivalent)"""
     try:
-        refund = refund_payment(payment_id, refund_data.reason)
+        refund = await refund_payment(payment_id, refund_data.reason)
         if not refund:
             raise HTTPException(status_code=404, detail=f"Payment not found: {payment_id}")
         return refund
@@ -1,14 +1,18 @@
-from fastapi import APIRouter, HTTPException, Query
+from fastapi import APIRouter, HTTPException, Query, Response, Header
 from typing import List, Optional
-from services.product_service import (
+from services.async_product_service import (
     get_all_products,
+    get_products_page,
     search_products,
     get_all_products_including_inactive,
     get_product_by_id,
+    get_product_version,
     create_product,
     update_product,
     delete_product
 )
+from responses import FastJSONResponse, cache_headers, etag_matches
+from services.pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, set_pagination_headers
 from models.product_models import ProductCreateRequest, ProductUpdateRequest, ProductResponse
 
 router = APIRouter(
@@ -36,14 +40,32 @@ router = APIRouter(
     **Returns:**
     - List of product objects
     - Empty list if no active products exist
+
+    **Pagination (optional):**
+    - `limit`: Page size (1-200); enables keyset pagination
+    - `after`: Cursor from the `X-Next-Cursor` header to fetch the next page
+    - `before`: Cursor from the `X-Prev-Cursor` header to fetch the previous page
+    - Without any of these parameters the full list is returned
     """
 )
-async def get_products(search: Optional[str] = Query(default=None, description="Search by name/description/category")):
+async def get_products(
+    search: Optional[str] = Query(default=None, description="Search by name/description/category"),
+    limit: Optional[int] = Query(default=None, ge=1, le=MAX_PAGE_SIZE, description="Page size; enables cursor pagination"),
+    after: Optional[str] = Query(default=None, description="Cursor of the last row of the previous page"),
+    before: Optional[str] = Query(default=None, description="Cursor of the first row of the next page")
+):
     """Get all active products or search by term"""
     try:
-        if search:
-            return search_products(search)
-        return get_all_products()
+        if limit is None and after is None and before is None:
+            if search:
+                return FastJSONResponse(await search_products(search))
+            return FastJSONResponse(await get_all_products())
+        products, next_cursor, prev_cursor = await get_products_page(limit or DEFAULT_PAGE_SIZE, after, before, search)
+        response = FastJSONResponse(products)
+        set_pagination_headers(response, next_cursor, prev_cursor)
+        return response
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -65,7 +87,7 @@ async def get_products(search: Optional[str] = Query(default=None, description="
 async def get_all_products_endpoint():
     """Get all products including inactive ones"""
     try:
-        return get_all_products_including_inactive()
+        return FastJSONResponse(await get_all_products_including_inactive())
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -76,6 +98,9 @@ async def get_all_products_endpoint():
     description="""
     Retrieve a specific product by its unique ID.
 
+    Responses carry a weak `ETag`; send it back in `If-None-Match` to get
+    `304 Not Modified` without the body while the product is unchanged.
+
     **Parameters:**
     - `product_id`: UUID of the product to retrieve
 
@@ -84,19 +109,27 @@ async def get_all_products_endpoint():
       - Basic details (name, description)
       - Pricing information (price, tax_rate)
       - Metadata (timestamps, active status)
+    - 304 Not Modified if `If-None-Match` matches the current `ETag`
 
     **Errors:**
     - 404: Product with the specified ID does not exist
     - 422: Invalid UUID format
     """
 )
-async def get_product(product_id: str):
+async def get_product(product_id: str, if_none_match: Optional[str] = Header(None)):
     """Get a specific product by ID"""
     try:
-        product = get_product_by_id(product_id)
+        version = await get_product_version(product_id)
+        if not version:
+            raise HTTPException(status_code=404, detail=f"Product not found: {product_id}")
+        headers = cache_headers(version)
+        if etag_matches(if_none_match, version):
+            return Response(status_code=304, headers=headers)
+
+        product = await get_product_by_id(product_id)
         if not product:
             raise HTTPException(status_code=404, detail=f"Product not found: {product_id}")
-        return product
+        return FastJSONResponse(product, headers=headers)
     except HTTPException:
         raise
     except Exception as e:
@@ -128,7 +161,7 @@ async def get_product(product_id: str):
 async def create_new_product(product_data: ProductCreateRequest):
     """Create a new product"""
     try:
-        return create_product(product_data)
+        return await create_product(product_data)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -157,7 +190,7 @@ async def create_new_product(product_data: ProductCreateRequest):
 async def update_existing_product(product_id: str, product_data: ProductUpdateRequest):
     """Update an existing product"""
     try:
-        updated_product = update_product(product_id, product_data)
+        updated_product = await update_product(product_id, product_data)
         if not updated_product:
             raise HTTPException(status_code=404, detail=f"Product not found: {product_id}")
         return updated_product
@@ -195,7 +228,7 @@ async def update_existing_product(product_id: str, product_data: ProductUpdateRe
 async def delete_existing_product(product_id: str):
     """Soft delete a product (sets is_active to false)"""
     try:
-        success = delete_product(product_id)
+        success = await delete_product(product_id)
         if not success:
             raise HTTPException(status_code=404, detail=f"Product not found: {product_id}")
         return {"message": "Product deactivated successfully"}
@@ -0,0 +1,127 @@
+"""
+Benchmark for JSON list responses (no database or HTTP client needed).
+
+Serves the same list of invoices through two routes and times full ASGI
+requests:
+
+    response_model   the old path: FastAPI dumps the models, validates them
+                     again against ``response_model`` and encodes with json
+    FastJSONResponse models written straight to JSON by pydantic-core
+
+The invoices are validated once up front, as the services do.
+
+Usage (from the api/ directory):
+    python scripts/benchmark_json_response.py --invoices 10000 --items 3
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+from datetime import date, datetime
+from typing import List
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fastapi import FastAPI
+from fastapi.responses import JSONResponse
+from models.invoice_models import InvoiceResponse
+from responses import FastJSONResponse
+
+def sample_invoices(count: int, item_count: int) -> List[InvoiceResponse]:
+    invoices = []
+    for n in range(count):
+        items = [
+            {
+                "id": f"{n:08d}-item-{i}", "product_id": f"product-{i}", "product_name": f"Product {i}",
+                "description": f"Line item {i}", "hsn_sac_code": "8471", "quantity": 2, "unit_price": 150.0,
+                "tax_rate": 18, "discount_percentage": 0, "discount_amount": 0,
+                "taxable_amount": 300.0, "tax_amount": 54.0, "line_total": 354.0,
+            }
+            for i in range(item_count)
+        ]
+        invoices.append(InvoiceResponse(
+            id=f"00000000-0000-0000-0000-{n:012d}", invoice_number=f"INV-{n:06d}",
+            customer_id="00000000-0000-0000-0000-000000000002", customer_name="Benchmark Traders",
+            date=date(2024, 4, 1), due_date=date(2024, 5, 1), status="sent",
+            subtotal=300.0 * item_count, tax_amount=54.0 * item_count, total_amount=354.0 * item_count,
+            amount_paid=0, balance_due=354.0 * item_count,
+            po_number=None, po_date=None, transport_name="Road Lines", lr_number=None, vehicle_number=None,
+            eway_bill_number=None, eway_bill_date=None, total_quantity=2.0 * item_count,
+            cgst_rate=9, sgst_rate=9, igst_rate=None, cgst_amount=27.0 * item_count, sgst_amount=27.0 * item_count,
+            igst_amount=None, round_off=0, shipping_details={"address": "1 Market Road", "city": "Rajkot"},
+            place_of_supply="GUJARAT", notes="Thank you for your business", terms="Payment due in 30 days",
+            invoice_type="tax_invoice", is_template=False, cancel_reason=None,
+            created_at=datetime(2024, 4, 1, 10, 30), items=items, additional_charges=[],
+        ))
+    return invoices
+
+def build_app(invoices: List[InvoiceResponse]) -> FastAPI:
+    app = FastAPI()
+
+    @app.get("/response-model", response_model=List[InvoiceResponse], response_class=JSONResponse)
+    async def with_response_model():
+        return invoices
+
+    @app.get("/fast", response_model=List[InvoiceResponse])
+    async def with_fast_response():
+        return FastJSONResponse(invoices)
+
+    return app
+
+async def request(app, path: str) -> bytes:
+    body = []
+    received = False
+
+    async def receive():
+        nonlocal received
+        if received:
+            await asyncio.sleep(3600)
+        received = True
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        if message["type"] == "http.response.body":
+            body.append(message.get("body", b""))
+
+    scope = {
+        "type": "http", "http_version": "1.1", "method": "GET", "scheme": "http",
+        "path": path, "raw_path": path.encode(), "root_path": "", "query_string": b"",
+        "headers": [], "client": ("127.0.0.1", 0), "server": ("127.0.0.1", 80),
+    }
+    await app(scope, receive, send)
+    return b"".join(body)
+
+async def bench(app, path: str, runs: int):
+    payload = await request(app, path)  # warm-up
+    timings = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        await request(app, path)
+        timings.append(time.perf_counter() - started)
+    return min(timings), len(payload), payload
+
+async def run(args):
+    invoices = sample_invoices(args.invoices, args.items)
+    app = build_app(invoices)
+
+    baseline, size, expected = await bench(app, "/response-model", args.runs)
+    fast, fast_size, actual = await bench(app, "/fast", args.runs)
+    if json.loads(expected) != json.loads(actual):
+        raise SystemExit("Responses differ")
+
+    print(f"{args.invoices} invoices x {args.items} items, best of {args.runs}")
+    print(f"response_model    {baseline * 1000:8.1f} ms  ({size / 1e6:.1f} MB)")
+    print(f"FastJSONResponse  {fast * 1000:8.1f} ms  ({fast_size / 1e6:.1f} MB)")
+    print(f"speedup           {baseline / fast:8.1f}x")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--invoices", type=int, default=10000, help="invoices in the list")
+    parser.add_argument("--items", type=int, default=3, help="line items per invoice")
+    parser.add_argument("--runs", type=int, default=5, help="timed requests per route")
+    asyncio.run(run(parser.parse_args()))
+
+if __name__ == "__main__":
+    main()
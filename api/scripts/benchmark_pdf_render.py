@@ -0,0 +1,116 @@
+"""
+Micro-benchmark for invoice PDF rendering (no database needed).
+
+Renders a synthetic invoice repeatedly with both layouts and reports
+renders per second, once with the per-thread template reused (the normal
+path) and once rebuilding it for every render, as the renderer did before
+templates were cached. The difference is what the template cache saves.
+
+Usage (from the api/ directory):
+    python scripts/benchmark_pdf_render.py --items 10 --renders 200
+"""
+import argparse
+import os
+import sys
+import time
+from datetime import date
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from models.invoice_models import InvoiceResponse
+from models.customer_models import CustomerResponse
+from services import ruby_pdf_generator, original_pdf_generator
+from services.ruby_pdf_generator import render_ruby_enterprise_pdf
+from services.original_pdf_generator import render_original_invoice_pdf
+
+def sample_invoice(item_count: int) -> InvoiceResponse:
+    items = [
+        {
+            "id": f"item-{n}",
+            "product_id": None,
+            "product_name": f"Product {n}",
+            "description": f"Line item {n}",
+            "hsn_sac_code": "8471",
+            "quantity": 2,
+            "unit_price": 150.0,
+            "tax_rate": 18,
+            "discount_percentage": 0,
+            "discount_amount": 0,
+            "taxable_amount": 300.0,
+            "tax_amount": 54.0,
+            "line_total": 354.0,
+        }
+        for n in range(1, item_count + 1)
+    ]
+    return InvoiceResponse(
+        id="00000000-0000-0000-0000-000000000001",
+        invoice_number="INV-BENCH-0001",
+        customer_id="00000000-0000-0000-0000-000000000002",
+        customer_name="Benchmark Traders",
+        date=date(2024, 4, 1),
+        due_date=date(2024, 5, 1),
+        status="sent",
+        subtotal=300.0 * item_count,
+        tax_amount=54.0 * item_count,
+        total_amount=354.0 * item_count,
+        amount_paid=0,
+        balance_due=354.0 * item_count,
+        po_number=None, po_date=None, transport_name=None, lr_number=None, vehicle_number=None,
+        eway_bill_number=None, eway_bill_date=None, total_quantity=None,
+        cgst_rate=None, sgst_rate=None, igst_rate=None,
+        cgst_amount=None, sgst_amount=None, igst_amount=None, round_off=None,
+        shipping_details=None, place_of_supply="GUJARAT",
+        notes="Thank you for your business", terms="Payment due in 30 days",
+        invoice_type="tax_invoice", is_template=False, cancel_reason=None, created_at=None,
+        items=items,
+        additional_charges=[],
+    )
+
+def sample_customer() -> CustomerResponse:
+    return CustomerResponse(
+        id="00000000-0000-0000-0000-000000000002",
+        name="Benchmark Traders",
+        contact=None, email=None, phone=None,
+        billing_address={"address": "1 Market Road", "city": "Rajkot", "state": "GUJARAT", "pincode": "360001", "country": "INDIA"},
+        shipping_address=None,
+        gst_no="24AAAAA0000A1Z5",
+        place_of_supply="GUJARAT", payment_terms=30, credit_limit=None, company_type=None, notes=None,
+        is_active=True, created_at=None, updated_at=None,
+    )
+
+def without_template_cache(module, render):
+    """Wrap ``render`` so it builds the layout's styles and static sections every time"""
+    def run():
+        module._local.template = None
+        return render()
+    return run
+
+def bench(name, render, renders) -> float:
+    render()  # warm-up
+    started = time.perf_counter()
+    for _ in range(renders):
+        if not render():
+            raise SystemExit(f"{name}: render failed")
+    elapsed = time.perf_counter() - started
+    print(f"{name:<32} {renders / elapsed:8.1f} renders/s  ({elapsed / renders * 1000:.2f} ms/render)")
+    return renders / elapsed
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--items", type=int, default=10, help="line items per invoice")
+    parser.add_argument("--renders", type=int, default=200, help="renders per layout")
+    args = parser.parse_args()
+
+    invoice = sample_invoice(args.items)
+    customer = sample_customer()
+    layouts = [
+        ("ruby_enterprise", ruby_pdf_generator, lambda: render_ruby_enterprise_pdf(invoice, None, customer)),
+        ("original", original_pdf_generator, lambda: render_original_invoice_pdf(invoice)),
+    ]
+    for name, module, render in layouts:
+        uncached = bench(f"{name} (template rebuilt)", without_template_cache(module, render), args.renders)
+        cached = bench(f"{name} (template cached)", render, args.renders)
+        print(f"{name:<32} {cached / uncached:8.2f}x")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+"""
+Cold-start benchmark: import time of ``main`` and time to first byte of ``GET /health``.
+
+Every sample runs in a fresh interpreter, like a serverless cold start. No
+database is needed; startup must not touch it. Use ``--json`` for a
+machine-readable line and the ``--max-*`` flags to fail CI on regressions.
+
+Usage (from the api/ directory):
+    python scripts/benchmark_startup.py --runs 5
+    python scripts/benchmark_startup.py --json --max-import-ms 1500 --max-ttfb-ms 3000
+"""
+import argparse
+import http.client
+import json
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import time
+
+API_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Modules that must stay out of the startup path
+HEAVY_MODULES = ["reportlab", "pypdf"]
+
+IMPORT_PROBE = """
+import json, sys, time
+started = time.perf_counter()
+import main
+elapsed = time.perf_counter() - started
+print(json.dumps({"seconds": elapsed, "loaded": [m for m in %r if m in sys.modules]}))
+""" % (HEAVY_MODULES,)
+
+def measure_import():
+    output = subprocess.run(
+        [sys.executable, "-c", IMPORT_PROBE],
+        cwd=API_DIR, capture_output=True, text=True, check=True
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+def measure_first_byte(timeout: float = 30.0) -> float:
+    port = free_port()
+    started = time.perf_counter()
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--host", "127.0.0.1", "--port", str(port), "--log-level", "warning"],
+        cwd=API_DIR, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    try:
+        while time.perf_counter() - started < timeout:
+            try:
+                conn = http.client.HTTPConnection("127.0.0.1", port, timeout=1)
+                conn.request("GET", "/health")
+                response = conn.getresponse()
+                response.read(1)
+                elapsed = time.perf_counter() - started
+                conn.close()
+                if response.status != 200:
+                    raise SystemExit(f"/health returned {response.status}")
+                return elapsed
+            except (ConnectionError, OSError):
+                if server.poll() is not None:
+                    raise SystemExit("Server exited before answering /health")
+                time.sleep(0.01)
+        raise SystemExit(f"No response from /health within {timeout}s")
+    finally:
+        server.terminate()
+        server.wait()
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5, help="samples per measurement")
+    parser.add_argument("--json", action="store_true", help="print one JSON line")
+    parser.add_argument("--max-import-ms", type=float, help="fail if median import time exceeds this")
+    parser.add_argument("--max-ttfb-ms", type=float, help="fail if median time to first byte exceeds this")
+    args = parser.parse_args()
+
+    imports = [measure_import() for _ in range(args.runs)]
+    ttfb = [measure_first_byte() for _ in range(args.runs)]
+    loaded = sorted({module for sample in imports for module in sample["loaded"]})
+
+    result = {
+        "import_ms_median": round(statistics.median(sample["seconds"] for sample in imports) * 1000, 1),
+        "import_ms_min": round(min(sample["seconds"] for sample in imports) * 1000, 1),
+        "ttfb_ms_median": round(statistics.median(ttfb) * 1000, 1),
+        "ttfb_ms_min": round(min(ttfb) * 1000, 1),
+        "heavy_modules_loaded": loaded,
+    }
+
+    if args.json:
+        print(json.dumps(result))
+    else:
+        print(f"import main      median {result['import_ms_median']:8.1f} ms   min {result['import_ms_min']:8.1f} ms")
+        print(f"first byte       median {result['ttfb_ms_median']:8.1f} ms   min {result['ttfb_ms_min']:8.1f} ms")
+        print(f"heavy modules    {', '.join(loaded) or 'none'}")
+
+    failures = []
+    if loaded:
+        failures.append(f"imported at startup: {', '.join(loaded)}")
+    if args.max_import_ms and result["import_ms_median"] > args.max_import_ms:
+        failures.append(f"import time {result['import_ms_median']} ms > {args.max_import_ms} ms")
+    if args.max_ttfb_ms and result["ttfb_ms_median"] > args.max_ttfb_ms:
+        failures.append(f"time to first byte {result['ttfb_ms_median']} ms > {args.max_ttfb_ms} ms")
+    if failures:
+        raise SystemExit("Startup budget exceeded: " + "; ".join(failures))
+
+if __name__ == "__main__":
+    main()
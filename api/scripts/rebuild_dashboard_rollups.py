@@ -0,0 +1,56 @@
+"""
+Rebuild the dashboard rollup tables from invoices, customers and products.
+
+The triggers from ``dashboard_rollups.sql`` keep the rollups current; run this
+after loading data with the triggers disabled, after restoring a backup, or
+whenever ``--check`` reports drift. Writers are blocked while it runs;
+readers are not.
+
+Usage (from the api/ directory):
+    python scripts/rebuild_dashboard_rollups.py
+    python scripts/rebuild_dashboard_rollups.py --check   # compare only, exit 1 on drift
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from db.database import db
+from services.dashboard_service import (
+    AGGREGATE_STATS_QUERY,
+    ROLLUP_STATS_QUERY,
+    rebuild_dashboard_rollups,
+)
+
+def drift():
+    """Fields where the rollups disagree with a full aggregation of the base tables"""
+    expected = db.fetch_one(AGGREGATE_STATS_QUERY)
+    actual = db.fetch_one(ROLLUP_STATS_QUERY)
+    return {
+        key: (actual[key], value)
+        for key, value in expected.items()
+        if float(actual[key]) != float(value)
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--check", action="store_true", help="report drift without rebuilding")
+    args = parser.parse_args()
+
+    if args.check:
+        differences = drift()
+        for key, (actual, expected) in differences.items():
+            print(f"{key}: rollup {actual}, actual {expected}")
+        if differences:
+            raise SystemExit(1)
+        print("Dashboard rollups are up to date")
+        return
+
+    started = time.perf_counter()
+    rebuild_dashboard_rollups()
+    print(f"Rebuilt dashboard rollups in {(time.perf_counter() - started) * 1000:.0f} ms")
+
+if __name__ == "__main__":
+    main()
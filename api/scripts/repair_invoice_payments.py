@@ -0,0 +1,41 @@
+"""
+Rebuild invoices.amount_paid and status from the payments table.
+
+The trigger from ``payment_status_trigger.sql`` keeps both current one
+payment at a time; run this once after applying that migration (earlier
+totals ignored refunds), after importing payments with triggers disabled,
+or whenever ``--check`` reports drift. Payment writes wait while it runs.
+
+Usage (from the api/ directory):
+    python scripts/repair_invoice_payments.py
+    python scripts/repair_invoice_payments.py --check   # list drift only, exit 1 if any
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.payment_service import find_amount_paid_drift, repair_invoice_payments
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--check", action="store_true", help="report drift without repairing")
+    args = parser.parse_args()
+
+    if args.check:
+        drift = find_amount_paid_drift()
+        for row in drift:
+            print(f"{row['invoice_number']} ({row['status']}): amount_paid {row['amount_paid']}, payments total {row['expected']}")
+        if drift:
+            raise SystemExit(1)
+        print("Invoice payment totals are up to date")
+        return
+
+    started = time.perf_counter()
+    corrected = repair_invoice_payments()
+    print(f"Corrected {corrected} invoice(s) in {(time.perf_counter() - started) * 1000:.0f} ms")
+
+if __name__ == "__main__":
+    main()
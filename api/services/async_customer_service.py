@@ -0,0 +1,102 @@
+from db.async_database import async_db
+from models.customer_models import CustomerCreateRequest, CustomerUpdateRequest, CustomerResponse
+from services.customer_service import CUSTOMER_VERSION_QUERY, _serialize_addresses
+from services.pagination import Keyset
+from typing import List, Optional, Tuple
+import uuid
+
+CUSTOMER_SEARCH_CONDITION = (
+    "(name ILIKE %s OR email ILIKE %s OR phone ILIKE %s OR contact ILIKE %s OR COALESCE(company_type,'') ILIKE %s)"
+)
+
+# Alphabetical, ties broken by id
+CUSTOMER_KEYSET = Keyset("name", "id", "name")
+
+async def get_all_customers() -> List[CustomerResponse]:
+    query = "SELECT * FROM customers WHERE is_active = TRUE ORDER BY name"
+    result = await async_db.fetch_all(query)
+    return [CustomerResponse(**row) for row in result]
+
+async def search_customers(search_term: str) -> List[CustomerResponse]:
+    pattern = f"%{search_term}%"
+    query = f"SELECT * FROM customers WHERE is_active = TRUE AND {CUSTOMER_SEARCH_CONDITION} ORDER BY name"
+    result = await async_db.fetch_all(query, (pattern, pattern, pattern, pattern, pattern))
+    return [CustomerResponse(**row) for row in result]
+
+async def get_customers_page(limit: int, after: str = None, before: str = None, search_term: str = None) -> Tuple[List[CustomerResponse], Optional[str], Optional[str]]:
+    """Return one keyset page of active customers, optionally filtered by search term"""
+    conditions = ["is_active = TRUE"]
+    params = []
+    if search_term:
+        conditions.append(CUSTOMER_SEARCH_CONDITION)
+        params.extend([f"%{search_term}%"] * 5)
+
+    keyset_condition, keyset_params, order_and_limit = CUSTOMER_KEYSET.clause(limit, after, before)
+    if keyset_condition:
+        conditions.append(keyset_condition)
+        params.extend(keyset_params)
+
+    query = f"SELECT * FROM customers WHERE {' AND '.join(conditions)}" + order_and_limit
+    result = await async_db.fetch_all(query, (*params, limit + 1))
+    rows, next_cursor, prev_cursor = CUSTOMER_KEYSET.page(result, limit, after, before)
+    return [CustomerResponse(**row) for row in rows], next_cursor, prev_cursor
+
+async def get_all_customers_including_inactive() -> List[CustomerResponse]:
+    query = "SELECT * FROM customers ORDER BY name"
+    result = await async_db.fetch_all(query)
+    return [CustomerResponse(**row) for row in result]
+
+async def get_customer_by_id(customer_id: str) -> Optional[CustomerResponse]:
+    query = "SELECT * FROM customers WHERE id = %s AND is_active = TRUE"
+    result = await async_db.fetch_one(query, (customer_id,))
+    return CustomerResponse(**result) if result else None
+
+async def get_customer_version(customer_id: str) -> Optional[str]:
+    result = await async_db.fetch_one(CUSTOMER_VERSION_QUERY, (customer_id,))
+    return result['version'] if result else None
+
+async def create_customer(customer_data: CustomerCreateRequest) -> CustomerResponse:
+    customer_id = str(uuid.uuid4())
+    data = customer_data.dict()
+    data['id'] = customer_id
+    data['is_active'] = True
+    data = _serialize_addresses(data)
+
+    query = """
+        INSERT INTO customers (id, name, contact, email, phone, billing_address, shipping_address, gst_no, place_of_supply, payment_terms, credit_limit, company_type, notes, is_active)
+        VALUES (%(id)s, %(name)s, %(contact)s, %(email)s, %(phone)s, %(billing_address)s::jsonb, %(shipping_address)s::jsonb, %(gst_no)s, %(place_of_supply)s, %(payment_terms)s, %(credit_limit)s, %(company_type)s, %(notes)s, %(is_active)s)
+        RETURNING *
+    """
+    rows = await async_db.fetch_returning(query, data)
+    return CustomerResponse(**rows[0])
+
+async def update_customer(customer_id: str, customer_data: CustomerUpdateRequest) -> Optional[CustomerResponse]:
+    data = customer_data.dict(exclude_unset=True)
+    data['id'] = customer_id
+    data = _serialize_addresses(data)
+
+    # Build dynamic query based on provided fields
+    set_parts = []
+    for key in data.keys():
+        if key == 'id':
+            continue
+        if key in ('billing_address', 'shipping_address'):
+            set_parts.append(f"{key}=%({key})s::jsonb")
+        else:
+            set_parts.append(f"{key}=%({key})s")
+    if not set_parts:
+        return await get_customer_by_id(customer_id)
+    set_clause = ", ".join(set_parts)
+    # Only active customers can be updated; no row back means not found
+    query = f"UPDATE customers SET {set_clause} WHERE id=%(id)s AND is_active = TRUE RETURNING *"
+
+    rows = await async_db.fetch_returning(query, data)
+    return CustomerResponse(**rows[0]) if rows else None
+
+async def delete_customer(customer_id: str) -> bool:
+    query = "UPDATE customers SET is_active = FALSE WHERE id = %s"
+    try:
+        await async_db.execute(query, (customer_id,))
+        return True
+    except Exception:
+        return False
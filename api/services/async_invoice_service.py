@@ -0,0 +1,158 @@
+from db.async_database import async_db
+from models.invoice_models import InvoiceCreateRequest, InvoiceUpdateRequest, InvoiceResponse, InvoiceItemWithProduct
+from services.invoice_service import (
+    INVOICE_SELECT,
+    INVOICE_ITEMS_QUERY,
+    INVOICE_ITEMS_BATCH_QUERY,
+    ADDITIONAL_CHARGES_BATCH_QUERY,
+    CUSTOMER_BILLING_ADDRESS_QUERY,
+    INSERT_INVOICE_QUERY,
+    PRODUCT_DEFAULTS_QUERY,
+    INSERT_INVOICE_ITEM_QUERY,
+    INSERT_ADDITIONAL_CHARGE_QUERY,
+    CANCEL_INVOICE_QUERY,
+    PDF_FINGERPRINT_QUERY,
+    INVOICE_VERSION_QUERY,
+    _pdf_fingerprint,
+    _is_uuid,
+    _pdf_payload,
+    _with_calculated_amounts,
+    _assemble_invoices,
+    _invoice_insert_params,
+    _invoice_item_insert_params,
+    _additional_charge_params,
+    _apply_invoice_update
+)
+from services.pagination import Keyset
+from services.dashboard_service import invalidate_dashboard_stats
+from services.pdf_cache import pdf_cache
+from services.pdf_renderer import pdf_renderer
+from starlette.concurrency import run_in_threadpool
+from typing import List, Optional, Tuple
+import uuid
+
+# Newest first, ties broken by id
+INVOICE_KEYSET = Keyset("i.created_at", "i.id", "created_at", descending=True, sort_type="timestamptz")
+
+async def get_all_invoices() -> List[InvoiceResponse]:
+    query = INVOICE_SELECT + " ORDER BY i.created_at DESC"
+    result = await async_db.fetch_all(query)
+    return await _load_invoices(result)
+
+async def get_invoices_page(limit: int, after: str = None, before: str = None) -> Tuple[List[InvoiceResponse], Optional[str], Optional[str]]:
+    """Return one keyset page of invoices plus the next/previous cursors"""
+    condition, params, order_and_limit = INVOICE_KEYSET.clause(limit, after, before)
+    query = INVOICE_SELECT + (f" WHERE {condition}" if condition else "") + order_and_limit
+    result = await async_db.fetch_all(query, (*params, limit + 1))
+    rows, next_cursor, prev_cursor = INVOICE_KEYSET.page(result, limit, after, before)
+    return await _load_invoices(rows), next_cursor, prev_cursor
+
+async def get_invoice_by_id(invoice_id: str) -> Optional[InvoiceResponse]:
+    query = INVOICE_SELECT + " WHERE i.id = %s"
+    result = await async_db.fetch_one(query, (invoice_id,))
+
+    if result:
+        return (await _load_invoices([result]))[0]
+
+    return None
+
+async def _load_invoices(invoice_rows) -> List[InvoiceResponse]:
+    """Attach items and additional charges to invoice rows using two batched queries"""
+    if not invoice_rows:
+        return []
+
+    invoice_ids = [str(row['id']) for row in invoice_rows]
+    item_rows = await async_db.fetch_all(INVOICE_ITEMS_BATCH_QUERY, (invoice_ids,))
+    charge_rows = await async_db.fetch_all(ADDITIONAL_CHARGES_BATCH_QUERY, (invoice_ids,))
+    return _assemble_invoices(invoice_rows, item_rows, charge_rows)
+
+async def get_invoice_items_with_products(invoice_id: str) -> List[InvoiceItemWithProduct]:
+    result = await async_db.fetch_all(INVOICE_ITEMS_QUERY, (invoice_id,))
+    return [InvoiceItemWithProduct(**_with_calculated_amounts(row)) for row in result]
+
+async def create_invoice(invoice_data: InvoiceCreateRequest) -> InvoiceResponse:
+    invoice_id = str(uuid.uuid4())
+
+    # Header, items and charges commit together; the invoice_items triggers
+    # (invoice_totals_trigger.sql) fill in the header totals
+    async with async_db.transaction():
+        # Get customer details for shipping address fallback
+        customer_result = await async_db.fetch_one(CUSTOMER_BILLING_ADDRESS_QUERY, (invoice_data.customer_id,))
+
+        # 1) Insert invoice header first (avoid FK violation on items)
+        await async_db.execute(INSERT_INVOICE_QUERY, _invoice_insert_params(invoice_id, invoice_data, customer_result))
+
+        # 2) Create invoice items and charges
+        for item in invoice_data.items:
+            await create_invoice_item(invoice_id, item)
+        for charge in invoice_data.additional_charges or []:
+            await async_db.execute(INSERT_ADDITIONAL_CHARGE_QUERY, _additional_charge_params(invoice_id, charge))
+    invalidate_dashboard_stats()
+
+    return await get_invoice_by_id(invoice_id)
+
+async def create_invoice_item(invoice_id: str, item_data):
+    # Get product details if not provided
+    product_result = await async_db.fetch_one(PRODUCT_DEFAULTS_QUERY, (item_data.product_id,))
+    await async_db.execute(INSERT_INVOICE_ITEM_QUERY, _invoice_item_insert_params(invoice_id, item_data, product_result))
+
+async def update_invoice(invoice_id: str, invoice_data: InvoiceUpdateRequest) -> Optional[InvoiceResponse]:
+    # The header update and item diff share one transaction on a sync connection
+    if not await run_in_threadpool(_apply_invoice_update, invoice_id, invoice_data):
+        return None
+
+    pdf_cache.invalidate(invoice_id)
+    invalidate_dashboard_stats()
+
+    # Return updated invoice
+    return await get_invoice_by_id(invoice_id)
+
+async def cancel_invoice(invoice_id: str, reason: str = None) -> Optional[InvoiceResponse]:
+    """Cancel an invoice - this is the soft delete equivalent"""
+    existing_invoice = await get_invoice_by_id(invoice_id)
+    if not existing_invoice:
+        return None
+
+    # Update invoice status to cancelled with reason
+    await async_db.execute(CANCEL_INVOICE_QUERY, (reason or 'No reason provided', invoice_id))
+    pdf_cache.invalidate(invoice_id)
+    invalidate_dashboard_stats()
+
+    return await get_invoice_by_id(invoice_id)
+
+async def get_invoice_pdf_fingerprint(invoice_id: str) -> Optional[str]:
+    """Content fingerprint of an invoice's PDF, or None if the invoice does not exist"""
+    if not _is_uuid(invoice_id):
+        return None
+    return _pdf_fingerprint(await async_db.fetch_one(PDF_FINGERPRINT_QUERY, (invoice_id,)))
+
+async def get_invoice_version(invoice_id: str) -> Optional[str]:
+    if not _is_uuid(invoice_id):
+        return None
+    result = await async_db.fetch_one(INVOICE_VERSION_QUERY, (invoice_id,))
+    return result['version'] if result else None
+
+async def build_invoice_pdf_payload(invoice_id: str) -> Optional[dict]:
+    """Load everything the PDF shows into plain dicts that can be sent to a render worker"""
+    from services.async_customer_service import get_customer_by_id
+    from services.company_service import get_company_settings
+
+    invoice = await get_invoice_by_id(invoice_id)
+    if not invoice:
+        return None
+
+    company = await run_in_threadpool(get_company_settings)
+    customer = await get_customer_by_id(invoice.customer_id)
+    return _pdf_payload(invoice, company, customer)
+
+async def get_cached_invoice_pdf(invoice_id: str, fingerprint: str) -> Optional[bytes]:
+    """Return the PDF for this fingerprint from the cache, rendering it in the render pool on a miss"""
+    pdf_content = pdf_cache.get(invoice_id, fingerprint)
+    if pdf_content is None:
+        payload = await build_invoice_pdf_payload(invoice_id)
+        if not payload:
+            return None
+        pdf_content = await pdf_renderer.render(payload)
+        if pdf_content:
+            pdf_cache.set(invoice_id, fingerprint, pdf_content)
+    return pdf_content
@@ -0,0 +1,76 @@
+from db.async_database import async_db
+from models.payment_models import PaymentCreateRequest, PaymentUpdateRequest, PaymentResponse
+from services.dashboard_service import invalidate_dashboard_stats
+from services.payment_service import INSERT_PAYMENT_QUERY, REFUND_PAYMENT_QUERY
+from services.pagination import Keyset
+from typing import List, Optional, Tuple
+import uuid
+from datetime import date
+
+# Newest first, ties broken by id
+PAYMENT_KEYSET = Keyset("created_at", "id", "created_at", descending=True, sort_type="timestamptz")
+
+
+async def get_all_payments() -> List[PaymentResponse]:
+    query = "SELECT * FROM payments ORDER BY created_at DESC"
+    result = await async_db.fetch_all(query)
+    return [PaymentResponse(**row) for row in result]
+
+async def get_payments_page(limit: int, after: str = None, before: str = None) -> Tuple[List[PaymentResponse], Optional[str], Optional[str]]:
+    """Return one keyset page of payments plus the next/previous cursors"""
+    condition, params, order_and_limit = PAYMENT_KEYSET.clause(limit, after, before)
+    query = "SELECT * FROM payments" + (f" WHERE {condition}" if condition else "") + order_and_limit
+    result = await async_db.fetch_all(query, (*params, limit + 1))
+    rows, next_cursor, prev_cursor = PAYMENT_KEYSET.page(result, limit, after, before)
+    return [PaymentResponse(**row) for row in rows], next_cursor, prev_cursor
+
+async def get_payment_by_id(payment_id: str) -> Optional[PaymentResponse]:
+    query = "SELECT * FROM payments WHERE id = %s"
+    result = await async_db.fetch_one(query, (payment_id,))
+    return PaymentResponse(**result) if result else None
+
+async def create_payment(payment_data: PaymentCreateRequest) -> PaymentResponse:
+    payment_id = str(uuid.uuid4())
+    data = payment_data.dict()
+    data['id'] = payment_id
+
+    rows = await async_db.fetch_returning(INSERT_PAYMENT_QUERY, data)
+    invalidate_dashboard_stats()
+    return PaymentResponse(**rows[0])
+
+async def update_payment(payment_id: str, payment_data: PaymentUpdateRequest) -> Optional[PaymentResponse]:
+    data = payment_data.dict(exclude_unset=True)
+    data['id'] = payment_id
+
+    # Build dynamic query based on provided fields
+    set_clause = ", ".join([f"{key}=%({key})s" for key in data.keys() if key != 'id'])
+    if not set_clause:
+        return await get_payment_by_id(payment_id)
+    # No row back means the payment does not exist
+    query = f"UPDATE payments SET {set_clause} WHERE id=%(id)s RETURNING *"
+
+    rows = await async_db.fetch_returning(query, data)
+    if not rows:
+        return None
+    invalidate_dashboard_stats()
+
+    # Return updated payment
+    return PaymentResponse(**rows[0])
+
+async def refund_payment(payment_id: str, reason: str = None) -> Optional[PaymentResponse]:
+    """Create a refund for a payment - this is the soft delete equivalent"""
+    refund_data = {
+        'id': str(uuid.uuid4()),
+        'payment_id': payment_id,
+        'date': date.today(),
+        'reason': reason or 'No reason provided'
+    }
+
+    # Nothing is inserted when the original payment does not exist
+    rows = await async_db.fetch_returning(REFUND_PAYMENT_QUERY, refund_data)
+    if not rows:
+        return None
+    invalidate_dashboard_stats()
+    return PaymentResponse(**rows[0])
+
+# Note: No delete function - payments should be handled with refunds using refund_payment() instead
@@ -0,0 +1,90 @@
+from db.async_database import async_db
+from models.product_models import ProductCreateRequest, ProductUpdateRequest, ProductResponse
+from services.product_service import PRODUCT_VERSION_QUERY
+from services.pagination import Keyset
+from typing import List, Optional, Tuple
+import uuid
+
+PRODUCT_SEARCH_CONDITION = "(name ILIKE %s OR description ILIKE %s OR category ILIKE %s)"
+
+# Alphabetical, ties broken by id
+PRODUCT_KEYSET = Keyset("name", "id", "name")
+
+async def get_all_products() -> List[ProductResponse]:
+    query = "SELECT * FROM products WHERE is_active = TRUE ORDER BY name"
+    result = await async_db.fetch_all(query)
+    return [ProductResponse(**row) for row in result]
+
+async def search_products(search_term: str) -> List[ProductResponse]:
+    pattern = f"%{search_term}%"
+    query = f"SELECT * FROM products WHERE is_active = TRUE AND {PRODUCT_SEARCH_CONDITION} ORDER BY name"
+    result = await async_db.fetch_all(query, (pattern, pattern, pattern))
+    return [ProductResponse(**row) for row in result]
+
+async def get_products_page(limit: int, after: str = None, before: str = None, search_term: str = None) -> Tuple[List[ProductResponse], Optional[str], Optional[str]]:
+    """Return one keyset page of active products, optionally filtered by search term"""
+    conditions = ["is_active = TRUE"]
+    params = []
+    if search_term:
+        conditions.append(PRODUCT_SEARCH_CONDITION)
+        params.extend([f"%{search_term}%"] * 3)
+
+    keyset_condition, keyset_params, order_and_limit = PRODUCT_KEYSET.clause(limit, after, before)
+    if keyset_condition:
+        conditions.append(keyset_condition)
+        params.extend(keyset_params)
+
+    query = f"SELECT * FROM products WHERE {' AND '.join(conditions)}" + order_and_limit
+    result = await async_db.fetch_all(query, (*params, limit + 1))
+    rows, next_cursor, prev_cursor = PRODUCT_KEYSET.page(result, limit, after, before)
+    return [ProductResponse(**row) for row in rows], next_cursor, prev_cursor
+
+async def get_all_products_including_inactive() -> List[ProductResponse]:
+    query = "SELECT * FROM products ORDER BY name"
+    result = await async_db.fetch_all(query)
+    return [ProductResponse(**row) for row in result]
+
+async def get_product_by_id(product_id: str) -> Optional[ProductResponse]:
+    query = "SELECT * FROM products WHERE id = %s AND is_active = TRUE"
+    result = await async_db.fetch_one(query, (product_id,))
+    return ProductResponse(**result) if result else None
+
+async def get_product_version(product_id: str) -> Optional[str]:
+    result = await async_db.fetch_one(PRODUCT_VERSION_QUERY, (product_id,))
+    return result['version'] if result else None
+
+async def create_product(product_data: ProductCreateRequest) -> ProductResponse:
+    product_id = str(uuid.uuid4())
+    data = product_data.dict()
+    data['id'] = product_id
+    data['is_active'] = True
+
+    query = """
+        INSERT INTO products (id, name, description, hsn_sac_code, price, tax_rate, unit, is_taxable, category, is_active)
+        VALUES (%(id)s, %(name)s, %(description)s, %(hsn_sac_code)s, %(price)s, %(tax_rate)s, %(unit)s, %(is_taxable)s, %(category)s, %(is_active)s)
+        RETURNING *
+    """
+    rows = await async_db.fetch_returning(query, data)
+    return ProductResponse(**rows[0])
+
+async def update_product(product_id: str, product_data: ProductUpdateRequest) -> Optional[ProductResponse]:
+    data = product_data.dict(exclude_unset=True)
+    data['id'] = product_id
+
+    # Build dynamic query based on provided fields
+    set_clause = ", ".join([f"{key}=%({key})s" for key in data.keys() if key != 'id'])
+    if not set_clause:
+        return await get_product_by_id(product_id)
+    # Only active products can be updated; no row back means not found
+    query = f"UPDATE products SET {set_clause} WHERE id=%(id)s AND is_active = TRUE RETURNING *"
+
+    rows = await async_db.fetch_returning(query, data)
+    return ProductResponse(**rows[0]) if rows else None
+
+async def delete_product(product_id: str) -> bool:
+    query = "UPDATE products SET is_active = FALSE WHERE id = %s"
+    try:
+        await async_db.execute(query, (product_id,))
+        return True
+    except Exception:
+        return False
@@ -30,6 +30,13 @@ def get_customer_by_id(customer_id: str) -> Optional[CustomerResponse]:
     result = db.fetch_one(query, (customer_id,))
     return CustomerResponse(**result) if result else None
 
+# Hash of the row as GET /customers/{id} returns it, used as its ETag
+CUSTOMER_VERSION_QUERY = "SELECT md5(c::text) AS version FROM customers c WHERE id = %s AND is_active = TRUE"
+
+def get_customer_version(customer_id: str) -> Optional[str]:
+    result = db.fetch_one(CUSTOMER_VERSION_QUERY, (customer_id,))
+    return result['version'] if result else None
+
 def _serialize_addresses(data: dict) -> dict:
     # Ensure address JSON fields are serialized for DB
     for key in ["billing_address", "shipping_address"]:
@@ -51,16 +58,12 @@ def create_customer(customer_data: CustomerCreateRequest) -> CustomerResponse:
     query = """
         INSERT INTO customers (id, name, contact, email, phone, billing_address, shipping_address, gst_no, place_of_supply, payment_terms, credit_limit, company_type, notes, is_active)
         VALUES (%(id)s, %(name)s, %(contact)s, %(email)s, %(phone)s, %(billing_address)s::jsonb, %(shipping_address)s::jsonb, %(gst_no)s, %(place_of_supply)s, %(payment_terms)s, %(credit_limit)s, %(company_type)s, %(notes)s, %(is_active)s)
+        RETURNING *
     """
-    db.execute(query, data)
-    return get_customer_by_id(customer_id)
+    rows = db.fetch_returning(query, data)
+    return CustomerResponse(**rows[0])
 
 def update_customer(customer_id: str, customer_data: CustomerUpdateRequest) -> Optional[CustomerResponse]:
-    # Check if customer exists
-    existing_customer = get_customer_by_id(customer_id)
-    if not existing_customer:
-        return None
-
     data = customer_data.dict(exclude_unset=True)
     data['id'] = customer_id
     data = _serialize_addresses(data)
@@ -74,13 +77,14 @@ def update_customer(customer_id: str, customer_data: CustomerUpdateRequest) -> O
             set_parts.append(f"{key}=%({key})s::jsonb")
         else:
             set_parts.append(f"{key}=%({key})s")
+    if not set_parts:
+        return get_customer_by_id(customer_id)
     set_clause = ", ".join(set_parts)
-    query = f"UPDATE customers SET {set_clause} WHERE id=%(id)s"
-
-    db.execute(query, data)
+    # Only active customers can be updated; no row back means not found
+    query = f"UPDATE customers SET {set_clause} WHERE id=%(id)s AND is_active = TRUE RETURNING *"
 
-    # Return updated customer
-    return get_customer_by_id(customer_id)
+    rows = db.fetch_returning(query, data)
+    return CustomerResponse(**rows[0]) if rows else None
 
 def delete_customer(customer_id: str) -> bool:
     query = "UPDATE customers SET is_active = FALSE WHERE id = %s"
@@ -0,0 +1,290 @@
+"""
+Cache for dashboard statistics.
+
+An entry is fresh for ``DASHBOARD_CACHE_TTL`` seconds. After that it is
+served stale for up to ``DASHBOARD_CACHE_STALE_TTL`` more seconds while a
+single background task recomputes it. Concurrent misses in a process share
+one recomputation. With the shared backend, a lease also stops two workers
+from recomputing the same key at once.
+
+Writes that change the numbers call ``invalidate()``. A recomputation that
+started before an invalidation is returned to its callers but not stored.
+
+Backends are pluggable:
+
+- ``memory``: per-process dict
+- ``sqlite``: one SQLite file shared by all workers on the host
+- ``none``: nothing is stored; concurrent callers still share one computation
+"""
+from collections import namedtuple
+from abc import ABC, abstractmethod
+from typing import Any, Callable, Dict, Optional
+from starlette.concurrency import run_in_threadpool
+import metrics
+import threading
+import sqlite3
+import tempfile
+import asyncio
+import json
+import time
+import os
+import logging
+
+logger = logging.getLogger(__name__)
+
+DASHBOARD_CACHE_BACKEND = os.getenv("DASHBOARD_CACHE_BACKEND", "memory")
+DASHBOARD_CACHE_TTL = float(os.getenv("DASHBOARD_CACHE_TTL", "300"))
+DASHBOARD_CACHE_STALE_TTL = float(os.getenv("DASHBOARD_CACHE_STALE_TTL", "600"))
+DASHBOARD_CACHE_PATH = os.getenv("DASHBOARD_CACHE_PATH", os.path.join(tempfile.gettempdir(), "invoice-dashboard-cache.sqlite3"))
+# Longest a recomputation may hold the lease before another worker takes over
+DASHBOARD_CACHE_LEASE_TTL = float(os.getenv("DASHBOARD_CACHE_LEASE_TTL", "30"))
+
+CacheEntry = namedtuple("CacheEntry", ["value", "fresh_until", "stale_until"])
+
+class DashboardCacheBackend(ABC):
+    """Storage interface for cached dashboard values"""
+
+    @abstractmethod
+    def get(self, key: str) -> Optional[CacheEntry]:
+        raise NotImplementedError
+
+    @abstractmethod
+    def set(self, key: str, entry: CacheEntry, computed_since: float) -> bool:
+        """Store ``entry`` unless ``key`` was invalidated after ``computed_since``"""
+        raise NotImplementedError
+
+    @abstractmethod
+    def invalidate(self, key: str) -> None:
+        raise NotImplementedError
+
+    def acquire(self, key: str, ttl: float) -> bool:
+        """Take the recompute lease for ``key``; False if another worker holds it"""
+        return True
+
+    def release(self, key: str) -> None:
+        pass
+
+    @abstractmethod
+    def clear(self) -> None:
+        raise NotImplementedError
+
+class NullDashboardCache(DashboardCacheBackend):
+    def get(self, key):
+        return None
+
+    def set(self, key, entry, computed_since):
+        return False
+
+    def invalidate(self, key):
+        pass
+
+    def clear(self):
+        pass
+
+class MemoryDashboardCache(DashboardCacheBackend):
+    """Per-process store; single-flight within the process makes a lease unnecessary"""
+
+    def __init__(self):
+        self._entries: Dict[str, CacheEntry] = {}
+        self._invalidated: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            return self._entries.get(key)
+
+    def set(self, key, entry, computed_since):
+        with self._lock:
+            if self._invalidated.get(key, 0) > computed_since:
+                return False
+            self._entries[key] = entry
+            return True
+
+    def invalidate(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+            self._invalidated[key] = time.time()
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._invalidated.clear()
+
+class SqliteDashboardCache(DashboardCacheBackend):
+    """Store in a local SQLite file so every worker on the host shares entries and invalidations"""
+
+    def __init__(self, path: str = DASHBOARD_CACHE_PATH):
+        self.path = path
+        self.owner = f"{os.getpid()}-{id(self)}"
+        self._local = threading.local()
+        conn = self._connection()
+        conn.execute("CREATE TABLE IF NOT EXISTS entries (key TEXT PRIMARY KEY, value TEXT NOT NULL, fresh_until REAL NOT NULL, stale_until REAL NOT NULL)")
+        conn.execute("CREATE TABLE IF NOT EXISTS invalidations (key TEXT PRIMARY KEY, at REAL NOT NULL)")
+        conn.execute("CREATE TABLE IF NOT EXISTS leases (key TEXT PRIMARY KEY, owner TEXT NOT NULL, expires REAL NOT NULL)")
+
+    def _connection(self) -> sqlite3.Connection:
+        # sqlite3 connections may not be shared between threads
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def get(self, key):
+        row = self._connection().execute(
+            "SELECT value, fresh_until, stale_until FROM entries WHERE key = ?", (key,)
+        ).fetchone()
+        if row is None:
+            return None
+        return CacheEntry(json.loads(row[0]), row[1], row[2])
+
+    def set(self, key, entry, computed_since):
+        cursor = self._connection().execute(
+            """
+            INSERT OR REPLACE INTO entries (key, value, fresh_until, stale_until)
+            SELECT ?, ?, ?, ?
+            WHERE NOT EXISTS (SELECT 1 FROM invalidations WHERE key = ? AND at > ?)
+            """,
+            (key, json.dumps(entry.value), entry.fresh_until, entry.stale_until, key, computed_since)
+        )
+        return cursor.rowcount == 1
+
+    def invalidate(self, key):
+        conn = self._connection()
+        with conn:
+            conn.execute("BEGIN IMMEDIATE")
+            conn.execute("DELETE FROM entries WHERE key = ?", (key,))
+            conn.execute("INSERT OR REPLACE INTO invalidations (key, at) VALUES (?, ?)", (key, time.time()))
+
+    def acquire(self, key, ttl):
+        now = time.time()
+        cursor = self._connection().execute(
+            """
+            INSERT INTO leases (key, owner, expires) VALUES (?, ?, ?)
+            ON CONFLICT(key) DO UPDATE SET owner = excluded.owner, expires = excluded.expires
+            WHERE leases.expires < ?
+            """,
+            (key, self.owner, now + ttl, now)
+        )
+        return cursor.rowcount == 1
+
+    def release(self, key):
+        self._connection().execute("DELETE FROM leases WHERE key = ? AND owner = ?", (key, self.owner))
+
+    def clear(self):
+        conn = self._connection()
+        for table in ("entries", "invalidations", "leases"):
+            conn.execute(f"DELETE FROM {table}")
+
+class DashboardCache:
+    """Single-flight, stale-while-revalidate front for the configured backend"""
+
+    def __init__(self, backend: DashboardCacheBackend, ttl: float = DASHBOARD_CACHE_TTL,
+                 stale_ttl: float = DASHBOARD_CACHE_STALE_TTL, lease_ttl: float = DASHBOARD_CACHE_LEASE_TTL):
+        self.backend = backend
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self.lease_ttl = lease_ttl
+        self._inflight: Dict[str, asyncio.Task] = {}
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.recomputes = 0
+        self.errors = 0
+
+    async def get_or_compute(self, key: str, compute: Callable[[], Any]) -> Any:
+        """Cached value for ``key``; ``compute`` is a blocking function run in the thread pool"""
+        entry = self.backend.get(key)
+        now = time.time()
+        if entry and now < entry.fresh_until:
+            self.hits += 1
+            metrics.observe_dashboard_cache("hit")
+            return entry.value
+        if entry and now < entry.stale_until:
+            self.stale_hits += 1
+            metrics.observe_dashboard_cache("stale")
+            task = self._recompute_once(key, compute)
+            task.add_done_callback(self._log_background_failure)
+            return entry.value
+
+        self.misses += 1
+        metrics.observe_dashboard_cache("miss")
+        # Shielded so a cancelled request does not cancel the computation other callers wait on
+        return await asyncio.shield(self._recompute_once(key, compute))
+
+    def put(self, key: str, value: Any, ttl: float, stale_ttl: float = 0) -> None:
+        now = time.time()
+        self.backend.set(key, CacheEntry(value, now + ttl, now + ttl + stale_ttl), now)
+
+    def invalidate(self, key: str) -> None:
+        self.backend.invalidate(key)
+
+    def clear(self) -> None:
+        self.backend.clear()
+
+    def stats(self) -> dict:
+        return {
+            "backend": type(self.backend).__name__,
+            "hits": self.hits,
+            "stale_hits": self.stale_hits,
+            "misses": self.misses,
+            "recomputes": self.recomputes,
+            "errors": self.errors,
+            "in_flight": len(self._inflight),
+        }
+
+    def _recompute_once(self, key: str, compute: Callable[[], Any]) -> asyncio.Task:
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(self._recompute(key, compute))
+            self._inflight[key] = task
+            task.add_done_callback(lambda done: self._inflight.pop(key, None) if self._inflight.get(key) is done else None)
+        return task
+
+    async def _recompute(self, key: str, compute: Callable[[], Any]) -> Any:
+        started = time.time()
+        if not self.backend.acquire(key, self.lease_ttl):
+            # Another worker is already computing this key; use its result
+            entry = await self._wait_for_fresh_entry(key)
+            if entry:
+                return entry.value
+            if not self.backend.acquire(key, self.lease_ttl):
+                logger.warning(f"Dashboard cache lease for {key} still held; recomputing anyway")
+        try:
+            self.recomputes += 1
+            value = await run_in_threadpool(compute)
+            now = time.time()
+            self.backend.set(key, CacheEntry(value, now + self.ttl, now + self.ttl + self.stale_ttl), started)
+            return value
+        except Exception:
+            self.errors += 1
+            raise
+        finally:
+            self.backend.release(key)
+
+    async def _wait_for_fresh_entry(self, key: str) -> Optional[CacheEntry]:
+        deadline = time.monotonic() + self.lease_ttl
+        while time.monotonic() < deadline:
+            await asyncio.sleep(0.05)
+            entry = self.backend.get(key)
+            if entry and time.time() < entry.fresh_until:
+                return entry
+        return None
+
+    @staticmethod
+    def _log_background_failure(task: asyncio.Task):
+        if not task.cancelled() and task.exception() is not None:
+            logger.warning(f"Background dashboard refresh failed; serving stale data: {task.exception()}")
+
+def create_backend(name: str = DASHBOARD_CACHE_BACKEND) -> DashboardCacheBackend:
+    if name == "memory":
+        return MemoryDashboardCache()
+    if name == "sqlite":
+        return SqliteDashboardCache()
+    if name == "none":
+        return NullDashboardCache()
+    raise ValueError(f"Unknown dashboard cache backend: {name}")
+
+dashboard_cache = DashboardCache(create_backend())
@@ -1,47 +1,59 @@
 from typing import Dict, Any, List
 from datetime import datetime, timedelta
-import time
+from services.dashboard_cache import dashboard_cache
+from services.rollups import dashboard_rollups
+from db.errors import UndefinedTableError
 
-# Simple in-memory cache
-_cache = {}
-_cache_expiry = {}
-CACHE_DURATION = 300  # 5 minutes
+DASHBOARD_STATS_KEY = "dashboard_stats"
+MOCK_STATS_TTL = 60  # 1 minute cache for mock data
 
-def get_dashboard_stats() -> Dict[str, Any]:
+async def get_dashboard_stats() -> Dict[str, Any]:
     """Get comprehensive dashboard statistics with fallback to mock data"""
-    cache_key = "dashboard_stats"
-    current_time = time.time()
-    
-    # Check if we have cached data that's still valid
-    if cache_key in _cache and current_time < _cache_expiry.get(cache_key, 0):
-        return _cache[cache_key]
-    
     try:
-        # Try to get real stats from database
-        from db.database import db
-        stats = get_optimized_stats(db)
-        
-        # Cache the results
-        _cache[cache_key] = stats
-        _cache_expiry[cache_key] = current_time + CACHE_DURATION
-        
-        return stats
-        
+        # Fresh or stale-while-revalidating cached stats; one recomputation at a time
+        return await dashboard_cache.get_or_compute(DASHBOARD_STATS_KEY, _load_dashboard_stats)
     except Exception as e:
         print(f"Database connection failed, using mock data: {e}")
         # Return mock data when database is unavailable
         mock_stats = get_mock_stats()
         
         # Cache mock data for shorter duration
-        _cache[cache_key] = mock_stats
-        _cache_expiry[cache_key] = current_time + 60  # 1 minute cache for mock data
+        dashboard_cache.put(DASHBOARD_STATS_KEY, mock_stats, MOCK_STATS_TTL)
         
         return mock_stats
 
-def get_optimized_stats(db) -> Dict[str, Any]:
-    """Get all statistics in optimized queries"""
-    # Single query to get multiple stats at once
-    comprehensive_query = """
+def _load_dashboard_stats() -> Dict[str, Any]:
+    # Try to get real stats from database
+    from db.database import db
+    return get_optimized_stats(db)
+
+def invalidate_dashboard_stats():
+    """Drop cached stats after a write that changes them (invoices, items, payments)"""
+    dashboard_cache.invalidate(DASHBOARD_STATS_KEY)
+
+# Pre-aggregated by triggers (see dashboard_rollups.sql): a few dozen rows whatever the history size
+ROLLUP_STATS_QUERY = """
+    WITH invoice_stats AS (
+        SELECT 
+            COALESCE(SUM(invoice_count), 0) as total_invoices,
+            COALESCE(SUM(CASE WHEN status = 'paid' THEN total_amount ELSE 0 END), 0) as paid_revenue,
+            COALESCE(SUM(CASE WHEN status IN ('draft', 'sent', 'partially_paid') THEN total_amount ELSE 0 END), 0) as pending_revenue,
+            COALESCE(SUM(CASE WHEN status = 'overdue' THEN total_amount ELSE 0 END), 0) as overdue_revenue,
+            COALESCE(SUM(total_amount), 0) as total_revenue,
+            COALESCE(SUM(CASE WHEN status = 'paid' THEN invoice_count ELSE 0 END), 0) as paid_count,
+            COALESCE(SUM(CASE WHEN status IN ('draft', 'sent', 'partially_paid') THEN invoice_count ELSE 0 END), 0) as pending_count,
+            COALESCE(SUM(CASE WHEN status = 'overdue' THEN invoice_count ELSE 0 END), 0) as overdue_count
+        FROM dashboard_rollups
+    )
+    SELECT 
+        i.*,
+        COALESCE((SELECT value FROM dashboard_counters WHERE name = 'active_customers'), 0) as total_customers,
+        COALESCE((SELECT value FROM dashboard_counters WHERE name = 'active_products'), 0) as total_products
+    FROM invoice_stats i
+"""
+
+# Full-table aggregation; used until dashboard_rollups.sql has been applied
+AGGREGATE_STATS_QUERY = """
     WITH invoice_stats AS (
         SELECT 
             COUNT(*) as total_invoices,
@@ -74,9 +86,46 @@ def get_optimized_stats(db) -> Dict[str, Any]:
     FROM invoice_stats i
     CROSS JOIN customer_stats c
     CROSS JOIN product_stats p
-    """
-    
-    main_stats = db.fetch_one(comprehensive_query)
+"""
+
+ROLLUP_REVENUE_TREND_QUERY = """
+    SELECT 
+        month,
+        SUM(CASE WHEN status = 'paid' THEN total_amount ELSE amount_paid END) as revenue
+    FROM dashboard_rollups
+    WHERE month >= DATE_TRUNC('month', CURRENT_DATE - INTERVAL '6 months')
+    AND status IN ('paid', 'partially_paid')
+    GROUP BY month
+    ORDER BY month DESC
+    LIMIT 6
+"""
+
+AGGREGATE_REVENUE_TREND_QUERY = """
+    SELECT 
+        DATE_TRUNC('month', created_at) as month,
+        COALESCE(SUM(CASE WHEN status = 'paid' THEN total_amount 
+                         WHEN status = 'partially_paid' THEN amount_paid 
+                         ELSE 0 END), 0) as revenue
+    FROM invoices 
+    WHERE created_at >= CURRENT_DATE - INTERVAL '6 months'
+    AND status IN ('paid', 'partially_paid')
+    GROUP BY DATE_TRUNC('month', created_at)
+    ORDER BY month DESC
+    LIMIT 6
+"""
+
+def get_optimized_stats(db) -> Dict[str, Any]:
+    """Get all statistics from the rollup tables (or a full aggregation if they are missing)"""
+    use_rollups = dashboard_rollups.available()
+    if use_rollups:
+        try:
+            main_stats = db.fetch_one(ROLLUP_STATS_QUERY)
+            dashboard_rollups.mark_available()
+        except UndefinedTableError as e:
+            dashboard_rollups.mark_missing(e)
+            use_rollups = False
+    if not use_rollups:
+        main_stats = db.fetch_one(AGGREGATE_STATS_QUERY)
     
     if not main_stats:
         return get_mock_stats()
@@ -85,25 +134,31 @@ def get_optimized_stats(db) -> Dict[str, Any]:
     recent_invoices = get_recent_invoices_optimized(db)
     
     # Get revenue trend separately
-    revenue_trend = get_revenue_trend_optimized(db)
+    revenue_trend = get_revenue_trend_optimized(db, use_rollups)
     
     return {
-        'total_invoices': main_stats['total_invoices'],
-        'total_customers': main_stats['total_customers'],
-        'total_products': main_stats['total_products'],
+        'total_invoices': int(main_stats['total_invoices']),
+        'total_customers': int(main_stats['total_customers']),
+        'total_products': int(main_stats['total_products']),
         'total_revenue': float(main_stats['total_revenue']),
         'paid_revenue': float(main_stats['paid_revenue']),
         'pending_revenue': float(main_stats['pending_revenue']),
         'overdue_revenue': float(main_stats['overdue_revenue']),
         'invoice_status_breakdown': {
-            'paid': {'count': main_stats['paid_count'], 'revenue': float(main_stats['paid_revenue'])},
-            'pending': {'count': main_stats['pending_count'], 'revenue': float(main_stats['pending_revenue'])},
-            'overdue': {'count': main_stats['overdue_count'], 'revenue': float(main_stats['overdue_revenue'])}
+            'paid': {'count': int(main_stats['paid_count']), 'revenue': float(main_stats['paid_revenue'])},
+            'pending': {'count': int(main_stats['pending_count']), 'revenue': float(main_stats['pending_revenue'])},
+            'overdue': {'count': int(main_stats['overdue_count']), 'revenue': float(main_stats['overdue_revenue'])}
         },
         'recent_invoices': recent_invoices,
         'revenue_trend': revenue_trend
     }
 
+def rebuild_dashboard_rollups():
+    """Recompute the rollup tables from the base tables and drop the cached stats"""
+    from db.database import db
+    db.execute("SELECT public.rebuild_dashboard_rollups()")
+    invalidate_dashboard_stats()
+
 def get_recent_invoices_optimized(db) -> List[Dict[str, Any]]:
     """Get recent invoices with optimized query"""
     try:
@@ -138,22 +193,10 @@ def get_recent_invoices_optimized(db) -> List[Dict[str, Any]]:
         print(f"Error getting recent invoices: {e}")
         return []
 
-def get_revenue_trend_optimized(db) -> List[Dict[str, Any]]:
+def get_revenue_trend_optimized(db, use_rollups: bool = True) -> List[Dict[str, Any]]:
     """Get revenue trend for the last 6 months with optimized query"""
     try:
-        query = """
-            SELECT 
-                DATE_TRUNC('month', created_at) as month,
-                COALESCE(SUM(CASE WHEN status = 'paid' THEN total_amount 
-                                 WHEN status = 'partially_paid' THEN amount_paid 
-                                 ELSE 0 END), 0) as revenue
-            FROM invoices 
-            WHERE created_at >= CURRENT_DATE - INTERVAL '6 months'
-            AND status IN ('paid', 'partially_paid')
-            GROUP BY DATE_TRUNC('month', created_at)
-            ORDER BY month DESC
-            LIMIT 6
-        """
+        query = ROLLUP_REVENUE_TREND_QUERY if use_rollups else AGGREGATE_REVENUE_TREND_QUERY
         
         trend_data = db.fetch_all(query)
         return [
@@ -0,0 +1,164 @@
+"""
+Streaming NDJSON / CSV exports for invoices and payments.
+
+Rows are read from a server-side cursor in batches and serialized batch by
+batch, so memory use stays flat no matter how many rows match the filters.
+"""
+from db.database import db
+from starlette.concurrency import run_in_threadpool
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Iterator, Optional
+import itertools
+import csv
+import io
+import json
+import os
+
+EXPORT_BATCH_SIZE = int(os.getenv("EXPORT_BATCH_SIZE", "1000"))
+
+EXPORT_MEDIA_TYPES = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv; charset=utf-8",
+}
+
+INVOICE_EXPORT_COLUMNS = [
+    "id", "invoice_number", "customer_id", "customer_name", "date", "due_date", "status",
+    "subtotal", "tax_amount", "total_amount", "amount_paid", "balance_due",
+    "cgst_amount", "sgst_amount", "igst_amount", "round_off",
+    "po_number", "po_date", "eway_bill_number", "eway_bill_date", "place_of_supply",
+    "invoice_type", "cancel_reason", "created_at",
+]
+
+PAYMENT_EXPORT_COLUMNS = [
+    "id", "invoice_id", "invoice_number", "customer_id", "customer_name", "amount", "date",
+    "method", "reference", "notes", "is_refund", "is_advance", "created_at",
+]
+
+def _json_default(value):
+    if isinstance(value, Decimal):
+        return float(value)
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    return str(value)
+
+def _csv_value(value):
+    if value is None:
+        return ""
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    if isinstance(value, (dict, list)):
+        return json.dumps(value)
+    return value
+
+def _ndjson_chunks(batches, columns) -> Iterator[str]:
+    for rows in batches:
+        yield "".join(json.dumps({col: row.get(col) for col in columns}, default=_json_default) + "\n" for row in rows)
+
+def _csv_chunks(batches, columns) -> Iterator[str]:
+    header_written = False
+    for rows in batches:
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        if not header_written:
+            writer.writerow(columns)
+            header_written = True
+        for row in rows:
+            writer.writerow([_csv_value(row.get(col)) for col in columns])
+        yield buffer.getvalue()
+    if not header_written:
+        buffer = io.StringIO()
+        csv.writer(buffer).writerow(columns)
+        yield buffer.getvalue()
+
+def _serialize(batches, columns, export_format: str) -> Iterator[str]:
+    if export_format == "csv":
+        return _csv_chunks(batches, columns)
+    return _ndjson_chunks(batches, columns)
+
+def export_invoices(
+    export_format: str = "ndjson",
+    date_from: Optional[date] = None,
+    date_to: Optional[date] = None,
+    status: Optional[str] = None,
+    customer_id: Optional[str] = None
+) -> Iterator[str]:
+    """Stream invoices matching the filters, oldest first"""
+    conditions = []
+    params = []
+    if date_from:
+        conditions.append("i.date >= %s")
+        params.append(date_from)
+    if date_to:
+        conditions.append("i.date <= %s")
+        params.append(date_to)
+    if status:
+        conditions.append("i.status = %s")
+        params.append(status)
+    if customer_id:
+        conditions.append("i.customer_id = %s")
+        params.append(customer_id)
+
+    query = """
+        SELECT
+            i.*,
+            c.name as customer_name
+        FROM invoices i
+        LEFT JOIN customers c ON i.customer_id = c.id
+    """
+    if conditions:
+        query += " WHERE " + " AND ".join(conditions)
+    query += " ORDER BY i.date, i.created_at, i.id"
+
+    batches = db.stream(query, tuple(params), batch_size=EXPORT_BATCH_SIZE)
+    return _serialize(batches, INVOICE_EXPORT_COLUMNS, export_format)
+
+def export_payments(
+    export_format: str = "ndjson",
+    date_from: Optional[date] = None,
+    date_to: Optional[date] = None,
+    customer_id: Optional[str] = None,
+    method: Optional[str] = None,
+    is_refund: Optional[bool] = None
+) -> Iterator[str]:
+    """Stream payments matching the filters, oldest first"""
+    conditions = []
+    params = []
+    if date_from:
+        conditions.append("p.date >= %s")
+        params.append(date_from)
+    if date_to:
+        conditions.append("p.date <= %s")
+        params.append(date_to)
+    if customer_id:
+        conditions.append("p.customer_id = %s")
+        params.append(customer_id)
+    if method:
+        conditions.append("p.method = %s")
+        params.append(method)
+    if is_refund is not None:
+        conditions.append("p.is_refund = %s")
+        params.append(is_refund)
+
+    query = """
+        SELECT
+            p.*,
+            i.invoice_number,
+            c.name as customer_name
+        FROM payments p
+        LEFT JOIN invoices i ON p.invoice_id = i.id
+        LEFT JOIN customers c ON p.customer_id = c.id
+    """
+    if conditions:
+        query += " WHERE " + " AND ".join(conditions)
+    query += " ORDER BY p.date, p.created_at, p.id"
+
+    batches = db.stream(query, tuple(params), batch_size=EXPORT_BATCH_SIZE)
+    return _serialize(batches, PAYMENT_EXPORT_COLUMNS, export_format)
+
+async def start_stream(chunks: Iterator[str]) -> Iterator[str]:
+    """Pull the first chunk in a worker thread so query errors surface before the response starts"""
+    first = await run_in_threadpool(next, chunks, None)
+    if first is None:
+        return iter(())
+    return itertools.chain([first], chunks)
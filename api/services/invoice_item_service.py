@@ -1,5 +1,6 @@
 from db.database import db
 from models.invoice_item_models import InvoiceItemCreateRequest, InvoiceItemUpdateRequest, InvoiceItemResponse
+from services.dashboard_service import invalidate_dashboard_stats
 from typing import List, Optional
 import uuid
 import logging
@@ -75,20 +76,17 @@ def create_invoice_item(item_data: InvoiceItemCreateRequest) -> InvoiceItemRespo
     query = """
         INSERT INTO invoice_items (id, invoice_id, product_id, description, quantity, unit_price, tax_rate, discount)
         VALUES (%(id)s, %(invoice_id)s, %(product_id)s, %(description)s, %(quantity)s, %(unit_price)s, %(tax_rate)s, %(discount)s)
+        RETURNING *
     """
-    db.execute(query, data)
-    return get_invoice_item_by_id(item_id)
+    rows = db.fetch_returning(query, data)
+    invalidate_dashboard_stats()
+    return InvoiceItemResponse(**rows[0])
 
 def update_invoice_item(item_id: str, item_data: InvoiceItemUpdateRequest) -> Optional[InvoiceItemResponse]:
     """Update an existing invoice item"""
     if not validate_uuid(item_id):
         raise ValueError(f"Invalid item ID format: {item_id}")
     
-    # Check if item exists
-    existing_item = get_invoice_item_by_id(item_id)
-    if not existing_item:
-        raise ValueError(f"Invoice item not found: {item_id}")
-    
     data = item_data.dict(exclude_unset=True)
     
     # Validate updated fields
@@ -103,13 +101,22 @@ def update_invoice_item(item_id: str, item_data: InvoiceItemUpdateRequest) -> Op
     
     # Build dynamic query based on provided fields
     set_clause = ", ".join([f"{key}=%({key})s" for key in data.keys() if key != 'id'])
-    query = f"UPDATE invoice_items SET {set_clause} WHERE id=%(id)s"
+    if not set_clause:
+        existing_item = get_invoice_item_by_id(item_id)
+        if not existing_item:
+            raise ValueError(f"Invoice item not found: {item_id}")
+        return existing_item
+    query = f"UPDATE invoice_items SET {set_clause} WHERE id=%(id)s RETURNING *"
     
     logger.info(f"Updating invoice item: {item_id}")
-    db.execute(query, data)
+    rows = db.fetch_returning(query, data)
+    # No row back means the item does not exist
+    if not rows:
+        raise ValueError(f"Invoice item not found: {item_id}")
+    invalidate_dashboard_stats()
     
     # Return updated item
-    return get_invoice_item_by_id(item_id)
+    return InvoiceItemResponse(**rows[0])
 
 def delete_invoice_items_by_invoice_id(invoice_id: str) -> bool:
     """Delete all invoice items for a specific invoice (used during invoice updates)"""
@@ -120,6 +127,7 @@ def delete_invoice_items_by_invoice_id(invoice_id: str) -> bool:
     try:
         logger.info(f"Deleting invoice items for invoice: {invoice_id}")
         db.execute(query, (invoice_id,))
+        invalidate_dashboard_stats()
         return True
     except Exception as e:
         logger.error(f"Failed to delete invoice items for invoice {invoice_id}: {e}")
@@ -1,167 +1,231 @@
 from fastapi import logger
-from db.database import db
-from models.invoice_models import InvoiceCreateRequest, InvoiceUpdateRequest, InvoiceResponse, InvoiceItemWithProduct
+from db.database import db, RecordingCursor, RecordingDictCursor
+from models.invoice_models import (
+    InvoiceCreateRequest,
+    InvoiceUpdateRequest,
+    InvoiceResponse,
+    InvoiceItemWithProduct,
+    AdditionalChargeResponse,
+    InvoiceBulkResult,
+    InvoiceBulkCreateResponse
+)
+from services.pdf_cache import pdf_cache
+from services.dashboard_service import invalidate_dashboard_stats
+from psycopg2.extras import execute_batch, execute_values
 from typing import List, Optional
 import uuid
 from datetime import datetime, date, timedelta
-from reportlab.lib.pagesizes import letter, A4
-from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer, Image
-from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-from reportlab.lib.units import inch
-from reportlab.lib import colors
-from reportlab.lib.enums import TA_LEFT, TA_RIGHT, TA_CENTER
-import io
 import json
 
+INVOICE_SELECT = """
+    SELECT 
+        i.*,
+        c.name as customer_name
+    FROM invoices i
+    LEFT JOIN customers c ON i.customer_id = c.id
+"""
+
+INVOICE_ITEMS_QUERY = """
+    SELECT
+        ii.*,
+        p.name as product_name
+    FROM invoice_items ii
+    LEFT JOIN products p ON ii.product_id = p.id
+    WHERE ii.invoice_id = %s
+    ORDER BY ii.id
+"""
+
+# Batched loaders: one query per related table for a whole page of invoices
+INVOICE_ITEMS_BATCH_QUERY = """
+    SELECT
+        ii.*,
+        p.name as product_name
+    FROM invoice_items ii
+    LEFT JOIN products p ON ii.product_id = p.id
+    WHERE ii.invoice_id = ANY(%s::uuid[])
+    ORDER BY ii.invoice_id, ii.id
+"""
+
+ADDITIONAL_CHARGES_BATCH_QUERY = """
+    SELECT id, invoice_id, charge_name, charge_amount, is_taxable, tax_rate, tax_amount, total_amount
+    FROM additional_charges
+    WHERE invoice_id = ANY(%s::uuid[])
+    ORDER BY invoice_id, created_at
+"""
+
 def get_all_invoices() -> List[InvoiceResponse]:
-    query = """
-        SELECT 
-            i.*,
-            c.name as customer_name
-        FROM invoices i
-        LEFT JOIN customers c ON i.customer_id = c.id
-        ORDER BY i.created_at DESC
-    """
+    query = INVOICE_SELECT + " ORDER BY i.created_at DESC"
     result = db.fetch_all(query)
-    
-    invoices = []
-    for row in result:
-        invoice_data = dict(row)
-        # Get invoice items with product details
-        invoice_data['items'] = get_invoice_items_with_products(row['id'])
-        invoices.append(InvoiceResponse(**invoice_data))
-    
-    return invoices
+    return _load_invoices(result)
 
 def get_invoice_by_id(invoice_id: str) -> Optional[InvoiceResponse]:
-    query = """
-        SELECT 
-            i.*,
-            c.name as customer_name
-        FROM invoices i
-        LEFT JOIN customers c ON i.customer_id = c.id
-        WHERE i.id = %s
-    """
+    query = INVOICE_SELECT + " WHERE i.id = %s"
     result = db.fetch_one(query, (invoice_id,))
     
     if result:
-        invoice_data = dict(result)
-        # Get invoice items with product details
-        invoice_data['items'] = get_invoice_items_with_products(invoice_id)
-        return InvoiceResponse(**invoice_data)
+        return _load_invoices([result])[0]
     
     return None
 
+def _load_invoices(invoice_rows) -> List[InvoiceResponse]:
+    """Attach items and additional charges to invoice rows using two batched queries"""
+    if not invoice_rows:
+        return []
+
+    invoice_ids = [str(row['id']) for row in invoice_rows]
+    item_rows = db.fetch_all(INVOICE_ITEMS_BATCH_QUERY, (invoice_ids,))
+    charge_rows = db.fetch_all(ADDITIONAL_CHARGES_BATCH_QUERY, (invoice_ids,))
+    return _assemble_invoices(invoice_rows, item_rows, charge_rows)
+
+def _assemble_invoices(invoice_rows, item_rows, charge_rows) -> List[InvoiceResponse]:
+    """Group related rows by invoice id in memory and build the responses"""
+    items_by_invoice = {}
+    for row in item_rows:
+        item_data = _with_calculated_amounts(dict(row))
+        items_by_invoice.setdefault(str(item_data.pop('invoice_id')), []).append(InvoiceItemWithProduct(**item_data))
+
+    charges_by_invoice = {}
+    for row in charge_rows:
+        charge_data = dict(row)
+        charge_data['id'] = str(charge_data['id'])
+        charges_by_invoice.setdefault(str(charge_data.pop('invoice_id')), []).append(AdditionalChargeResponse(**charge_data))
+
+    invoices = []
+    for row in invoice_rows:
+        invoice_data = dict(row)
+        invoice_id = str(invoice_data['id'])
+        invoice_data['items'] = items_by_invoice.get(invoice_id, [])
+        invoice_data['additional_charges'] = charges_by_invoice.get(invoice_id, [])
+        # Validated on purpose: NUMERIC columns arrive as Decimal and callers
+        # such as the PDF payload (.dict()) rely on them being floats. The item
+        # and charge models above are reused, not validated again.
+        invoices.append(InvoiceResponse(**invoice_data))
+
+    return invoices
+
 def get_invoice_items_with_products(invoice_id: str) -> List[InvoiceItemWithProduct]:
-    query = """
-        SELECT
-            ii.*,
-            p.name as product_name
-        FROM invoice_items ii
-        LEFT JOIN products p ON ii.product_id = p.id
-        WHERE ii.invoice_id = %s
-        ORDER BY ii.id
-    """
-    result = db.fetch_all(query, (invoice_id,))
-
-    # Process each item to calculate missing values
-    items = []
-    for row in result:
-        # Convert to dict for manipulation
-        item_data = dict(row)
-
-        # Calculate missing values if they're None
-        quantity = float(item_data.get('quantity', 0))
-        unit_price = float(item_data.get('unit_price', 0))
-        discount_percentage = float(item_data.get('discount_percentage', 0))
-        discount_amount = float(item_data.get('discount_amount', 0))
-        tax_rate = float(item_data.get('tax_rate', 0))
-
-        # Calculate taxable amount if missing
-        if item_data.get('taxable_amount') is None:
-            # Taxable amount = (quantity * unit_price) - discount_amount - (quantity * unit_price * discount_percentage / 100)
-            gross_amount = quantity * unit_price
-            percentage_discount = gross_amount * (discount_percentage / 100)
-            item_data['taxable_amount'] = gross_amount - discount_amount - percentage_discount
-
-        # Calculate tax amount if missing
-        if item_data.get('tax_amount') is None:
-            taxable_amount = float(item_data.get('taxable_amount', 0))
-            item_data['tax_amount'] = taxable_amount * (tax_rate / 100)
-
-        # Calculate line total if missing
-        if item_data.get('line_total') is None:
-            taxable_amount = float(item_data.get('taxable_amount', 0))
-            tax_amount = float(item_data.get('tax_amount', 0))
-            item_data['line_total'] = taxable_amount + tax_amount
-
-        items.append(InvoiceItemWithProduct(**item_data))
-
-    return items
+    result = db.fetch_all(INVOICE_ITEMS_QUERY, (invoice_id,))
+    return [InvoiceItemWithProduct(**_with_calculated_amounts(dict(row))) for row in result]
+
+def _with_calculated_amounts(item_data: dict) -> dict:
+    """Fill in taxable/tax/line amounts for item rows stored without them"""
+    # Calculate missing values if they're None
+    quantity = float(item_data.get('quantity', 0))
+    unit_price = float(item_data.get('unit_price', 0))
+    discount_percentage = float(item_data.get('discount_percentage', 0))
+    discount_amount = float(item_data.get('discount_amount', 0))
+    tax_rate = float(item_data.get('tax_rate', 0))
+
+    # Calculate taxable amount if missing
+    if item_data.get('taxable_amount') is None:
+        # Taxable amount = (quantity * unit_price) - discount_amount - (quantity * unit_price * discount_percentage / 100)
+        gross_amount = quantity * unit_price
+        percentage_discount = gross_amount * (discount_percentage / 100)
+        item_data['taxable_amount'] = gross_amount - discount_amount - percentage_discount
+
+    # Calculate tax amount if missing
+    if item_data.get('tax_amount') is None:
+        taxable_amount = float(item_data.get('taxable_amount', 0))
+        item_data['tax_amount'] = taxable_amount * (tax_rate / 100)
+
+    # Calculate line total if missing
+    if item_data.get('line_total') is None:
+        taxable_amount = float(item_data.get('taxable_amount', 0))
+        tax_amount = float(item_data.get('tax_amount', 0))
+        item_data['line_total'] = taxable_amount + tax_amount
+
+    return item_data
+
+CUSTOMER_BILLING_ADDRESS_QUERY = "SELECT billing_address FROM customers WHERE id = %s"
+
+INSERT_INVOICE_QUERY = """
+    INSERT INTO invoices (
+        id, customer_id, due_date, status, subtotal, tax_amount, total_amount,
+        shipping_details, notes, terms, invoice_type, is_template
+    )
+    VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
+"""
+
+PRODUCT_DEFAULTS_QUERY = "SELECT name, price, tax_rate FROM products WHERE id = %s"
+
+INSERT_INVOICE_ITEM_QUERY = """
+    INSERT INTO invoice_items (
+        id, invoice_id, product_id, description, quantity, unit_price, tax_rate,
+        discount_percentage, discount_amount, taxable_amount, tax_amount, line_total
+    )
+    VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
+"""
+
+INSERT_ADDITIONAL_CHARGE_QUERY = """
+    INSERT INTO additional_charges (
+        invoice_id, charge_name, charge_amount, is_taxable, tax_rate, tax_amount, total_amount
+    )
+    VALUES (%s, %s, %s, %s, %s, %s, %s)
+"""
+
+DELETE_ADDITIONAL_CHARGES_QUERY = "DELETE FROM additional_charges WHERE invoice_id = %s"
 
 def create_invoice(invoice_data: InvoiceCreateRequest) -> InvoiceResponse:
     invoice_id = str(uuid.uuid4())
 
-    # Get customer details for shipping address fallback
-    customer_query = "SELECT billing_address FROM customers WHERE id = %s"
-    customer_result = db.fetch_one(customer_query, (invoice_data.customer_id,))
+    # Header, items and charges commit together; the invoice_items triggers
+    # (invoice_totals_trigger.sql) fill in the header totals
+    with db.transaction():
+        # Get customer details for shipping address fallback
+        customer_result = db.fetch_one(CUSTOMER_BILLING_ADDRESS_QUERY, (invoice_data.customer_id,))
+
+        # 1) Insert invoice header first (avoid FK violation on items)
+        db.execute(INSERT_INVOICE_QUERY, _invoice_insert_params(invoice_id, invoice_data, customer_result))
+
+        # 2) Create invoice items and charges
+        for item in invoice_data.items:
+            create_invoice_item(invoice_id, item)
+        for charge in invoice_data.additional_charges or []:
+            db.execute(INSERT_ADDITIONAL_CHARGE_QUERY, _additional_charge_params(invoice_id, charge))
+    invalidate_dashboard_stats()
+
+    return get_invoice_by_id(invoice_id)
 
+def _invoice_insert_params(invoice_id: str, invoice_data: InvoiceCreateRequest, customer_result, totals=(0, 0, 0)) -> tuple:
     shipping_address = invoice_data.shipping_address
     if not shipping_address and customer_result:
         shipping_address = customer_result['billing_address']
 
     # Convert dict to JSON string for database storage
     if isinstance(shipping_address, dict):
-        import json
         shipping_address = json.dumps(shipping_address)
 
-    # 1) Insert invoice header first (avoid FK violation on items)
-    invoice_query = """
-        INSERT INTO invoices (
-            id, customer_id, due_date, status, subtotal, tax_amount, total_amount,
-            shipping_details, notes, terms, invoice_type, is_template
-        )
-        VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
-    """
-    db.execute(invoice_query, (
+    return (
         invoice_id,
         invoice_data.customer_id,
         invoice_data.due_date or (date.today() + timedelta(days=15)),
         invoice_data.status,
-        0,  # provisional subtotal
-        0,  # provisional tax
-        0,  # provisional total
+        *totals,  # subtotal, tax, total (provisional zeros unless known up front)
         shipping_address,
         invoice_data.notes,
         invoice_data.terms,
         invoice_data.invoice_type,
         invoice_data.is_template
-    ))
-
-    # 2) Create invoice items and compute totals
-    subtotal = 0
-    tax_amount = 0
-    for item in invoice_data.items:
-        create_invoice_item(invoice_id, item)
-
-    items = get_invoice_items_with_products(invoice_id)
-    subtotal = sum(float(item.taxable_amount or 0) for item in items)
-    tax_amount = sum(float(item.tax_amount or 0) for item in items)
-    total_amount = subtotal + tax_amount
-
-    # 3) Update totals on header
-    db.execute(
-        "UPDATE invoices SET subtotal=%s, tax_amount=%s, total_amount=%s WHERE id=%s",
-        (subtotal, tax_amount, total_amount, invoice_id)
     )
 
-    return get_invoice_by_id(invoice_id)
+def _additional_charge_params(invoice_id: str, charge) -> tuple:
+    tax_amount = charge.charge_amount * (charge.tax_rate / 100) if charge.is_taxable else 0
+    return (
+        invoice_id,
+        charge.charge_name,
+        charge.charge_amount,
+        charge.is_taxable,
+        charge.tax_rate,
+        tax_amount,
+        charge.charge_amount + tax_amount
+    )
 
 def create_invoice_item(invoice_id: str, item_data):
     # Get product details if not provided
-    product_query = "SELECT name, price, tax_rate FROM products WHERE id = %s"
-    product_result = db.fetch_one(product_query, (item_data.product_id,))
+    product_result = db.fetch_one(PRODUCT_DEFAULTS_QUERY, (item_data.product_id,))
+    db.execute(INSERT_INVOICE_ITEM_QUERY, _invoice_item_insert_params(invoice_id, item_data, product_result))
 
+def _invoice_item_insert_params(invoice_id: str, item_data, product_result) -> tuple:
     unit_price = item_data.unit_price
     tax_rate = item_data.tax_rate
     description = item_data.description
@@ -171,6 +235,10 @@ def create_invoice_item(invoice_id: str, item_data):
         tax_rate = tax_rate or product_result['tax_rate']
         description = description or product_result['name']
 
+    # Product prices come back as Decimal; keep the arithmetic in float
+    unit_price = float(unit_price or 0)
+    tax_rate = float(tax_rate or 0)
+
     # Calculate amounts
     quantity = float(item_data.quantity)
     discount = float(getattr(item_data, 'discount', 0))
@@ -187,15 +255,7 @@ def create_invoice_item(invoice_id: str, item_data):
     # Calculate line total
     line_total = taxable_amount + tax_amount
 
-    item_query = """
-        INSERT INTO invoice_items (
-            id, invoice_id, product_id, description, quantity, unit_price, tax_rate,
-            discount_percentage, discount_amount, taxable_amount, tax_amount, line_total
-        )
-        VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
-    """
-
-    db.execute(item_query, (
+    return (
         str(uuid.uuid4()),
         invoice_id,
         item_data.product_id,
@@ -208,49 +268,257 @@ def create_invoice_item(invoice_id: str, item_data):
         taxable_amount,
         tax_amount,
         line_total
-    ))
+    )
+
+def create_invoices_bulk(invoices: List[InvoiceCreateRequest]) -> InvoiceBulkCreateResponse:
+    """Create many invoices in one transaction with batched lookups and multi-row inserts.
+
+    Customers and products referenced by the whole batch are loaded with one
+    query each. Invoices that reference unknown customers or products are
+    reported as failed and skipped; the rest are inserted together and
+    committed once.
+    """
+    results = [None] * len(invoices)
+
+    # Rows come back with lowercase ids; key the lookups the same way
+    customer_ids = {_normalize_uuid(inv.customer_id) for inv in invoices} - {None}
+    product_ids = {_normalize_uuid(item.product_id) for inv in invoices for item in inv.items if item.product_id} - {None}
+
+    customers = {}
+    if customer_ids:
+        rows = db.fetch_all("SELECT id, billing_address FROM customers WHERE id = ANY(%s::uuid[])", (list(customer_ids),))
+        customers = {str(row['id']): row for row in rows}
+
+    products = {}
+    if product_ids:
+        rows = db.fetch_all("SELECT id, name, price, tax_rate FROM products WHERE id = ANY(%s::uuid[])", (list(product_ids),))
+        products = {str(row['id']): row for row in rows}
+
+    header_rows = []
+    item_rows = []
+    pending = {}  # invoice id -> (request index, total_amount)
+    for index, invoice_data in enumerate(invoices):
+        customer = customers.get(_normalize_uuid(invoice_data.customer_id))
+        if not customer:
+            results[index] = InvoiceBulkResult(index=index, status='failed', error=f"Customer not found: {invoice_data.customer_id}")
+            continue
+        missing = [
+            item.product_id for item in invoice_data.items
+            if item.product_id and _normalize_uuid(item.product_id) not in products
+        ]
+        if missing:
+            results[index] = InvoiceBulkResult(index=index, status='failed', error=f"Product not found: {missing[0]}")
+            continue
+
+        invoice_id = str(uuid.uuid4())
+        items = [
+            _invoice_item_insert_params(invoice_id, item, products.get(_normalize_uuid(item.product_id)))
+            for item in invoice_data.items
+        ]
+        # Item tuples end with (taxable_amount, tax_amount, line_total). The header
+        # starts with their sums for the result; the items trigger has the final say
+        subtotal = sum(item[9] for item in items)
+        tax_amount = sum(item[10] for item in items)
+        total_amount = subtotal + tax_amount
+
+        header_rows.append(_invoice_insert_params(invoice_id, invoice_data, customer, (subtotal, tax_amount, total_amount)))
+        item_rows.extend(items)
+        pending[invoice_id] = (index, total_amount)
+
+    if header_rows:
+        invoice_numbers = _insert_invoices_batch(header_rows, item_rows)
+        invalidate_dashboard_stats()
+        for invoice_id, (index, total_amount) in pending.items():
+            results[index] = InvoiceBulkResult(
+                index=index,
+                status='created',
+                id=invoice_id,
+                invoice_number=invoice_numbers.get(invoice_id),
+                total_amount=total_amount
+            )
+
+    created = len(pending)
+    return InvoiceBulkCreateResponse(created=created, failed=len(invoices) - created, results=results)
+
+def _insert_invoices_batch(header_rows: list, item_rows: list) -> dict:
+    """Insert invoice headers and items with multi-row statements in a single transaction"""
+    header_query = INSERT_INVOICE_QUERY.split("VALUES")[0] + "VALUES %s RETURNING id, invoice_number"
+    item_query = INSERT_INVOICE_ITEM_QUERY.split("VALUES")[0] + "VALUES %s"
+
+    with db.transaction() as conn:
+        with conn.cursor(cursor_factory=RecordingCursor) as cursor:
+            returned = execute_values(cursor, header_query, header_rows, page_size=500, fetch=True)
+            if item_rows:
+                execute_values(cursor, item_query, item_rows, page_size=1000)
+
+    return {str(row[0]): row[1] for row in returned}
+
+def _is_uuid(value: str) -> bool:
+    try:
+        uuid.UUID(str(value))
+        return True
+    except ValueError:
+        return False
+
+def _normalize_uuid(value) -> Optional[str]:
+    """Canonical lowercase form of a UUID string, or None if it is not one"""
+    try:
+        return str(uuid.UUID(str(value)))
+    except ValueError:
+        return None
 
 def update_invoice(invoice_id: str, invoice_data: InvoiceUpdateRequest) -> Optional[InvoiceResponse]:
-    # Check if invoice exists
-    existing_invoice = get_invoice_by_id(invoice_id)
-    if not existing_invoice:
+    if not _apply_invoice_update(invoice_id, invoice_data):
         return None
-    
-    # Update invoice fields
+
+    pdf_cache.invalidate(invoice_id)
+    invalidate_dashboard_stats()
+
+    # Return updated invoice
+    return get_invoice_by_id(invoice_id)
+
+LOCK_INVOICE_QUERY = "SELECT id FROM invoices WHERE id = %s FOR UPDATE"
+
+EXISTING_ITEMS_QUERY = """
+    SELECT id, product_id, description, quantity, unit_price, tax_rate,
+           discount_percentage, discount_amount, taxable_amount, tax_amount, line_total
+    FROM invoice_items
+    WHERE invoice_id = %s
+"""
+
+UPDATE_INVOICE_ITEM_QUERY = """
+    UPDATE invoice_items
+    SET product_id = %s, description = %s, quantity = %s, unit_price = %s, tax_rate = %s,
+        discount_percentage = %s, discount_amount = %s, taxable_amount = %s, tax_amount = %s, line_total = %s
+    WHERE id = %s AND invoice_id = %s
+"""
+
+DELETE_INVOICE_ITEMS_QUERY = "DELETE FROM invoice_items WHERE invoice_id = %s AND id = ANY(%s::uuid[])"
+
+# Columns compared to decide whether a line changed, in insert-params order after (id, invoice_id)
+_ITEM_COLUMNS = (
+    'product_id', 'description', 'quantity', 'unit_price', 'tax_rate',
+    'discount_percentage', 'discount_amount', 'taxable_amount', 'tax_amount', 'line_total'
+)
+
+def _apply_invoice_update(invoice_id: str, invoice_data: InvoiceUpdateRequest) -> bool:
+    """Update the header and diff the items against the stored ones in one transaction.
+
+    Items carrying an ``id`` update that line when something changed, items
+    without one are inserted, and stored lines missing from the request are
+    deleted. Each kind of change is a single batched statement; the
+    statement-level triggers on invoice_items then recompute the totals. A given ``additional_charges`` list replaces the stored
+    charges. Returns False if the invoice does not exist.
+    """
+    if not _is_uuid(invoice_id):
+        return False
+    update_fields, params = _invoice_update_clause(invoice_id, invoice_data)
+
+    with db.transaction() as conn:
+        with conn.cursor(cursor_factory=RecordingDictCursor) as cursor:
+            cursor.execute(LOCK_INVOICE_QUERY, (invoice_id,))
+            if cursor.fetchone() is None:
+                return False
+            if update_fields:
+                cursor.execute(f"UPDATE invoices SET {', '.join(update_fields)} WHERE id = %(id)s", params)
+            if invoice_data.items is not None:
+                _diff_invoice_items(cursor, invoice_id, invoice_data.items)
+            if invoice_data.additional_charges is not None:
+                _replace_additional_charges(cursor, invoice_id, invoice_data.additional_charges)
+
+    return True
+
+def _diff_invoice_items(cursor, invoice_id: str, items) -> None:
+    cursor.execute(EXISTING_ITEMS_QUERY, (invoice_id,))
+    existing = {str(row['id']): row for row in cursor.fetchall()}
+
+    # Stored ids come back lowercase; compare against the canonical form of what was sent
+    ids = [_normalize_uuid(item.id) or item.id for item in items if item.id]
+    unknown = [item_id for item_id in ids if item_id not in existing]
+    if unknown:
+        raise ValueError(f"Invoice item {unknown[0]} does not belong to invoice {invoice_id}")
+    if len(set(ids)) != len(ids):
+        raise ValueError("Each invoice item id may appear only once")
+
+    # Product defaults only fill in missing prices, rates and descriptions
+    product_ids = list({
+        _normalize_uuid(item.product_id) for item in items
+        if item.product_id and _is_uuid(item.product_id) and not (item.unit_price and item.tax_rate and item.description)
+    })
+    products = {}
+    if product_ids:
+        cursor.execute("SELECT id, name, price, tax_rate FROM products WHERE id = ANY(%s::uuid[])", (product_ids,))
+        products = {str(row['id']): row for row in cursor.fetchall()}
+
+    inserts, updates = [], []
+    kept = set()
+    for item in items:
+        row = _invoice_item_insert_params(invoice_id, item, products.get(_normalize_uuid(item.product_id)))
+        if item.id:
+            item_id = _normalize_uuid(item.id)
+            kept.add(item_id)
+            row = (item_id,) + row[1:]
+            if _item_changed(existing[item_id], row):
+                updates.append(row[2:] + (item_id, invoice_id))
+        else:
+            inserts.append(row)
+
+    removed = [item_id for item_id in existing if item_id not in kept]
+    if removed:
+        cursor.execute(DELETE_INVOICE_ITEMS_QUERY, (invoice_id, removed))
+    if updates:
+        execute_batch(cursor, UPDATE_INVOICE_ITEM_QUERY, updates, page_size=500)
+    if inserts:
+        execute_values(cursor, INSERT_INVOICE_ITEM_QUERY.split("VALUES")[0] + "VALUES %s", inserts, page_size=1000)
+
+def _replace_additional_charges(cursor, invoice_id: str, charges) -> None:
+    cursor.execute(DELETE_ADDITIONAL_CHARGES_QUERY, (invoice_id,))
+    if charges:
+        execute_values(
+            cursor,
+            INSERT_ADDITIONAL_CHARGE_QUERY.split("VALUES")[0] + "VALUES %s",
+            [_additional_charge_params(invoice_id, charge) for charge in charges]
+        )
+
+def _item_changed(stored: dict, row: tuple) -> bool:
+    for column, value in zip(_ITEM_COLUMNS, row[2:]):
+        current = stored[column]
+        if isinstance(value, float):
+            # NUMERIC(_,2) columns: compare at the stored precision
+            if current is None or round(float(current), 2) != round(value, 2):
+                return True
+        elif column == 'product_id':
+            if (str(current) if current is not None else None) != (_normalize_uuid(value) or value):
+                return True
+        elif (str(current) if current is not None else None) != value:
+            return True
+    return False
+
+def _invoice_update_clause(invoice_id: str, invoice_data: InvoiceUpdateRequest):
     update_fields = []
     params = {'id': invoice_id}
     
     for field, value in invoice_data.dict(exclude_unset=True).items():
-        if field == 'items':
-            continue  # Handle items separately
+        if field in ('items', 'additional_charges'):
+            continue  # Handle items and charges separately
         if field == 'shipping_address':
             update_fields.append("shipping_details = %(shipping_details)s")
             # Convert dict to JSON string for database storage
             if isinstance(value, dict):
-                import json
                 params['shipping_details'] = json.dumps(value)
             else:
                 params['shipping_details'] = value
         else:
             update_fields.append(f"{field} = %({field})s")
             params[field] = value
-    
-    if update_fields:
-        query = f"UPDATE invoices SET {', '.join(update_fields)} WHERE id = %(id)s"
-        db.execute(query, params)
-    
-    # Update invoice items if provided
-    if invoice_data.items is not None:
-        # Delete existing items
-        from services.invoice_item_service import delete_invoice_items_by_invoice_id
-        delete_invoice_items_by_invoice_id(invoice_id)
-        
-        # Create new items
-        for item in invoice_data.items:
-            create_invoice_item(invoice_id, item)
-    
-    # Return updated invoice
-    return get_invoice_by_id(invoice_id)
+
+    return update_fields, params
+
+CANCEL_INVOICE_QUERY = """
+    UPDATE invoices 
+    SET status = 'cancelled', cancel_reason = %s 
+    WHERE id = %s
+"""
 
 def cancel_invoice(invoice_id: str, reason: str = None) -> Optional[InvoiceResponse]:
     """Cancel an invoice - this is the soft delete equivalent"""
@@ -259,15 +527,92 @@ def cancel_invoice(invoice_id: str, reason: str = None) -> Optional[InvoiceRespo
         return None
     
     # Update invoice status to cancelled with reason
-    query = """
-        UPDATE invoices 
-        SET status = 'cancelled', cancel_reason = %s 
-        WHERE id = %s
-    """
-    db.execute(query, (reason or 'No reason provided', invoice_id))
+    db.execute(CANCEL_INVOICE_QUERY, (reason or 'No reason provided', invoice_id))
+    pdf_cache.invalidate(invoice_id)
+    invalidate_dashboard_stats()
     
     return get_invoice_by_id(invoice_id)
 
+# Bump when the PDF layout changes so previously cached renders are not reused
+PDF_TEMPLATE_VERSION = "1"
+
+# Hashes every row the PDF is rendered from, in a single round trip
+PDF_FINGERPRINT_SELECT = """
+    SELECT
+        i.id,
+        i.invoice_number,
+        md5(concat_ws('|',
+            i::text,
+            c::text,
+            (SELECT string_agg(ii::text || '/' || COALESCE(p.name, ''), ',' ORDER BY ii.id)
+               FROM invoice_items ii
+               LEFT JOIN products p ON ii.product_id = p.id
+              WHERE ii.invoice_id = i.id),
+            (SELECT string_agg(ac::text, ',' ORDER BY ac.id)
+               FROM additional_charges ac
+              WHERE ac.invoice_id = i.id),
+            (SELECT string_agg(cs::text, ',' ORDER BY cs.id) FROM company_settings cs)
+        )) AS fingerprint
+    FROM invoices i
+    LEFT JOIN customers c ON i.customer_id = c.id
+"""
+
+PDF_FINGERPRINT_QUERY = PDF_FINGERPRINT_SELECT + " WHERE i.id = %s"
+
+def _pdf_fingerprint(row) -> Optional[str]:
+    return f"v{PDF_TEMPLATE_VERSION}-{row['fingerprint']}" if row else None
+
+def get_invoice_pdf_fingerprint(invoice_id: str) -> Optional[str]:
+    """Content fingerprint of an invoice's PDF, or None if the invoice does not exist"""
+    if not _is_uuid(invoice_id):
+        return None
+    return _pdf_fingerprint(db.fetch_one(PDF_FINGERPRINT_QUERY, (invoice_id,)))
+
+# Hash of everything GET /invoices/{id} returns, used as its ETag. The
+# invoices table has no updated_at, so the rows themselves are hashed.
+INVOICE_VERSION_QUERY = """
+    SELECT md5(concat_ws('|',
+        i::text,
+        c.name,
+        (SELECT string_agg(ii::text || '/' || COALESCE(p.name, ''), ',' ORDER BY ii.id)
+           FROM invoice_items ii
+           LEFT JOIN products p ON ii.product_id = p.id
+          WHERE ii.invoice_id = i.id),
+        (SELECT string_agg(ac::text, ',' ORDER BY ac.id)
+           FROM additional_charges ac
+          WHERE ac.invoice_id = i.id)
+    )) AS version
+    FROM invoices i
+    LEFT JOIN customers c ON i.customer_id = c.id
+    WHERE i.id = %s
+"""
+
+def get_invoice_version(invoice_id: str) -> Optional[str]:
+    """Version of the invoice's JSON representation, or None if the invoice does not exist"""
+    if not _is_uuid(invoice_id):
+        return None
+    result = db.fetch_one(INVOICE_VERSION_QUERY, (invoice_id,))
+    return result['version'] if result else None
+
+def build_invoice_pdf_payload(invoice_id: str) -> Optional[dict]:
+    """Load everything the PDF shows into plain dicts that can be sent to a render worker"""
+    from services.company_service import get_company_settings
+    from services.customer_service import get_customer_by_id
+
+    invoice = get_invoice_by_id(invoice_id)
+    if not invoice:
+        return None
+
+    company = get_company_settings()
+    customer = get_customer_by_id(invoice.customer_id)
+    return _pdf_payload(invoice, company, customer)
+
+def _pdf_payload(invoice, company, customer) -> dict:
+    return {
+        "invoice": invoice.dict(),
+        "company": company.dict() if company else None,
+        "customer": customer.dict() if customer else None,
+    }
 
 def generate_invoice_pdf(invoice_id: str) -> bytes:
     """Generate PDF using RUBY ENTERPRISE format"""
@@ -281,192 +626,8 @@ def generate_invoice_pdf(invoice_id: str) -> bytes:
 
 def generate_invoice_pdf_original(invoice_id: str) -> bytes:
     """Generate PDF for an invoice"""
-    try:
-        # Get invoice data
-        invoice = get_invoice_by_id(invoice_id)
-        if not invoice:
-            return None
-
-        # Create PDF buffer
-        buffer = io.BytesIO()
-
-        # Create PDF document
-        doc = SimpleDocTemplate(
-            buffer,
-            pagesize=A4,
-            rightMargin=72,
-            leftMargin=72,
-            topMargin=72,
-            bottomMargin=18
-        )
-
-        # Get styles
-        styles = getSampleStyleSheet()
-
-        # Custom styles
-        title_style = ParagraphStyle(
-            'CustomTitle',
-            parent=styles['Heading1'],
-            fontSize=24,
-            spaceAfter=30,
-            alignment=TA_CENTER,
-            textColor=colors.HexColor('#1f2937')
-        )
-
-        header_style = ParagraphStyle(
-            'CustomHeader',
-            parent=styles['Heading2'],
-            fontSize=14,
-            spaceAfter=12,
-            textColor=colors.HexColor('#374151')
-        )
-
-        normal_style = ParagraphStyle(
-            'CustomNormal',
-            parent=styles['Normal'],
-            fontSize=10,
-            spaceAfter=6
-        )
-
-        # Build PDF content
-        story = []
-
-        # Title
-        story.append(Paragraph("INVOICE", title_style))
-        story.append(Spacer(1, 20))
-
-        # Invoice header info
-        header_data = [
-            ['Invoice #:', invoice.invoice_number or 'N/A'],
-            ['Date:', invoice.date.strftime('%Y-%m-%d') if invoice.date else 'N/A'],
-            ['Due Date:', invoice.due_date.strftime('%Y-%m-%d') if invoice.due_date else 'N/A'],
-            ['Status:', (invoice.status or 'draft').upper()]
-        ]
-
-        header_table = Table(header_data, colWidths=[2*inch, 3*inch])
-        header_table.setStyle(TableStyle([
-            ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
-            ('FONTNAME', (0, 0), (0, -1), 'Helvetica-Bold'),
-            ('FONTSIZE', (0, 0), (-1, -1), 10),
-            ('BOTTOMPADDING', (0, 0), (-1, -1), 6),
-        ]))
-
-        story.append(header_table)
-        story.append(Spacer(1, 30))
-
-        # Customer information
-        story.append(Paragraph("BILL TO:", header_style))
-
-        customer_info = []
-        if hasattr(invoice, 'customer_name') and invoice.customer_name:
-            customer_info.append(invoice.customer_name)
-
-        # Add customer details if available
-        if customer_info:
-            for info in customer_info:
-                story.append(Paragraph(info, normal_style))
-        else:
-            story.append(Paragraph("Customer information not available", normal_style))
-
-        story.append(Spacer(1, 30))
-
-        # Invoice items
-        story.append(Paragraph("ITEMS:", header_style))
-
-        # Items table header
-        items_data = [['Description', 'Qty', 'Rate', 'Discount', 'Tax', 'Amount']]
-
-        # Add items
-        total_amount = 0
-        if invoice.items:
-            for item in invoice.items:
-                quantity = float(item.quantity) if item.quantity else 0
-                unit_price = float(item.unit_price) if item.unit_price else 0
-                discount = float(item.discount) if item.discount else 0
-                tax_rate = float(item.tax_rate) if item.tax_rate else 0
-
-                # Calculate line total
-                line_total = quantity * unit_price * (1 - discount / 100)
-                line_tax = line_total * (tax_rate / 100)
-                total_with_tax = line_total + line_tax
-                total_amount += total_with_tax
-
-                items_data.append([
-                    item.product_name or item.description or 'N/A',
-                    str(quantity),
-                    f"₹{unit_price:.2f}",
-                    f"{discount}%",
-                    f"{tax_rate}%",
-                    f"₹{total_with_tax:.2f}"
-                ])
-
-        # Create items table
-        items_table = Table(items_data, colWidths=[3*inch, 0.8*inch, 1*inch, 0.8*inch, 0.8*inch, 1.2*inch])
-        items_table.setStyle(TableStyle([
-            # Header row
-            ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#f3f4f6')),
-            ('TEXTCOLOR', (0, 0), (-1, 0), colors.HexColor('#374151')),
-            ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-            ('ALIGN', (0, 1), (0, -1), 'LEFT'),  # Description left aligned
-            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-            ('FONTSIZE', (0, 0), (-1, -1), 9),
-            ('BOTTOMPADDING', (0, 0), (-1, -1), 8),
-            ('TOPPADDING', (0, 0), (-1, -1), 8),
-
-            # Grid
-            ('GRID', (0, 0), (-1, -1), 1, colors.HexColor('#e5e7eb')),
-
-            # Alternating row colors
-            ('ROWBACKGROUNDS', (0, 1), (-1, -1), [colors.white, colors.HexColor('#f9fafb')]),
-        ]))
-
-        story.append(items_table)
-        story.append(Spacer(1, 30))
-
-        # Totals section
-        totals_data = [
-            ['Subtotal:', f"₹{invoice.subtotal:.2f}" if invoice.subtotal else "₹0.00"],
-            ['Tax:', f"₹{invoice.tax_amount:.2f}" if invoice.tax_amount else "₹0.00"],
-            ['Total:', f"₹{invoice.total_amount:.2f}" if invoice.total_amount else "₹0.00"]
-        ]
-
-        if invoice.amount_paid and invoice.amount_paid > 0:
-            totals_data.append(['Paid:', f"₹{invoice.amount_paid:.2f}"])
-            balance_due = (invoice.total_amount or 0) - (invoice.amount_paid or 0)
-            totals_data.append(['Balance Due:', f"₹{balance_due:.2f}"])
-
-        totals_table = Table(totals_data, colWidths=[4*inch, 2*inch])
-        totals_table.setStyle(TableStyle([
-            ('ALIGN', (0, 0), (-1, -1), 'RIGHT'),
-            ('FONTNAME', (0, -1), (-1, -1), 'Helvetica-Bold'),  # Bold total row
-            ('FONTSIZE', (0, 0), (-1, -1), 10),
-            ('BOTTOMPADDING', (0, 0), (-1, -1), 6),
-            ('LINEABOVE', (0, -1), (-1, -1), 1, colors.black),  # Line above total
-        ]))
-
-        story.append(totals_table)
-        story.append(Spacer(1, 30))
-
-        # Notes and terms
-        if invoice.notes or invoice.terms:
-            if invoice.notes:
-                story.append(Paragraph("Notes:", header_style))
-                story.append(Paragraph(invoice.notes, normal_style))
-                story.append(Spacer(1, 15))
-
-            if invoice.terms:
-                story.append(Paragraph("Terms & Conditions:", header_style))
-                story.append(Paragraph(invoice.terms, normal_style))
-
-        # Build PDF
-        doc.build(story)
-
-        # Get PDF content
-        pdf_content = buffer.getvalue()
-        buffer.close()
-
-        return pdf_content
-
-    except Exception as e:
-        print(f"Error generating PDF: {e}")
+    from services.original_pdf_generator import render_original_invoice_pdf
+    invoice = get_invoice_by_id(invoice_id)
+    if not invoice:
         return None
+    return render_original_invoice_pdf(invoice)
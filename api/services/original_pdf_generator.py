@@ -0,0 +1,230 @@
+"""
+Original (plain) invoice PDF layout, used when the RUBY ENTERPRISE format fails
+"""
+import io
+import threading
+from reportlab.lib.pagesizes import A4
+from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer
+from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+from reportlab.lib.units import inch
+from reportlab.lib import colors
+from reportlab.lib.enums import TA_CENTER
+
+def render_original_invoice_pdf(invoice) -> bytes:
+    """Render the original PDF layout from an already loaded invoice"""
+    try:
+        return get_template().render(invoice)
+    except Exception as e:
+        print(f"Error generating PDF: {e}")
+        return None
+
+_local = threading.local()
+
+def get_template() -> "OriginalTemplate":
+    """Template for this thread, built on first use (see ruby_pdf_generator.get_template)"""
+    template = getattr(_local, "template", None)
+    if template is None:
+        template = _local.template = OriginalTemplate()
+    return template
+
+class OriginalTemplate:
+    """Styles, table styles and fixed headings of the original layout, built once"""
+
+    def __init__(self):
+        # Get styles
+        styles = getSampleStyleSheet()
+
+        # Custom styles
+        self.title_style = ParagraphStyle(
+            'CustomTitle',
+            parent=styles['Heading1'],
+            fontSize=24,
+            spaceAfter=30,
+            alignment=TA_CENTER,
+            textColor=colors.HexColor('#1f2937')
+        )
+
+        self.header_style = ParagraphStyle(
+            'CustomHeader',
+            parent=styles['Heading2'],
+            fontSize=14,
+            spaceAfter=12,
+            textColor=colors.HexColor('#374151')
+        )
+
+        self.normal_style = ParagraphStyle(
+            'CustomNormal',
+            parent=styles['Normal'],
+            fontSize=10,
+            spaceAfter=6
+        )
+
+        self.header_table_style = TableStyle([
+            ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
+            ('FONTNAME', (0, 0), (0, -1), 'Helvetica-Bold'),
+            ('FONTSIZE', (0, 0), (-1, -1), 10),
+            ('BOTTOMPADDING', (0, 0), (-1, -1), 6),
+        ])
+
+        self.items_col_widths = [3*inch, 0.8*inch, 1*inch, 0.8*inch, 0.8*inch, 1.2*inch]
+        self.items_table_style = TableStyle([
+            # Header row
+            ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#f3f4f6')),
+            ('TEXTCOLOR', (0, 0), (-1, 0), colors.HexColor('#374151')),
+            ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+            ('ALIGN', (0, 1), (0, -1), 'LEFT'),  # Description left aligned
+            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+            ('FONTSIZE', (0, 0), (-1, -1), 9),
+            ('BOTTOMPADDING', (0, 0), (-1, -1), 8),
+            ('TOPPADDING', (0, 0), (-1, -1), 8),
+
+            # Grid
+            ('GRID', (0, 0), (-1, -1), 1, colors.HexColor('#e5e7eb')),
+
+            # Alternating row colors
+            ('ROWBACKGROUNDS', (0, 1), (-1, -1), [colors.white, colors.HexColor('#f9fafb')]),
+        ])
+
+        self.totals_table_style = TableStyle([
+            ('ALIGN', (0, 0), (-1, -1), 'RIGHT'),
+            ('FONTNAME', (0, -1), (-1, -1), 'Helvetica-Bold'),  # Bold total row
+            ('FONTSIZE', (0, 0), (-1, -1), 10),
+            ('BOTTOMPADDING', (0, 0), (-1, -1), 6),
+            ('LINEABOVE', (0, -1), (-1, -1), 1, colors.black),  # Line above total
+        ])
+
+        # Fixed headings
+        self.title = Paragraph("INVOICE", self.title_style)
+        self.bill_to_heading = Paragraph("BILL TO:", self.header_style)
+        self.no_customer = Paragraph("Customer information not available", self.normal_style)
+        self.items_heading = Paragraph("ITEMS:", self.header_style)
+        self.notes_heading = Paragraph("Notes:", self.header_style)
+        self.terms_heading = Paragraph("Terms & Conditions:", self.header_style)
+
+    def render(self, invoice) -> bytes:
+        normal_style = self.normal_style
+
+        # Create PDF buffer
+        buffer = io.BytesIO()
+
+        # Create PDF document
+        doc = SimpleDocTemplate(
+            buffer,
+            pagesize=A4,
+            rightMargin=72,
+            leftMargin=72,
+            topMargin=72,
+            bottomMargin=18
+        )
+
+        # Build PDF content
+        story = []
+
+        # Title
+        story.append(self.title)
+        story.append(Spacer(1, 20))
+
+        # Invoice header info
+        header_data = [
+            ['Invoice #:', invoice.invoice_number or 'N/A'],
+            ['Date:', invoice.date.strftime('%Y-%m-%d') if invoice.date else 'N/A'],
+            ['Due Date:', invoice.due_date.strftime('%Y-%m-%d') if invoice.due_date else 'N/A'],
+            ['Status:', (invoice.status or 'draft').upper()]
+        ]
+
+        header_table = Table(header_data, colWidths=[2*inch, 3*inch])
+        header_table.setStyle(self.header_table_style)
+
+        story.append(header_table)
+        story.append(Spacer(1, 30))
+
+        # Customer information
+        story.append(self.bill_to_heading)
+
+        customer_info = []
+        if hasattr(invoice, 'customer_name') and invoice.customer_name:
+            customer_info.append(invoice.customer_name)
+
+        # Add customer details if available
+        if customer_info:
+            for info in customer_info:
+                story.append(Paragraph(info, normal_style))
+        else:
+            story.append(self.no_customer)
+
+        story.append(Spacer(1, 30))
+
+        # Invoice items
+        story.append(self.items_heading)
+
+        # Items table header
+        items_data = [['Description', 'Qty', 'Rate', 'Discount', 'Tax', 'Amount']]
+
+        # Add items
+        total_amount = 0
+        if invoice.items:
+            for item in invoice.items:
+                quantity = float(item.quantity) if item.quantity else 0
+                unit_price = float(item.unit_price) if item.unit_price else 0
+                discount = float(item.discount_percentage) if item.discount_percentage else 0
+                tax_rate = float(item.tax_rate) if item.tax_rate else 0
+
+                # Calculate line total
+                line_total = quantity * unit_price * (1 - discount / 100)
+                line_tax = line_total * (tax_rate / 100)
+                total_with_tax = line_total + line_tax
+                total_amount += total_with_tax
+
+                items_data.append([
+                    item.product_name or item.description or 'N/A',
+                    str(quantity),
+                    f"₹{unit_price:.2f}",
+                    f"{discount}%",
+                    f"{tax_rate}%",
+                    f"₹{total_with_tax:.2f}"
+                ])
+
+        # Create items table
+        items_table = Table(items_data, colWidths=self.items_col_widths)
+        items_table.setStyle(self.items_table_style)
+
+        story.append(items_table)
+        story.append(Spacer(1, 30))
+
+        # Totals section
+        totals_data = [
+            ['Subtotal:', f"₹{invoice.subtotal:.2f}" if invoice.subtotal else "₹0.00"],
+            ['Tax:', f"₹{invoice.tax_amount:.2f}" if invoice.tax_amount else "₹0.00"],
+            ['Total:', f"₹{invoice.total_amount:.2f}" if invoice.total_amount else "₹0.00"]
+        ]
+
+        if invoice.amount_paid and invoice.amount_paid > 0:
+            totals_data.append(['Paid:', f"₹{invoice.amount_paid:.2f}"])
+            balance_due = (invoice.total_amount or 0) - (invoice.amount_paid or 0)
+            totals_data.append(['Balance Due:', f"₹{balance_due:.2f}"])
+
+        totals_table = Table(totals_data, colWidths=[4*inch, 2*inch])
+        totals_table.setStyle(self.totals_table_style)
+
+        story.append(totals_table)
+        story.append(Spacer(1, 30))
+
+        # Notes and terms
+        if invoice.notes or invoice.terms:
+            if invoice.notes:
+                story.append(self.notes_heading)
+                story.append(Paragraph(invoice.notes, normal_style))
+                story.append(Spacer(1, 15))
+
+            if invoice.terms:
+                story.append(self.terms_heading)
+                story.append(Paragraph(invoice.terms, normal_style))
+
+        # Build PDF
+        doc.build(story)
+
+        # Get PDF content
+        pdf_content = buffer.getvalue()
+        buffer.close()
+
+        return pdf_content
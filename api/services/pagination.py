@@ -0,0 +1,90 @@
+"""
+Keyset (cursor) pagination helpers shared by the list endpoints.
+
+A cursor is an opaque base64url token holding the sort value and id of a
+boundary row. Pages are fetched with a row comparison on ``(sort, id)`` so
+every page costs one index range scan no matter how deep the client pages.
+"""
+from datetime import datetime
+import base64
+import json
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+PREV_CURSOR_HEADER = "X-Prev-Cursor"
+
+def encode_cursor(sort_value, row_id) -> str:
+    if isinstance(sort_value, datetime):
+        sort_value = sort_value.isoformat()
+    payload = json.dumps([sort_value, str(row_id)], separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+def decode_cursor(cursor: str, sort_type: str = "text"):
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        sort_value, row_id = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        if sort_type == "timestamptz":
+            sort_value = datetime.fromisoformat(sort_value)
+        return sort_value, str(row_id)
+    except Exception:
+        raise ValueError(f"Invalid pagination cursor: {cursor}")
+
+class Keyset:
+    """Describes how a list is ordered so pages can be cut with a row comparison"""
+
+    def __init__(self, sort_column: str, id_column: str, sort_key: str, descending: bool = False, sort_type: str = "text"):
+        self.sort_column = sort_column
+        self.id_column = id_column
+        self.sort_key = sort_key
+        self.descending = descending
+        self.sort_type = sort_type
+
+    def clause(self, limit: int, after: str = None, before: str = None):
+        """Return (condition, params, order_and_limit) for the requested page.
+
+        ``condition`` is None for the first page. One extra row is fetched so
+        ``page()`` can tell whether another page exists.
+        """
+        if after and before:
+            raise ValueError("Use either 'after' or 'before', not both")
+
+        backwards = before is not None
+        # Walking backwards flips both the comparison and the sort direction
+        descending = self.descending != backwards
+        direction = "DESC" if descending else "ASC"
+        order_and_limit = f" ORDER BY {self.sort_column} {direction}, {self.id_column} {direction} LIMIT %s"
+
+        cursor = before if backwards else after
+        if not cursor:
+            return None, [], order_and_limit
+
+        sort_value, row_id = decode_cursor(cursor, self.sort_type)
+        operator = "<" if descending else ">"
+        condition = f"({self.sort_column}, {self.id_column}) {operator} (%s::{self.sort_type}, %s::uuid)"
+        return condition, [sort_value, row_id], order_and_limit
+
+    def page(self, rows: list, limit: int, after: str = None, before: str = None):
+        """Trim the extra row and compute (rows, next_cursor, prev_cursor)"""
+        has_more = len(rows) > limit
+        rows = rows[:limit]
+
+        if before is not None:
+            rows.reverse()
+            prev_cursor = self._cursor(rows[0]) if has_more and rows else None
+            next_cursor = self._cursor(rows[-1]) if rows else None
+        else:
+            next_cursor = self._cursor(rows[-1]) if has_more and rows else None
+            prev_cursor = self._cursor(rows[0]) if after and rows else None
+
+        return rows, next_cursor, prev_cursor
+
+    def _cursor(self, row) -> str:
+        return encode_cursor(row[self.sort_key], row["id"])
+
+def set_pagination_headers(response, next_cursor: str = None, prev_cursor: str = None):
+    if next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
+    if prev_cursor:
+        response.headers[PREV_CURSOR_HEADER] = prev_cursor
@@ -1,5 +1,6 @@
 from db.database import db
 from models.payment_models import PaymentCreateRequest, PaymentUpdateRequest, PaymentResponse
+from services.dashboard_service import invalidate_dashboard_stats
 from typing import List, Optional
 import uuid
 from datetime import date
@@ -15,62 +16,91 @@ def get_payment_by_id(payment_id: str) -> Optional[PaymentResponse]:
     result = db.fetch_one(query, (payment_id,))
     return PaymentResponse(**result) if result else None
 
+INSERT_PAYMENT_QUERY = """
+    INSERT INTO payments (id, invoice_id, customer_id, amount, date, method, reference, notes, is_refund, is_advance)
+    VALUES (%(id)s, %(invoice_id)s, %(customer_id)s, %(amount)s, %(date)s, %(method)s, %(reference)s, %(notes)s, %(is_refund)s, %(is_advance)s)
+    RETURNING *
+"""
+
+# Copies the original payment in the same statement, so a refund is one round trip
+REFUND_PAYMENT_QUERY = """
+    INSERT INTO payments (id, invoice_id, customer_id, amount, date, method, reference, notes, is_refund, is_advance)
+    SELECT
+        %(id)s, invoice_id, customer_id, amount, %(date)s, method,
+        'REFUND-' || left(id::text, 8),
+        'Refund for payment ' || id::text || '. Reason: ' || %(reason)s,
+        TRUE, FALSE
+    FROM payments
+    WHERE id = %(payment_id)s
+    RETURNING *
+"""
+
 def create_payment(payment_data: PaymentCreateRequest) -> PaymentResponse:
     payment_id = str(uuid.uuid4())
     data = payment_data.dict()
     data['id'] = payment_id
     # Remove auto-generated fields - created_at is handled by DB
     
-    query = """
-        INSERT INTO payments (id, invoice_id, customer_id, amount, date, method, reference, notes, is_refund, is_advance)
-        VALUES (%(id)s, %(invoice_id)s, %(customer_id)s, %(amount)s, %(date)s, %(method)s, %(reference)s, %(notes)s, %(is_refund)s, %(is_advance)s)
-    """
-    db.execute(query, data)
-    return get_payment_by_id(payment_id)
+    rows = db.fetch_returning(INSERT_PAYMENT_QUERY, data)
+    invalidate_dashboard_stats()
+    return PaymentResponse(**rows[0])
 
 def update_payment(payment_id: str, payment_data: PaymentUpdateRequest) -> Optional[PaymentResponse]:
-    # Check if payment exists
-    existing_payment = get_payment_by_id(payment_id)
-    if not existing_payment:
-        return None
-    
     data = payment_data.dict(exclude_unset=True)
     data['id'] = payment_id
     
     # Build dynamic query based on provided fields
     set_clause = ", ".join([f"{key}=%({key})s" for key in data.keys() if key != 'id'])
-    query = f"UPDATE payments SET {set_clause} WHERE id=%(id)s"
+    if not set_clause:
+        return get_payment_by_id(payment_id)
+    # No row back means the payment does not exist
+    query = f"UPDATE payments SET {set_clause} WHERE id=%(id)s RETURNING *"
     
-    db.execute(query, data)
+    rows = db.fetch_returning(query, data)
+    if not rows:
+        return None
+    invalidate_dashboard_stats()
     
     # Return updated payment
-    return get_payment_by_id(payment_id)
+    return PaymentResponse(**rows[0])
 
 def refund_payment(payment_id: str, reason: str = None) -> Optional[PaymentResponse]:
     """Create a refund for a payment - this is the soft delete equivalent"""
-    original_payment = get_payment_by_id(payment_id)
-    if not original_payment:
-        return None
-    
-    # Create refund entry
     refund_data = {
         'id': str(uuid.uuid4()),
-        'invoice_id': original_payment.invoice_id,
-        'customer_id': original_payment.customer_id,
-        'amount': original_payment.amount,  # Same amount as original
+        'payment_id': payment_id,
         'date': date.today(),
-        'method': original_payment.method,
-        'reference': f"REFUND-{original_payment.id[:8]}",
-        'notes': f"Refund for payment {original_payment.id}. Reason: {reason or 'No reason provided'}",
-        'is_refund': True,
-        'is_advance': False
+        'reason': reason or 'No reason provided'
     }
     
-    query = """
-        INSERT INTO payments (id, invoice_id, customer_id, amount, date, method, reference, notes, is_refund, is_advance)
-        VALUES (%(id)s, %(invoice_id)s, %(customer_id)s, %(amount)s, %(date)s, %(method)s, %(reference)s, %(notes)s, %(is_refund)s, %(is_advance)s)
-    """
-    db.execute(query, refund_data)
-    return get_payment_by_id(refund_data['id'])
+    # Nothing is inserted when the original payment does not exist
+    rows = db.fetch_returning(REFUND_PAYMENT_QUERY, refund_data)
+    if not rows:
+        return None
+    invalidate_dashboard_stats()
+    return PaymentResponse(**rows[0])
 
 # Note: No delete function - payments should be handled with refunds using refund_payment() instead
+
+# Invoices whose stored amount_paid disagrees with their payments (refunds count negative)
+AMOUNT_PAID_DRIFT_QUERY = """
+    SELECT i.id, i.invoice_number, i.status, COALESCE(i.amount_paid, 0) AS amount_paid, paid.amount_paid AS expected
+    FROM invoices i
+    JOIN (
+        SELECT i.id, COALESCE(SUM(CASE WHEN p.is_refund THEN -p.amount ELSE p.amount END), 0) AS amount_paid
+        FROM invoices i
+        LEFT JOIN payments p ON p.invoice_id = i.id
+        GROUP BY i.id
+    ) paid ON paid.id = i.id
+    WHERE COALESCE(i.amount_paid, 0) <> paid.amount_paid
+    ORDER BY i.created_at
+"""
+
+def find_amount_paid_drift() -> List[dict]:
+    return db.fetch_all(AMOUNT_PAID_DRIFT_QUERY)
+
+def repair_invoice_payments() -> int:
+    """Rebuild every invoice's amount_paid and status from its payments; returns invoices corrected"""
+    row = db.fetch_one("SELECT public.rebuild_invoice_amount_paid() AS corrected")
+    invalidate_dashboard_stats()
+    return row['corrected']
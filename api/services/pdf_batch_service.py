@@ -0,0 +1,240 @@
+"""
+Batch invoice PDF downloads (ZIP archive or one merged PDF).
+
+The selected invoices are loaded with a handful of batched queries, cached
+renders are reused and the rest are rendered in parallel in the PDF render
+pool. ZIP entries are streamed out as each render completes.
+"""
+from db.async_database import async_db
+from services.invoice_service import PDF_FINGERPRINT_SELECT, INVOICE_SELECT, _pdf_fingerprint, _pdf_payload, _is_uuid
+from services.async_invoice_service import _load_invoices
+from services.company_service import get_company_settings
+from services.pdf_cache import pdf_cache
+from services.pdf_renderer import pdf_renderer, PdfRenderBusy
+from models.customer_models import CustomerResponse
+from starlette.concurrency import run_in_threadpool
+from collections import deque
+from datetime import date
+from typing import AsyncIterator, List, Optional
+import asyncio
+import zipfile
+import uuid
+import io
+import os
+import re
+import logging
+
+logger = logging.getLogger(__name__)
+
+PDF_BATCH_MAX_INVOICES = int(os.getenv("PDF_BATCH_MAX_INVOICES", "500"))
+# How long a batch waits for room in a saturated render queue before giving up with 503
+PDF_BATCH_BUSY_TIMEOUT = float(os.getenv("PDF_BATCH_BUSY_TIMEOUT", "30"))
+
+CUSTOMERS_BATCH_QUERY = "SELECT * FROM customers WHERE id = ANY(%s::uuid[]) AND is_active = TRUE"
+
+class BatchEntry:
+    """One invoice in a batch download"""
+
+    def __init__(self, invoice_id: str, invoice_number: str, fingerprint: str):
+        self.invoice_id = invoice_id
+        self.invoice_number = invoice_number
+        self.fingerprint = fingerprint
+
+    @property
+    def filename(self) -> str:
+        return "invoice-" + re.sub(r"[^A-Za-z0-9_.-]+", "_", self.invoice_number or self.invoice_id) + ".pdf"
+
+async def select_invoices(
+    invoice_ids: Optional[List[str]] = None,
+    date_from: Optional[date] = None,
+    date_to: Optional[date] = None,
+    status: Optional[str] = None
+) -> List[BatchEntry]:
+    """Resolve the batch to invoice ids and PDF fingerprints in one query"""
+    if invoice_ids:
+        invalid = [invoice_id for invoice_id in invoice_ids if not _is_uuid(invoice_id)]
+        if invalid:
+            raise ValueError(f"Invalid invoice IDs: {', '.join(invalid)}")
+        # Keep the requested order and drop duplicates; rows come back with lowercase ids
+        invoice_ids = list(dict.fromkeys(str(uuid.UUID(invoice_id)) for invoice_id in invoice_ids))
+        rows = await async_db.fetch_all(PDF_FINGERPRINT_SELECT + " WHERE i.id = ANY(%s::uuid[])", (invoice_ids,))
+        found = {str(row['id']): row for row in rows}
+        missing = [invoice_id for invoice_id in invoice_ids if invoice_id not in found]
+        if missing:
+            raise LookupError(f"Invoices not found: {', '.join(missing)}")
+        rows = [found[invoice_id] for invoice_id in invoice_ids]
+    else:
+        conditions = []
+        params = []
+        if date_from:
+            conditions.append("i.date >= %s")
+            params.append(date_from)
+        if date_to:
+            conditions.append("i.date <= %s")
+            params.append(date_to)
+        if status:
+            conditions.append("i.status = %s")
+            params.append(status)
+        if not conditions:
+            raise ValueError("Provide invoice_ids or at least one of date_from, date_to, status")
+
+        query = PDF_FINGERPRINT_SELECT + " WHERE " + " AND ".join(conditions)
+        query += " ORDER BY i.date, i.invoice_number LIMIT %s"
+        params.append(PDF_BATCH_MAX_INVOICES + 1)
+        rows = await async_db.fetch_all(query, tuple(params))
+        if len(rows) > PDF_BATCH_MAX_INVOICES:
+            raise ValueError(f"More than {PDF_BATCH_MAX_INVOICES} invoices match; narrow the filter")
+
+    return [BatchEntry(str(row['id']), row['invoice_number'], _pdf_fingerprint(row)) for row in rows]
+
+async def _load_payloads(invoice_ids: List[str]) -> dict:
+    """Load render payloads for many invoices: invoices, items, charges, customers and company in five queries"""
+    invoice_rows = await async_db.fetch_all(INVOICE_SELECT + " WHERE i.id = ANY(%s::uuid[])", (invoice_ids,))
+    invoices = await _load_invoices(invoice_rows)
+
+    customer_ids = list({invoice.customer_id for invoice in invoices})
+    customer_rows = await async_db.fetch_all(CUSTOMERS_BATCH_QUERY, (customer_ids,))
+    customers = {str(row['id']): CustomerResponse(**row) for row in customer_rows}
+    company = await run_in_threadpool(get_company_settings)
+
+    return {
+        invoice.id: _pdf_payload(invoice, company, customers.get(invoice.customer_id))
+        for invoice in invoices
+    }
+
+async def render_batch(entries: List[BatchEntry]) -> AsyncIterator[tuple]:
+    """Yield (entry, pdf_bytes) as renders complete; cached PDFs come first"""
+    misses = deque()
+    for entry in entries:
+        pdf_content = pdf_cache.get(entry.invoice_id, entry.fingerprint)
+        if pdf_content is None:
+            misses.append(entry)
+        else:
+            yield entry, pdf_content
+
+    if not misses:
+        return
+
+    payloads = await _load_payloads([entry.invoice_id for entry in misses])
+    # Leave room in the render queue for single-PDF requests
+    window = max(pdf_renderer.workers, 1)
+    pending = {}
+    busy_since = None
+    try:
+        while misses or pending:
+            while misses and len(pending) < window:
+                entry = misses[0]
+                payload = payloads.get(entry.invoice_id)
+                if payload is None:
+                    # Deleted between selection and loading
+                    misses.popleft()
+                    yield entry, None
+                    continue
+                try:
+                    render = pdf_renderer.submit(payload)
+                except PdfRenderBusy:
+                    if pending:
+                        break
+                    # Nothing of ours in flight; wait a bounded time for other requests' renders to drain
+                    now = asyncio.get_running_loop().time()
+                    if busy_since is None:
+                        busy_since = now
+                    elif now - busy_since >= PDF_BATCH_BUSY_TIMEOUT:
+                        raise
+                    await asyncio.sleep(0.2)
+                    continue
+                busy_since = None
+                misses.popleft()
+                pending[asyncio.wrap_future(render)] = (entry, render)
+
+            if not pending:
+                continue
+
+            done, _ = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for job in done:
+                entry, _ = pending.pop(job)
+                try:
+                    pdf_content = job.result()
+                except Exception as e:
+                    logger.error(f"Batch PDF render failed for invoice {entry.invoice_id}: {e}")
+                    pdf_content = None
+                if pdf_content:
+                    pdf_cache.set(entry.invoice_id, entry.fingerprint, pdf_content)
+                yield entry, pdf_content
+    finally:
+        # Client went away or a render failed; drop our renders still waiting in
+        # the pool (cancelling the renderer's future cancels its executor job)
+        for _, render in pending.values():
+            render.cancel()
+
+class _ZipStream(io.RawIOBase):
+    """Write-only sink that lets zipfile stream into response chunks"""
+
+    def __init__(self):
+        self._chunks = []
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+async def stream_zip(entries: List[BatchEntry]) -> AsyncIterator[bytes]:
+    """Stream a ZIP with one PDF per invoice, adding entries as they finish rendering"""
+    sink = _ZipStream()
+    failed = []
+    # PDFs are already compressed, so entries are stored as-is
+    with zipfile.ZipFile(sink, "w", compression=zipfile.ZIP_STORED) as archive:
+        async for entry, pdf_content in render_batch(entries):
+            if not pdf_content:
+                failed.append(entry)
+                continue
+            archive.writestr(entry.filename, pdf_content)
+            yield sink.drain()
+
+        if failed:
+            archive.writestr("errors.txt", "".join(
+                f"{entry.invoice_number or entry.invoice_id}: PDF generation failed\n" for entry in failed
+            ))
+    yield sink.drain()
+
+async def start_zip_stream(entries: List[BatchEntry]) -> AsyncIterator[bytes]:
+    """Produce the first ZIP chunk before the response starts so early failures become proper errors"""
+    chunks = stream_zip(entries)
+    first = await anext(chunks)
+
+    async def resumed():
+        yield first
+        async for chunk in chunks:
+            yield chunk
+
+    return resumed()
+
+async def merged_pdf(entries: List[BatchEntry]) -> bytes:
+    """Render all invoices in parallel and merge them, in batch order, into one PDF"""
+    try:
+        from pypdf import PdfWriter
+    except ImportError:
+        raise RuntimeError("Merged PDF output requires the 'pypdf' package")
+
+    rendered = {}
+    async for entry, pdf_content in render_batch(entries):
+        if not pdf_content:
+            raise RuntimeError(f"PDF generation failed for invoice {entry.invoice_number or entry.invoice_id}")
+        rendered[entry.invoice_id] = pdf_content
+
+    def merge():
+        writer = PdfWriter()
+        for entry in entries:
+            writer.append(io.BytesIO(rendered[entry.invoice_id]))
+        output = io.BytesIO()
+        writer.write(output)
+        return output.getvalue()
+
+    return await run_in_threadpool(merge)
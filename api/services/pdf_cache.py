@@ -0,0 +1,200 @@
+"""
+Cache for rendered invoice PDFs.
+
+Entries are keyed by invoice id plus a content fingerprint, so any change to
+the invoice, its items, charges, customer or the company settings produces a
+new key and stale PDFs are never served. Backends are pluggable:
+
+- ``memory``: in-process LRU bounded by total bytes
+- ``disk``: one file per entry under a local directory, shared by all workers
+- ``none``: caching disabled
+"""
+from collections import OrderedDict
+from abc import ABC, abstractmethod
+from typing import Optional
+import metrics
+import threading
+import shutil
+import tempfile
+import os
+import re
+import logging
+
+logger = logging.getLogger(__name__)
+
+PDF_CACHE_BACKEND = os.getenv("PDF_CACHE_BACKEND", "memory")
+PDF_CACHE_MAX_BYTES = int(os.getenv("PDF_CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+PDF_CACHE_DIR = os.getenv("PDF_CACHE_DIR", os.path.join(tempfile.gettempdir(), "invoice-pdf-cache"))
+
+_SAFE_KEY_RE = re.compile(r"^[A-Za-z0-9_.-]+$")
+
+class PdfCacheBackend(ABC):
+    """Storage interface for cached PDFs"""
+
+    @abstractmethod
+    def get(self, invoice_id: str, fingerprint: str) -> Optional[bytes]:
+        raise NotImplementedError
+
+    @abstractmethod
+    def set(self, invoice_id: str, fingerprint: str, pdf: bytes) -> None:
+        raise NotImplementedError
+
+    @abstractmethod
+    def invalidate(self, invoice_id: str) -> None:
+        raise NotImplementedError
+
+    @abstractmethod
+    def clear(self) -> None:
+        raise NotImplementedError
+
+class NullPdfCache(PdfCacheBackend):
+    def get(self, invoice_id, fingerprint):
+        return None
+
+    def set(self, invoice_id, fingerprint, pdf):
+        pass
+
+    def invalidate(self, invoice_id):
+        pass
+
+    def clear(self):
+        pass
+
+class MemoryPdfCache(PdfCacheBackend):
+    """Thread-safe LRU cache capped by the total size of stored PDFs"""
+
+    def __init__(self, max_bytes: int = PDF_CACHE_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()  # (invoice_id, fingerprint) -> bytes
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    def get(self, invoice_id, fingerprint):
+        key = (invoice_id, fingerprint)
+        with self._lock:
+            pdf = self._entries.get(key)
+            if pdf is not None:
+                self._entries.move_to_end(key)
+            return pdf
+
+    def set(self, invoice_id, fingerprint, pdf):
+        if len(pdf) > self.max_bytes:
+            return
+        key = (invoice_id, fingerprint)
+        with self._lock:
+            # Older renders of the same invoice can never be served again
+            self._remove_invoice(invoice_id)
+            self._entries[key] = pdf
+            self._bytes += len(pdf)
+            while self._bytes > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self._bytes -= len(evicted)
+
+    def invalidate(self, invoice_id):
+        with self._lock:
+            self._remove_invoice(invoice_id)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def _remove_invoice(self, invoice_id):
+        for key in [key for key in self._entries if key[0] == invoice_id]:
+            self._bytes -= len(self._entries.pop(key))
+
+    @property
+    def size_bytes(self) -> int:
+        return self._bytes
+
+class DiskPdfCache(PdfCacheBackend):
+    """Stores PDFs as ``<directory>/<invoice_id>/<fingerprint>.pdf``"""
+
+    def __init__(self, directory: str = PDF_CACHE_DIR):
+        self.directory = directory
+        os.makedirs(self.directory, exist_ok=True)
+
+    def _invoice_dir(self, invoice_id):
+        if not _SAFE_KEY_RE.match(invoice_id):
+            raise ValueError(f"Invalid invoice ID for PDF cache: {invoice_id}")
+        return os.path.join(self.directory, invoice_id)
+
+    def get(self, invoice_id, fingerprint):
+        try:
+            with open(os.path.join(self._invoice_dir(invoice_id), f"{fingerprint}.pdf"), "rb") as f:
+                return f.read()
+        except (OSError, ValueError):
+            return None
+
+    def set(self, invoice_id, fingerprint, pdf):
+        try:
+            invoice_dir = self._invoice_dir(invoice_id)
+            # Drop older renders of this invoice before writing the new one
+            shutil.rmtree(invoice_dir, ignore_errors=True)
+            os.makedirs(invoice_dir, exist_ok=True)
+            # Write to a temp file and rename so readers never see partial PDFs
+            fd, tmp_path = tempfile.mkstemp(dir=invoice_dir, suffix=".tmp")
+            with os.fdopen(fd, "wb") as f:
+                f.write(pdf)
+            os.replace(tmp_path, os.path.join(invoice_dir, f"{fingerprint}.pdf"))
+        except (OSError, ValueError) as e:
+            logger.warning(f"Could not write PDF cache entry for {invoice_id}: {e}")
+
+    def invalidate(self, invoice_id):
+        try:
+            shutil.rmtree(self._invoice_dir(invoice_id), ignore_errors=True)
+        except ValueError:
+            pass
+
+    def clear(self):
+        shutil.rmtree(self.directory, ignore_errors=True)
+        os.makedirs(self.directory, exist_ok=True)
+
+class PdfCache:
+    """Front for the configured backend that also tracks hit/miss counters"""
+
+    def __init__(self, backend: PdfCacheBackend):
+        self.backend = backend
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    def get(self, invoice_id: str, fingerprint: str) -> Optional[bytes]:
+        pdf = self.backend.get(invoice_id, fingerprint)
+        with self._lock:
+            if pdf is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        metrics.observe_pdf_cache(pdf is not None)
+        return pdf
+
+    def set(self, invoice_id: str, fingerprint: str, pdf: bytes) -> None:
+        self.backend.set(invoice_id, fingerprint, pdf)
+
+    def invalidate(self, invoice_id: str) -> None:
+        self.backend.invalidate(str(invoice_id))
+
+    def clear(self) -> None:
+        self.backend.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "backend": type(self.backend).__name__,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": round(self.hits / total, 4) if total else 0.0,
+            }
+
+def create_backend(name: str = PDF_CACHE_BACKEND) -> PdfCacheBackend:
+    if name == "memory":
+        return MemoryPdfCache()
+    if name == "disk":
+        return DiskPdfCache()
+    if name == "none":
+        return NullPdfCache()
+    raise ValueError(f"Unknown PDF cache backend: {name}")
+
+pdf_cache = PdfCache(create_backend())
@@ -0,0 +1,196 @@
+"""
+Off-event-loop invoice PDF rendering.
+
+ReportLab rendering is CPU-bound pure Python, so renders run in a process
+pool. Workers receive the plain payload built by ``build_invoice_pdf_payload``
+and return PDF bytes; they never touch the database. The number of jobs
+running or waiting is bounded and callers get ``PdfRenderBusy`` once the
+queue is full.
+
+Set ``PDF_RENDER_WORKERS=0`` to render in a thread instead (e.g. on hosts
+without multiprocessing support).
+"""
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, Future
+from concurrent.futures.process import BrokenProcessPool
+from typing import Optional
+import metrics
+import multiprocessing
+import threading
+import asyncio
+import time
+import os
+import logging
+
+logger = logging.getLogger(__name__)
+
+PDF_RENDER_WORKERS = int(os.getenv("PDF_RENDER_WORKERS", str(min(os.cpu_count() or 1, 4))))
+PDF_RENDER_MAX_QUEUED = int(os.getenv("PDF_RENDER_MAX_QUEUED", "16"))
+# spawn keeps workers independent of the server's threads and open DB sockets
+PDF_RENDER_START_METHOD = os.getenv("PDF_RENDER_START_METHOD", "spawn")
+
+class PdfRenderBusy(Exception):
+    """Raised when the render queue is full"""
+    pass
+
+def render_invoice_pdf(payload: dict) -> Optional[bytes]:
+    """Render a PDF from a payload built by ``build_invoice_pdf_payload``"""
+    from models.invoice_models import InvoiceResponse
+    from models.company_models import CompanySettingsResponse
+    from models.customer_models import CustomerResponse
+    from services.ruby_pdf_generator import render_ruby_enterprise_pdf
+    from services.original_pdf_generator import render_original_invoice_pdf
+
+    invoice = InvoiceResponse(**payload["invoice"])
+    company = CompanySettingsResponse(**payload["company"]) if payload.get("company") else None
+    customer = CustomerResponse(**payload["customer"]) if payload.get("customer") else None
+
+    pdf_content = render_ruby_enterprise_pdf(invoice, company, customer)
+    if pdf_content is None:
+        # Fallback to original PDF layout
+        pdf_content = render_original_invoice_pdf(invoice)
+    return pdf_content
+
+def _timed_render(payload: dict):
+    started = time.perf_counter()
+    pdf_content = render_invoice_pdf(payload)
+    return pdf_content, time.perf_counter() - started
+
+class PdfRenderer:
+    """Bounded executor for PDF renders with timing metrics"""
+
+    def __init__(self, workers: int = PDF_RENDER_WORKERS, max_queued: int = PDF_RENDER_MAX_QUEUED,
+                 start_method: str = PDF_RENDER_START_METHOD):
+        self.workers = workers
+        self.max_queued = max_queued
+        self.start_method = start_method
+        self._executor = None
+        self._lock = threading.Lock()
+        self._in_flight = 0
+
+        # Render metrics
+        self._renders = 0
+        self._failures = 0
+        self._rejected = 0
+        self._cancelled = 0
+        self._render_time_total = 0.0
+        self._render_time_max = 0.0
+        self._queue_wait_total = 0.0
+        self._queue_wait_max = 0.0
+
+    @property
+    def capacity(self) -> int:
+        """Jobs that may be running or waiting at once"""
+        return max(self.workers, 1) + self.max_queued
+
+    def _get_executor(self):
+        # Called with self._lock held
+        if self._executor is None:
+            if self.workers > 0:
+                try:
+                    self._executor = ProcessPoolExecutor(
+                        max_workers=self.workers,
+                        mp_context=multiprocessing.get_context(self.start_method)
+                    )
+                    logger.info(f"PDF render pool ready ({self.workers} processes)")
+                except (OSError, NotImplementedError, ValueError) as e:
+                    logger.warning(f"Process pool unavailable, rendering PDFs in a thread: {e}")
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=max(self.workers, 1), thread_name_prefix="pdf-render")
+        return self._executor
+
+    def submit(self, payload: dict) -> Future:
+        """Queue a render and return a future resolving to the PDF bytes"""
+        with self._lock:
+            if self._in_flight >= self.capacity:
+                self._rejected += 1
+                metrics.observe_pdf_render(None, None, "rejected")
+                raise PdfRenderBusy(f"PDF renderer is busy ({self._in_flight} jobs queued or running)")
+            executor = self._get_executor()
+            try:
+                job = executor.submit(_timed_render, payload)
+            except BrokenProcessPool:
+                # A worker died; start a fresh pool for this and later jobs
+                logger.warning("PDF render pool is broken, restarting it")
+                self._executor = None
+                job = self._get_executor().submit(_timed_render, payload)
+            self._in_flight += 1
+
+        submitted = time.monotonic()
+        result = Future()
+
+        def cancel_job(result):
+            # Callers only see the wrapper; cancelling it drops the render if it
+            # has not started yet
+            if result.cancelled():
+                job.cancel()
+
+        def finished(job):
+            elapsed = time.monotonic() - submitted
+            error = job.exception() if not job.cancelled() else None
+            with self._lock:
+                self._in_flight -= 1
+                if job.cancelled():
+                    self._cancelled += 1
+                elif error is not None:
+                    self._failures += 1
+                    if isinstance(error, BrokenProcessPool) and self._executor is executor:
+                        self._executor = None
+                else:
+                    pdf_content, render_time = job.result()
+                    queue_wait = max(elapsed - render_time, 0.0)
+                    self._renders += 1
+                    self._render_time_total += render_time
+                    self._render_time_max = max(self._render_time_max, render_time)
+                    self._queue_wait_total += queue_wait
+                    self._queue_wait_max = max(self._queue_wait_max, queue_wait)
+
+            if job.cancelled():
+                metrics.observe_pdf_render(None, None, "cancelled")
+            elif error is not None:
+                metrics.observe_pdf_render(None, None, "failed")
+            else:
+                metrics.observe_pdf_render(render_time, queue_wait)
+
+            if job.cancelled():
+                result.cancel()
+            elif not result.set_running_or_notify_cancel():
+                pass  # the caller cancelled the wrapper after the render started
+            elif error is not None:
+                result.set_exception(error)
+            else:
+                result.set_result(pdf_content)
+
+        result.add_done_callback(cancel_job)
+        job.add_done_callback(finished)
+        return result
+
+    async def render(self, payload: dict) -> Optional[bytes]:
+        """Render without blocking the event loop"""
+        return await asyncio.wrap_future(self.submit(payload))
+
+    def stats(self) -> dict:
+        """Snapshot of queue depth and render timings"""
+        with self._lock:
+            return {
+                "workers": self.workers,
+                "in_flight": self._in_flight,
+                "capacity": self.capacity,
+                "renders": self._renders,
+                "failures": self._failures,
+                "rejected": self._rejected,
+                "cancelled": self._cancelled,
+                "render_time_total": round(self._render_time_total, 6),
+                "render_time_max": round(self._render_time_max, 6),
+                "render_time_avg": round(self._render_time_total / self._renders, 6) if self._renders else 0.0,
+                "queue_wait_max": round(self._queue_wait_max, 6),
+                "queue_wait_avg": round(self._queue_wait_total / self._renders, 6) if self._renders else 0.0,
+            }
+
+    def shutdown(self):
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+# Shared renderer; worker processes start on the first render
+pdf_renderer = PdfRenderer()
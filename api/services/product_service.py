@@ -29,6 +29,13 @@ def get_product_by_id(product_id: str) -> Optional[ProductResponse]:
     result = db.fetch_one(query, (product_id,))
     return ProductResponse(**result) if result else None
 
+# Hash of the row as GET /products/{id} returns it, used as its ETag
+PRODUCT_VERSION_QUERY = "SELECT md5(p::text) AS version FROM products p WHERE id = %s AND is_active = TRUE"
+
+def get_product_version(product_id: str) -> Optional[str]:
+    result = db.fetch_one(PRODUCT_VERSION_QUERY, (product_id,))
+    return result['version'] if result else None
+
 def create_product(product_data: ProductCreateRequest) -> ProductResponse:
     product_id = str(uuid.uuid4())
     data = product_data.dict()
@@ -39,27 +46,24 @@ def create_product(product_data: ProductCreateRequest) -> ProductResponse:
     query = """
         INSERT INTO products (id, name, description, hsn_sac_code, price, tax_rate, unit, is_taxable, category, is_active)
         VALUES (%(id)s, %(name)s, %(description)s, %(hsn_sac_code)s, %(price)s, %(tax_rate)s, %(unit)s, %(is_taxable)s, %(category)s, %(is_active)s)
+        RETURNING *
     """
-    db.execute(query, data)
-    return get_product_by_id(product_id)
+    rows = db.fetch_returning(query, data)
+    return ProductResponse(**rows[0])
 
 def update_product(product_id: str, product_data: ProductUpdateRequest) -> Optional[ProductResponse]:
-    # Check if product exists
-    existing_product = get_product_by_id(product_id)
-    if not existing_product:
-        return None
-
     data = product_data.dict(exclude_unset=True)
     data['id'] = product_id
 
     # Build dynamic query based on provided fields
     set_clause = ", ".join([f"{key}=%({key})s" for key in data.keys() if key != 'id'])
-    query = f"UPDATE products SET {set_clause} WHERE id=%(id)s"
-
-    db.execute(query, data)
+    if not set_clause:
+        return get_product_by_id(product_id)
+    # Only active products can be updated; no row back means not found
+    query = f"UPDATE products SET {set_clause} WHERE id=%(id)s AND is_active = TRUE RETURNING *"
 
-    # Return updated product
-    return get_product_by_id(product_id)
+    rows = db.fetch_returning(query, data)
+    return ProductResponse(**rows[0]) if rows else None
 
 def delete_product(product_id: str) -> bool:
     query = "UPDATE products SET is_active = FALSE WHERE id = %s"
@@ -0,0 +1,207 @@
+"""
+Revenue analytics over arbitrary date ranges.
+
+Reads the per-day buckets kept by the triggers in ``dashboard_rollups.sql``
+(``revenue_daily`` per customer and status, ``revenue_daily_products`` per
+product) and folds the days into weeks, months or quarters in Python. A
+multi-year range reads at most one row per day and group instead of every
+invoice. Until the migration is applied, the same queries run against
+invoices and invoice_items directly.
+
+Cancelled invoices are never counted. Dates are invoice dates.
+"""
+from db.async_database import async_db
+from db.errors import UndefinedTableError
+from services.rollups import dashboard_rollups
+from datetime import date, timedelta
+from typing import Any, Dict, Optional
+
+GRANULARITIES = ("day", "week", "month", "quarter")
+GROUP_BYS = ("customer", "product", "status")
+
+# Keeps day-granularity responses over long ranges to a chartable size
+MAX_REVENUE_PERIODS = 1000
+
+_INVOICE_ROLLUP = "revenue_daily"
+_PRODUCT_ROLLUP = "revenue_daily_products"
+_INVOICE_SOURCE = """(
+    SELECT date AS day, customer_id, status, 1 AS invoice_count,
+           COALESCE(total_amount, 0) AS total_amount, COALESCE(amount_paid, 0) AS amount_paid
+    FROM invoices
+)"""
+_PRODUCT_SOURCE = """(
+    SELECT i.date AS day, ii.product_id, i.status, ii.quantity, COALESCE(ii.line_total, 0) AS line_total
+    FROM invoice_items ii
+    JOIN invoices i ON i.id = ii.invoice_id
+    WHERE ii.product_id IS NOT NULL
+)"""
+
+# Every query returns day, key, label, invoice_count, revenue, collected, quantity
+_REVENUE_QUERIES = {
+    None: """
+        SELECT r.day, NULL AS key, NULL AS label,
+               SUM(r.invoice_count) AS invoice_count, SUM(r.total_amount) AS revenue,
+               SUM(r.amount_paid) AS collected, NULL AS quantity
+        FROM {invoices} r
+        WHERE r.day BETWEEN %s AND %s AND r.status <> 'cancelled'
+        GROUP BY r.day
+    """,
+    "customer": """
+        SELECT r.day, r.customer_id::text AS key, c.name AS label,
+               SUM(r.invoice_count) AS invoice_count, SUM(r.total_amount) AS revenue,
+               SUM(r.amount_paid) AS collected, NULL AS quantity
+        FROM {invoices} r
+        LEFT JOIN customers c ON c.id = r.customer_id
+        WHERE r.day BETWEEN %s AND %s AND r.status <> 'cancelled'
+        GROUP BY r.day, r.customer_id, c.name
+    """,
+    "status": """
+        SELECT r.day, r.status AS key, r.status AS label,
+               SUM(r.invoice_count) AS invoice_count, SUM(r.total_amount) AS revenue,
+               SUM(r.amount_paid) AS collected, NULL AS quantity
+        FROM {invoices} r
+        WHERE r.day BETWEEN %s AND %s AND r.status <> 'cancelled'
+        GROUP BY r.day, r.status
+    """,
+    "product": """
+        SELECT r.day, r.product_id::text AS key, p.name AS label,
+               NULL AS invoice_count, SUM(r.line_total) AS revenue,
+               NULL AS collected, SUM(r.quantity) AS quantity
+        FROM {products} r
+        LEFT JOIN products p ON p.id = r.product_id
+        WHERE r.day BETWEEN %s AND %s AND r.status <> 'cancelled'
+        GROUP BY r.day, r.product_id, p.name
+    """,
+}
+
+ROLLUP_REVENUE_QUERIES = {
+    group_by: query.format(invoices=_INVOICE_ROLLUP, products=_PRODUCT_ROLLUP)
+    for group_by, query in _REVENUE_QUERIES.items()
+}
+AGGREGATE_REVENUE_QUERIES = {
+    group_by: query.format(invoices=_INVOICE_SOURCE, products=_PRODUCT_SOURCE)
+    for group_by, query in _REVENUE_QUERIES.items()
+}
+
+def bucket_start(day: date, granularity: str) -> date:
+    """First day of the period ``day`` falls in (weeks start on Monday)"""
+    if granularity == "day":
+        return day
+    if granularity == "week":
+        return day - timedelta(days=day.weekday())
+    if granularity == "month":
+        return day.replace(day=1)
+    return day.replace(month=(day.month - 1) // 3 * 3 + 1, day=1)
+
+def next_bucket(start: date, granularity: str) -> date:
+    if granularity == "day":
+        return start + timedelta(days=1)
+    if granularity == "week":
+        return start + timedelta(days=7)
+    months = 1 if granularity == "month" else 3
+    month = start.month - 1 + months
+    return date(start.year + month // 12, month % 12 + 1, 1)
+
+def period_label(start: date, granularity: str) -> str:
+    if granularity == "month":
+        return start.strftime('%Y-%m')
+    if granularity == "quarter":
+        return f"{start.year}-Q{(start.month - 1) // 3 + 1}"
+    return start.isoformat()
+
+def default_range(today: Optional[date] = None):
+    """The last 12 months, including the current one"""
+    today = today or date.today()
+    start = today.replace(day=1)
+    for _ in range(11):
+        start = (start - timedelta(days=1)).replace(day=1)
+    return start, today
+
+async def get_revenue_series(from_date: Optional[date] = None, to_date: Optional[date] = None,
+                             granularity: str = "month", group_by: Optional[str] = None) -> Dict[str, Any]:
+    if granularity not in GRANULARITIES:
+        raise ValueError(f"Invalid granularity: {granularity}. Use one of: {', '.join(GRANULARITIES)}")
+    if group_by is not None and group_by not in GROUP_BYS:
+        raise ValueError(f"Invalid group_by: {group_by}. Use one of: {', '.join(GROUP_BYS)}")
+    default_from, default_to = default_range(to_date)
+    from_date = from_date or default_from
+    to_date = to_date or default_to
+    if from_date > to_date:
+        raise ValueError("'from' must not be after 'to'")
+
+    periods = []
+    start = bucket_start(from_date, granularity)
+    while start <= to_date:
+        periods.append(start)
+        if len(periods) > MAX_REVENUE_PERIODS:
+            raise ValueError(f"Range spans more than {MAX_REVENUE_PERIODS} {granularity}s; narrow it or use a coarser granularity")
+        start = next_bucket(start, granularity)
+
+    rows = await _fetch_daily(group_by, from_date, to_date)
+    return rebucket(rows, periods, granularity, group_by, from_date, to_date)
+
+async def _fetch_daily(group_by: Optional[str], from_date: date, to_date: date):
+    if dashboard_rollups.available():
+        try:
+            rows = await async_db.fetch_all(ROLLUP_REVENUE_QUERIES[group_by], (from_date, to_date))
+            dashboard_rollups.mark_available()
+            return rows
+        except UndefinedTableError as e:
+            dashboard_rollups.mark_missing(e)
+    return await async_db.fetch_all(AGGREGATE_REVENUE_QUERIES[group_by], (from_date, to_date))
+
+def rebucket(rows, periods, granularity: str, group_by: Optional[str], from_date: date, to_date: date) -> Dict[str, Any]:
+    """Fold per-day rows into periods; ungrouped series get a zero point for every empty period"""
+    is_product = group_by == "product"
+    starts = {}
+    buckets = {}
+    labels = {}
+    for row in rows:
+        day = row['day']
+        start = starts.get(day)
+        if start is None:
+            start = starts[day] = bucket_start(day, granularity)
+        key = row['key']
+        bucket = buckets.get((start, key))
+        if bucket is None:
+            bucket = buckets[(start, key)] = [0, 0.0, 0.0, 0.0]
+            labels[key] = row['label']
+        bucket[0] += int(row['invoice_count'] or 0)
+        bucket[1] += float(row['revenue'] or 0)
+        bucket[2] += float(row['collected'] or 0)
+        bucket[3] += float(row['quantity'] or 0)
+
+    if group_by is None:
+        for start in periods:
+            buckets.setdefault((start, None), [0, 0.0, 0.0, 0.0])
+
+    series = []
+    totals = [0, 0.0, 0.0, 0.0]
+    for (start, key), (count, revenue, collected, quantity) in sorted(
+        buckets.items(), key=lambda item: (item[0][0], -item[1][1], item[0][1] or "")
+    ):
+        series.append({
+            'period': period_label(start, granularity),
+            'start': start,
+            'key': key,
+            'label': labels.get(key),
+            'invoice_count': None if is_product else count,
+            'revenue': round(revenue, 2),
+            'collected': None if is_product else round(collected, 2),
+            'quantity': round(quantity, 2) if is_product else None,
+        })
+        totals[0] += count
+        totals[1] += revenue
+        totals[2] += collected
+        totals[3] += quantity
+
+    return {
+        'from': from_date,
+        'to': to_date,
+        'granularity': granularity,
+        'group_by': group_by,
+        'total_revenue': round(totals[1], 2),
+        'total_collected': None if is_product else round(totals[2], 2),
+        'total_invoices': None if is_product else totals[0],
+        'series': series,
+    }
@@ -0,0 +1,51 @@
+"""
+Whether the trigger-maintained rollup tables can be read.
+
+``dashboard_rollups.sql`` creates the tables behind the dashboard stats and
+the revenue endpoint. Until it is applied, readers fall back to aggregating
+the base tables. The fallback is re-checked every ``ROLLUP_RECHECK_INTERVAL``
+seconds, so applying the migration takes effect without a restart.
+"""
+from typing import Optional
+import threading
+import time
+import os
+import logging
+
+logger = logging.getLogger(__name__)
+
+ROLLUP_RECHECK_INTERVAL = float(os.getenv("ROLLUP_RECHECK_INTERVAL", "300"))
+
+class RollupAvailability:
+    """Tracks whether the rollup tables exist, re-probing after they were found missing"""
+
+    def __init__(self, recheck_interval: float = ROLLUP_RECHECK_INTERVAL):
+        self.recheck_interval = recheck_interval
+        self._lock = threading.Lock()
+        self._retry_at: Optional[float] = None
+
+    def available(self) -> bool:
+        """True unless the tables were found missing less than ``recheck_interval`` seconds ago"""
+        retry_at = self._retry_at
+        return retry_at is None or time.monotonic() >= retry_at
+
+    def mark_missing(self, error: Exception):
+        with self._lock:
+            first = self._retry_at is None
+            self._retry_at = time.monotonic() + self.recheck_interval
+        if first:
+            logger.warning(
+                f"Rollup tables unavailable, aggregating base tables instead (apply dashboard_rollups.sql): {error}"
+            )
+
+    def mark_available(self):
+        if self._retry_at is None:
+            return
+        with self._lock:
+            recovered = self._retry_at is not None
+            self._retry_at = None
+        if recovered:
+            logger.info("Rollup tables available again")
+
+# Shared by the dashboard stats and revenue queries; both read tables from dashboard_rollups.sql
+dashboard_rollups = RollupAvailability()
@@ -9,10 +9,31 @@ from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph,
 from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
 from reportlab.lib.enums import TA_CENTER, TA_LEFT, TA_RIGHT
 from decimal import Decimal
+import json
+import threading
 import logging
 
 logger = logging.getLogger(__name__)
 
+# Used when no company_settings row exists
+class DefaultCompany:
+    company_name = "RUBY ENTERPRISE"
+    address_line1 = "SHOP-2, SURVEY NO. 35/2, PLOT NO-7, RUBY ENTERPRISE,"
+    address_line2 = "B/H TULIP PARTY PLOT, NR POONAM DUMPER,N.H 8-B,"
+    city = "VAVDI, RAJKOT"
+    state = "GUJARAT"
+    postal_code = "360004"
+    country = "INDIA"
+    phone = "+91 94272 53431"
+    gst_number = "24ADRPT0090R1ZQ"
+    pan_number = "ADRPT0090R"
+    bank_name = "HDFC Bank Ltd."
+    bank_account_name = "RUBY ENTERPRISE"
+    bank_account_number = "50200082252861"
+    bank_ifsc_code = "HDFC0009028"
+    terms_and_conditions = '1) "SUBJECT TO "RAJKOT"JURIDICTION ONLY. E.& O.E"'
+    authorized_signatory = "RUBY ENTERPRISE"
+
 def generate_ruby_enterprise_pdf(invoice_id: str) -> bytes:
     """Generate dynamic professional PDF using real invoice data"""
     try:
@@ -26,68 +47,65 @@ def generate_ruby_enterprise_pdf(invoice_id: str) -> bytes:
             return None
 
         company = get_company_settings()
-        if not company:
-            # Default RUBY ENTERPRISE settings
-            class DefaultCompany:
-                company_name = "RUBY ENTERPRISE"
-                address_line1 = "SHOP-2, SURVEY NO. 35/2, PLOT NO-7, RUBY ENTERPRISE,"
-                address_line2 = "B/H TULIP PARTY PLOT, NR POONAM DUMPER,N.H 8-B,"
-                city = "VAVDI, RAJKOT"
-                state = "GUJARAT"
-                postal_code = "360004"
-                country = "INDIA"
-                phone = "+91 94272 53431"
-                gst_number = "24ADRPT0090R1ZQ"
-                pan_number = "ADRPT0090R"
-                bank_name = "HDFC Bank Ltd."
-                bank_account_name = "RUBY ENTERPRISE"
-                bank_account_number = "50200082252861"
-                bank_ifsc_code = "HDFC0009028"
-                terms_and_conditions = '1) "SUBJECT TO "RAJKOT"JURIDICTION ONLY. E.& O.E"'
-                authorized_signatory = "RUBY ENTERPRISE"
-
-            company = DefaultCompany()
-
-        # Get customer data
         customer = get_customer_by_id(invoice.customer_id)
+    except Exception as e:
+        logger.error(f"Error generating RUBY ENTERPRISE PDF: {e}")
+        return None
 
-        # Get additional charges
-        additional_charges = 0
-        try:
-            from db.database import db
-            charges_query = "SELECT total_amount FROM additional_charges WHERE invoice_id = %s"
-            charges_result = db.fetch_all(charges_query, (invoice.id,))
-            for charge in charges_result:
-                additional_charges += float(charge['total_amount'])
-        except Exception as e:
-            logger.warning(f"Could not load additional charges: {e}")
-            additional_charges = 0
-        # Create PDF buffer
-        buffer = io.BytesIO()
+    return render_ruby_enterprise_pdf(invoice, company, customer)
 
-        # Create PDF document with tight margins for compact look
-        doc = SimpleDocTemplate(
-            buffer,
-            pagesize=A4,
-            rightMargin=12*mm,
-            leftMargin=12*mm,
-            topMargin=10*mm,
-            bottomMargin=10*mm
-        )
+def render_ruby_enterprise_pdf(invoice, company=None, customer=None) -> bytes:
+    """Render the RUBY ENTERPRISE PDF from already loaded data; does no database access"""
+    try:
+        return get_template().render(invoice, company or DefaultCompany(), customer)
+    except Exception as e:
+        logger.error(f"Error generating RUBY ENTERPRISE PDF: {e}")
+        return None
+
+_local = threading.local()
+
+def get_template() -> "RubyEnterpriseTemplate":
+    """Template for this thread, built on first use.
+
+    Flowables keep layout state while a document is built, so render threads
+    each get their own copy; a render worker process builds it exactly once.
+    """
+    template = getattr(_local, "template", None)
+    if template is None:
+        template = _local.template = RubyEnterpriseTemplate()
+    return template
+
+def amount_to_words(amount):
+    # This is a simplified version - you might want to use a proper library
+    amount_int = int(amount)
+    if amount_int < 1000:
+        return f"{amount_int} ONLY"
+    elif amount_int < 100000:
+        thousands = amount_int // 1000
+        remainder = amount_int % 1000
+        if remainder == 0:
+            return f"{thousands} THOUSAND ONLY"
+        else:
+            return f"{thousands} THOUSAND {remainder} ONLY"
+    else:
+        return f"{amount_int} ONLY"
+
+class RubyEnterpriseTemplate:
+    """Everything in the RUBY ENTERPRISE layout that does not depend on the invoice.
 
-        # Container for elements
-        elements = []
+    Styles, column widths, table styles and the static sections (company
+    header, GST/PAN, title, items header, terms) are built here once, so a
+    render only builds the invoice details, customer, items and totals.
+    """
 
+    def __init__(self):
         # Define compact professional styles
         styles = getSampleStyleSheet()
 
-        # Compact styles for tight layout
         # Soft professional color palette
-        soft_grey = colors.HexColor('#f1f5f9')
         charcoal = colors.HexColor('#2c3e50')
-        blue_accent = colors.HexColor('#667eea')
 
-        company_name_style = ParagraphStyle(
+        self.company_name_style = ParagraphStyle(
             'CompanyName',
             parent=styles['Normal'],
             fontSize=14,
@@ -98,7 +116,7 @@ def generate_ruby_enterprise_pdf(invoice_id: str) -> bytes:
             textColor=charcoal
         )
 
-        address_style = ParagraphStyle(
+        self.address_style = ParagraphStyle(
             'Address',
             parent=styles['Normal'],
             fontSize=8,
@@ -107,7 +125,7 @@ def generate_ruby_enterprise_pdf(invoice_id: str) -> bytes:
             textColor=colors.grey
         )
 
-        tax_invoice_style = ParagraphStyle(
+        self.tax_invoice_style = ParagraphStyle(
             'TaxInvoice',
             parent=styles['Normal'],
             fontSize=12,
@@ -118,7 +136,7 @@ def generate_ruby_enterprise_pdf(invoice_id: str) -> bytes:
             textColor=charcoal
         )
 
-        field_label_style = ParagraphStyle(
+        self.field_label_style = ParagraphStyle(
             'FieldLabel',
             parent=styles['Normal'],
             fontSize=7,
@@ -127,7 +145,7 @@ def generate_ruby_enterprise_pdf(invoice_id: str) -> bytes:
             textColor=colors.grey
         )
 
-        field_value_style = ParagraphStyle(
+        self.field_value_style = ParagraphStyle(
             'FieldValue',
             parent=styles['Normal'],
             fontSize=7,
@@ -135,7 +153,7 @@ def generate_ruby_enterprise_pdf(invoice_id: str) -> bytes:
             textColor=charcoal
         )
 
-        item_text_style = ParagraphStyle(
+        self.item_text_style = ParagraphStyle(
             'ItemText',
             parent=styles['Normal'],
             fontSize=7,
@@ -144,38 +162,127 @@ def generate_ruby_enterprise_pdf(invoice_id: str) -> bytes:
         )
 
         # Calculate available width
-        page_width = A4[0] - 24*mm
+        page_width = self.page_width = A4[0] - 24*mm
 
-        # Create main container with all sections
-        main_sections = []
+        self.detail_col_widths = [page_width*0.15, page_width*0.1, page_width*0.2, page_width*0.15, page_width*0.2, page_width*0.2]
+        self.half_col_widths = [page_width/2, page_width/2]
+        self.item_col_widths = [
+            page_width*0.08,   # SR NO
+            page_width*0.38,   # PRODUCT NAME (wider for content)
+            page_width*0.1,    # HSN/SAC
+            page_width*0.1,    # GST RATE
+            page_width*0.1,    # QTY/NOS
+            page_width*0.12,   # RATE
+            page_width*0.12    # AMOUNT
+        ]
+        self.totals_col_widths = [page_width*0.32, page_width*0.16, page_width*0.14, page_width*0.19, page_width*0.19]
+
+        self.invoice_details_style = TableStyle([
+            ('VALIGN', (0, 0), (-1, -1), 'TOP'),
+            ('TOPPADDING', (0, 0), (-1, -1), 2),
+            ('BOTTOMPADDING', (0, 0), (-1, -1), 2),
+            ('LEFTPADDING', (0, 0), (-1, -1), 5),
+            ('RIGHTPADDING', (0, 0), (-1, -1), 3),
+            # Section divider line above
+            ('LINEABOVE', (0, 0), (-1, 0), 0.8, colors.black),
+            # Very subtle vertical separators
+            ('LINEAFTER', (0, 0), (0, -1), 0.2, colors.lightgrey),
+            ('LINEAFTER', (2, 0), (2, -1), 0.2, colors.lightgrey),
+            ('LINEAFTER', (4, 0), (4, -1), 0.2, colors.lightgrey),
+        ])
+
+        self.customer_style = TableStyle([
+            ('VALIGN', (0, 0), (-1, -1), 'TOP'),
+            ('TOPPADDING', (0, 0), (-1, -1), 2),
+            ('BOTTOMPADDING', (0, 0), (-1, -1), 2),
+            ('LEFTPADDING', (0, 0), (-1, -1), 5),
+            ('RIGHTPADDING', (0, 0), (-1, -1), 5),
+            # Section divider line above
+            ('LINEABOVE', (0, 0), (-1, 0), 0.8, colors.black),
+            # Very subtle center separator
+            ('LINEAFTER', (0, 0), (0, -1), 0.2, colors.lightgrey),
+        ])
+
+        self.items_style = TableStyle([
+            ('ALIGN', (0, 0), (0, -1), 'CENTER'),  # SR NO
+            ('ALIGN', (1, 0), (1, -1), 'LEFT'),    # PRODUCT NAME
+            ('ALIGN', (2, 0), (2, -1), 'CENTER'),  # HSN/SAC
+            ('ALIGN', (3, 0), (3, -1), 'CENTER'),  # GST RATE
+            ('ALIGN', (4, 0), (4, -1), 'CENTER'),  # QTY/NOS
+            ('ALIGN', (5, 0), (5, -1), 'RIGHT'),   # RATE
+            ('ALIGN', (6, 0), (6, -1), 'RIGHT'),   # AMOUNT
+            ('VALIGN', (0, 0), (-1, -1), 'TOP'),
+            ('TOPPADDING', (0, 0), (-1, -1), 2),
+            ('BOTTOMPADDING', (0, 0), (-1, -1), 2),
+            ('LEFTPADDING', (0, 0), (-1, -1), 2),
+            ('RIGHTPADDING', (0, 0), (-1, -1), 2),
+            # Very subtle column separators
+            ('LINEAFTER', (0, 0), (5, -1), 0.15, colors.lightgrey),
+            # Line above total row
+            ('LINEABOVE', (0, -1), (-1, -1), 0.3, colors.grey),
+        ])
+
+        self.totals_style = TableStyle([
+            ('VALIGN', (0, 0), (-1, -1), 'TOP'),
+            ('ALIGN', (2, 0), (-1, -1), 'RIGHT'),
+            ('TOPPADDING', (0, 0), (-1, -1), 2),
+            ('BOTTOMPADDING', (0, 0), (-1, -1), 2),
+            ('LEFTPADDING', (0, 0), (-1, -1), 5),
+            ('RIGHTPADDING', (0, 0), (-1, -1), 5),
+            # Strong section divider line above
+            ('LINEABOVE', (0, 0), (-1, 0), 0.8, colors.black),
+        ])
+
+        self.main_style = TableStyle([
+            # Strong outer border
+            ('BOX', (0, 0), (-1, -1), 1.2, colors.black),
+            ('VALIGN', (0, 0), (-1, -1), 'TOP'),
+            ('TOPPADDING', (0, 0), (-1, -1), 0),
+            ('BOTTOMPADDING', (0, 0), (-1, -1), 0),
+            ('LEFTPADDING', (0, 0), (-1, -1), 0),
+            ('RIGHTPADDING', (0, 0), (-1, -1), 0),
+        ])
+
+        # Fixed field labels, parsed once
+        self._labels = {}
+
+        self._build_static_sections()
+
+    def label(self, text):
+        paragraph = self._labels.get(text)
+        if paragraph is None:
+            paragraph = self._labels[text] = Paragraph(text, self.field_label_style)
+        return paragraph
+
+    def _build_static_sections(self):
+        page_width = self.page_width
 
         # ===== SECTION 1: COMPANY HEADER =====
         company_data = [
-            [Paragraph("RUBY ENTERPRISE", company_name_style)],
-            [Paragraph("SHOP-2, SURVEY NO. 35/2, PLOT NO-7, RUBY ENTERPRISE,", address_style)],
-            [Paragraph("B/H TULIP PARTY PLOT, NR POONAM DUMPER,N.H 8-B,", address_style)],
-            [Paragraph("VAVDI, RAJKOT - 360004 GUJARAT ( INDIA )", address_style)],
-            [Paragraph("+91 94272 53431", address_style)]
+            [Paragraph("RUBY ENTERPRISE", self.company_name_style)],
+            [Paragraph("SHOP-2, SURVEY NO. 35/2, PLOT NO-7, RUBY ENTERPRISE,", self.address_style)],
+            [Paragraph("B/H TULIP PARTY PLOT, NR POONAM DUMPER,N.H 8-B,", self.address_style)],
+            [Paragraph("VAVDI, RAJKOT - 360004 GUJARAT ( INDIA )", self.address_style)],
+            [Paragraph("+91 94272 53431", self.address_style)]
         ]
 
-        company_table = Table(company_data, colWidths=[page_width])
-        company_table.setStyle(TableStyle([
+        self.company_table = Table(company_data, colWidths=[page_width])
+        self.company_table.setStyle(TableStyle([
             ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
             ('TOPPADDING', (0, 0), (-1, -1), 3),
             ('BOTTOMPADDING', (0, 0), (-1, -1), 3),
             ('LEFTPADDING', (0, 0), (-1, -1), 5),
             ('RIGHTPADDING', (0, 0), (-1, -1), 5),
         ]))
-        main_sections.append([company_table])
 
         # ===== SECTION 2: GST & PAN (with section line) =====
         gst_pan_data = [
-            [Paragraph("GST NO.: 24ADRPT0090R1ZQ", field_label_style),
-             Paragraph("PAN NO: ADRPT0090R", field_label_style)]
+            [Paragraph("GST NO.: 24ADRPT0090R1ZQ", self.field_label_style),
+             Paragraph("PAN NO: ADRPT0090R", self.field_label_style)]
         ]
 
-        gst_pan_table = Table(gst_pan_data, colWidths=[page_width/2, page_width/2])
-        gst_pan_table.setStyle(TableStyle([
+        self.gst_pan_table = Table(gst_pan_data, colWidths=self.half_col_widths)
+        self.gst_pan_table.setStyle(TableStyle([
             ('ALIGN', (0, 0), (0, 0), 'LEFT'),
             ('ALIGN', (1, 0), (1, 0), 'RIGHT'),
             ('TOPPADDING', (0, 0), (-1, -1), 4),
@@ -185,66 +292,138 @@ def generate_ruby_enterprise_pdf(invoice_id: str) -> bytes:
             # Section divider line above
             ('LINEABOVE', (0, 0), (-1, 0), 0.8, colors.black),
         ]))
-        main_sections.append([gst_pan_table])
 
         # ===== SECTION 3: TAX INVOICE HEADER =====
         tax_invoice_data = [
-            [Paragraph("TAX INVOICE", tax_invoice_style)]
+            [Paragraph("TAX INVOICE", self.tax_invoice_style)]
+        ]
+
+        self.tax_invoice_table = Table(tax_invoice_data, colWidths=[page_width])
+        self.tax_invoice_table.setStyle(TableStyle([
+            ('TOPPADDING', (0, 0), (-1, -1), 3),
+            ('BOTTOMPADDING', (0, 0), (-1, -1), 3),
+            ('LEFTPADDING', (0, 0), (-1, -1), 5),
+            ('RIGHTPADDING', (0, 0), (-1, -1), 5),
+        ]))
+
+        # ===== SECTION 6: ITEMS HEADER (with strong section line) =====
+        items_header_data = [
+            [
+                self.label("SR NO"),
+                self.label("PRODUCT NAME"),
+                self.label("HSN/SAC"),
+                self.label("GST RATE"),
+                self.label("QTY/NOS"),
+                self.label("RATE"),
+                self.label("AMOUNT")
+            ]
         ]
 
-        tax_invoice_table = Table(tax_invoice_data, colWidths=[page_width])
-        tax_invoice_table.setStyle(TableStyle([
+        self.items_header_table = Table(items_header_data, colWidths=self.item_col_widths)
+        self.items_header_table.setStyle(TableStyle([
+            ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+            ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
             ('TOPPADDING', (0, 0), (-1, -1), 3),
             ('BOTTOMPADDING', (0, 0), (-1, -1), 3),
+            ('LEFTPADDING', (0, 0), (-1, -1), 2),
+            ('RIGHTPADDING', (0, 0), (-1, -1), 2),
+            # Strong section divider line above
+            ('LINEABOVE', (0, 0), (-1, 0), 0.8, colors.black),
+            # Subtle column separators
+            ('LINEAFTER', (0, 0), (5, 0), 0.2, colors.lightgrey),
+            # Strong line below header
+            ('LINEBELOW', (0, 0), (-1, 0), 0.5, colors.black),
+        ]))
+
+        # ===== SECTION 9: TERMS & SIGNATURE (with section line) =====
+        terms_data = [
+            [
+                self.label("Terms & Condition :"),
+                self.label("RUBY ENTERPRISE")
+            ],
+            [
+                Paragraph('1) "SUBJECT TO "RAJKOT"JURIDICTION ONLY. E.& O.E"', self.field_value_style),
+                ""
+            ],
+            [
+                "", ""
+            ],
+            [
+                "",
+                Paragraph("Authorised Signatory", self.field_value_style)
+            ]
+        ]
+
+        self.terms_table = Table(terms_data, colWidths=[page_width*0.65, page_width*0.35])
+        self.terms_table.setStyle(TableStyle([
+            ('VALIGN', (0, 0), (-1, -1), 'TOP'),
+            ('VALIGN', (1, -1), (1, -1), 'BOTTOM'),
+            ('ALIGN', (1, 0), (1, -1), 'CENTER'),
+            ('TOPPADDING', (0, 0), (-1, -1), 3),
+            ('BOTTOMPADDING', (0, 0), (-1, -1), 5),
             ('LEFTPADDING', (0, 0), (-1, -1), 5),
             ('RIGHTPADDING', (0, 0), (-1, -1), 5),
+            # Strong section divider line above
+            ('LINEABOVE', (0, 0), (-1, 0), 0.8, colors.black),
         ]))
-        main_sections.append([tax_invoice_table])
+
+    def render(self, invoice, company, customer) -> bytes:
+        field_label_style = self.field_label_style
+        field_value_style = self.field_value_style
+        item_text_style = self.item_text_style
+        label = self.label
+
+        # Additional charges are loaded with the invoice
+        additional_charges = sum(float(charge.total_amount) for charge in invoice.additional_charges or [])
+
+        # Create PDF buffer
+        buffer = io.BytesIO()
+
+        # Create PDF document with tight margins for compact look
+        doc = SimpleDocTemplate(
+            buffer,
+            pagesize=A4,
+            rightMargin=12*mm,
+            leftMargin=12*mm,
+            topMargin=10*mm,
+            bottomMargin=10*mm
+        )
+
+        # Create main container with all sections
+        main_sections = [
+            [self.company_table],
+            [self.gst_pan_table],
+            [self.tax_invoice_table],
+        ]
 
         # ===== SECTION 4: INVOICE DETAILS (DYNAMIC) =====
         invoice_date = invoice.date.strftime('%d-%m-%Y') if invoice.date else ''
-        po_date = invoice.po_date.strftime('%d-%m-%Y') if invoice.po_date else ''
-        eway_bill_date = invoice.eway_bill_date.strftime('%d-%m-%Y') if invoice.eway_bill_date else ''
 
         invoice_details_data = [
             [
-                Paragraph("PO DATE:", field_label_style), "",
-                Paragraph("E-WAY BILL NO.", field_label_style), "",
-                Paragraph("BILL NO:", field_label_style),
+                label("PO DATE:"), "",
+                label("E-WAY BILL NO."), "",
+                label("BILL NO:"),
                 Paragraph(invoice.invoice_number or "", field_value_style)
             ],
             [
-                Paragraph("PO NO:", field_label_style), "",
-                Paragraph("BILL DATE:", field_label_style),
+                label("PO NO:"), "",
+                label("BILL DATE:"),
                 Paragraph(invoice_date, field_value_style), "", ""
             ],
             [
-                Paragraph("TRANSPORT:", field_label_style), "",
-                Paragraph("E-WAY BILL DATE", field_label_style), "",
-                Paragraph("TOTAL QTY.", field_label_style), ""
+                label("TRANSPORT:"), "",
+                label("E-WAY BILL DATE"), "",
+                label("TOTAL QTY."), ""
             ],
             [
-                Paragraph("LR. NO.:", field_label_style), "",
-                Paragraph("VEHICAL NO.", field_label_style), "", "", ""
+                label("LR. NO.:"), "",
+                label("VEHICAL NO."), "", "", ""
             ]
         ]
 
-        detail_col_widths = [page_width*0.15, page_width*0.1, page_width*0.2, page_width*0.15, page_width*0.2, page_width*0.2]
-        invoice_details_table = Table(invoice_details_data, colWidths=detail_col_widths)
-
-        invoice_details_table.setStyle(TableStyle([
-            ('VALIGN', (0, 0), (-1, -1), 'TOP'),
-            ('TOPPADDING', (0, 0), (-1, -1), 2),
-            ('BOTTOMPADDING', (0, 0), (-1, -1), 2),
-            ('LEFTPADDING', (0, 0), (-1, -1), 5),
-            ('RIGHTPADDING', (0, 0), (-1, -1), 3),
-            # Section divider line above
-            ('LINEABOVE', (0, 0), (-1, 0), 0.8, colors.black),
-            # Very subtle vertical separators
-            ('LINEAFTER', (0, 0), (0, -1), 0.2, colors.lightgrey),
-            ('LINEAFTER', (2, 0), (2, -1), 0.2, colors.lightgrey),
-            ('LINEAFTER', (4, 0), (4, -1), 0.2, colors.lightgrey),
-        ]))
+        invoice_details_table = Table(invoice_details_data, colWidths=self.detail_col_widths)
+        invoice_details_table.setStyle(self.invoice_details_style)
         main_sections.append([invoice_details_table])
 
         # ===== SECTION 5: CUSTOMER DETAILS (DYNAMIC) =====
@@ -254,7 +433,6 @@ def generate_ruby_enterprise_pdf(invoice_id: str) -> bytes:
 
         if customer and hasattr(customer, 'billing_address'):
             if isinstance(customer.billing_address, str):
-                import json
                 try:
                     billing_address = json.loads(customer.billing_address)
                 except:
@@ -264,7 +442,6 @@ def generate_ruby_enterprise_pdf(invoice_id: str) -> bytes:
 
         if hasattr(invoice, 'shipping_details') and invoice.shipping_details:
             if isinstance(invoice.shipping_details, str):
-                import json
                 try:
                     shipping_address = json.loads(invoice.shipping_details)
                 except:
@@ -275,11 +452,12 @@ def generate_ruby_enterprise_pdf(invoice_id: str) -> bytes:
             shipping_address = billing_address
 
         customer_name = customer.name if customer else invoice.customer_name or "N/A"
+        gst_no = customer.gst_no if customer and customer.gst_no else 'N/A'
 
         customer_data = [
             [
-                Paragraph("BILL TO :", field_label_style),
-                Paragraph("SHIP TO:", field_label_style)
+                label("BILL TO :"),
+                label("SHIP TO:")
             ],
             [
                 Paragraph(f"M/S. {customer_name}", field_value_style),
@@ -302,64 +480,16 @@ def generate_ruby_enterprise_pdf(invoice_id: str) -> bytes:
                 Paragraph(f"PLACE TO SUPPLY: {invoice.place_of_supply or shipping_address.get('state', '')}", field_value_style)
             ],
             [
-                Paragraph(f"GST NO: {customer.gst_no if customer and customer.gst_no else 'N/A'}", field_value_style),
-                Paragraph(f"GST NO: {customer.gst_no if customer and customer.gst_no else 'N/A'}", field_value_style)
+                Paragraph(f"GST NO: {gst_no}", field_value_style),
+                Paragraph(f"GST NO: {gst_no}", field_value_style)
             ]
         ]
 
-        customer_table = Table(customer_data, colWidths=[page_width/2, page_width/2])
-        customer_table.setStyle(TableStyle([
-            ('VALIGN', (0, 0), (-1, -1), 'TOP'),
-            ('TOPPADDING', (0, 0), (-1, -1), 2),
-            ('BOTTOMPADDING', (0, 0), (-1, -1), 2),
-            ('LEFTPADDING', (0, 0), (-1, -1), 5),
-            ('RIGHTPADDING', (0, 0), (-1, -1), 5),
-            # Section divider line above
-            ('LINEABOVE', (0, 0), (-1, 0), 0.8, colors.black),
-            # Very subtle center separator
-            ('LINEAFTER', (0, 0), (0, -1), 0.2, colors.lightgrey),
-        ]))
+        customer_table = Table(customer_data, colWidths=self.half_col_widths)
+        customer_table.setStyle(self.customer_style)
         main_sections.append([customer_table])
 
-        # ===== SECTION 6: ITEMS HEADER (with strong section line) =====
-        items_header_data = [
-            [
-                Paragraph("SR NO", field_label_style),
-                Paragraph("PRODUCT NAME", field_label_style),
-                Paragraph("HSN/SAC", field_label_style),
-                Paragraph("GST RATE", field_label_style),
-                Paragraph("QTY/NOS", field_label_style),
-                Paragraph("RATE", field_label_style),
-                Paragraph("AMOUNT", field_label_style)
-            ]
-        ]
-
-        item_col_widths = [
-            page_width*0.08,   # SR NO
-            page_width*0.38,   # PRODUCT NAME (wider for content)
-            page_width*0.1,    # HSN/SAC
-            page_width*0.1,    # GST RATE
-            page_width*0.1,    # QTY/NOS
-            page_width*0.12,   # RATE
-            page_width*0.12    # AMOUNT
-        ]
-
-        items_header_table = Table(items_header_data, colWidths=item_col_widths)
-        items_header_table.setStyle(TableStyle([
-            ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-            ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
-            ('TOPPADDING', (0, 0), (-1, -1), 3),
-            ('BOTTOMPADDING', (0, 0), (-1, -1), 3),
-            ('LEFTPADDING', (0, 0), (-1, -1), 2),
-            ('RIGHTPADDING', (0, 0), (-1, -1), 2),
-            # Strong section divider line above
-            ('LINEABOVE', (0, 0), (-1, 0), 0.8, colors.black),
-            # Subtle column separators
-            ('LINEAFTER', (0, 0), (5, 0), 0.2, colors.lightgrey),
-            # Strong line below header
-            ('LINEBELOW', (0, 0), (-1, 0), 0.5, colors.black),
-        ]))
-        main_sections.append([items_header_table])
+        main_sections.append([self.items_header_table])
 
         # ===== SECTION 7: ITEMS DATA (DYNAMIC) =====
         items_data = []
@@ -405,30 +535,13 @@ def generate_ruby_enterprise_pdf(invoice_id: str) -> bytes:
         # Total row
         items_data.append([
             "", "", "", "",
-            Paragraph("TOTAL NOS.", field_label_style),
+            label("TOTAL NOS."),
             Paragraph(f"{int(total_qty)}", field_value_style),
             ""
         ])
 
-        items_table = Table(items_data, colWidths=item_col_widths)
-        items_table.setStyle(TableStyle([
-            ('ALIGN', (0, 0), (0, -1), 'CENTER'),  # SR NO
-            ('ALIGN', (1, 0), (1, -1), 'LEFT'),    # PRODUCT NAME
-            ('ALIGN', (2, 0), (2, -1), 'CENTER'),  # HSN/SAC
-            ('ALIGN', (3, 0), (3, -1), 'CENTER'),  # GST RATE
-            ('ALIGN', (4, 0), (4, -1), 'CENTER'),  # QTY/NOS
-            ('ALIGN', (5, 0), (5, -1), 'RIGHT'),   # RATE
-            ('ALIGN', (6, 0), (6, -1), 'RIGHT'),   # AMOUNT
-            ('VALIGN', (0, 0), (-1, -1), 'TOP'),
-            ('TOPPADDING', (0, 0), (-1, -1), 2),
-            ('BOTTOMPADDING', (0, 0), (-1, -1), 2),
-            ('LEFTPADDING', (0, 0), (-1, -1), 2),
-            ('RIGHTPADDING', (0, 0), (-1, -1), 2),
-            # Very subtle column separators
-            ('LINEAFTER', (0, 0), (5, -1), 0.15, colors.lightgrey),
-            # Line above total row
-            ('LINEABOVE', (0, -1), (-1, -1), 0.3, colors.grey),
-        ]))
+        items_table = Table(items_data, colWidths=self.item_col_widths)
+        items_table.setStyle(self.items_style)
         main_sections.append([items_table])
 
         # ===== SECTION 8: TOTALS & BANK DETAILS (DYNAMIC) =====
@@ -448,133 +561,62 @@ def generate_ruby_enterprise_pdf(invoice_id: str) -> bytes:
             cgst_amount = tax_amount / 2
             sgst_amount = tax_amount / 2
 
-        # Convert amount to words (simplified)
-        def amount_to_words(amount):
-            # This is a simplified version - you might want to use a proper library
-            amount_int = int(amount)
-            if amount_int < 1000:
-                return f"{amount_int} ONLY"
-            elif amount_int < 100000:
-                thousands = amount_int // 1000
-                remainder = amount_int % 1000
-                if remainder == 0:
-                    return f"{thousands} THOUSAND ONLY"
-                else:
-                    return f"{thousands} THOUSAND {remainder} ONLY"
-            else:
-                return f"{amount_int} ONLY"
-
         amount_words = amount_to_words(total_amount).upper()
 
         totals_data = [
             [
                 Paragraph(f"AMOUNT IN WORD: {amount_words}", field_value_style),
                 "",
-                Paragraph("SUB TOTAL", field_label_style),
+                label("SUB TOTAL"),
                 Paragraph(f"{subtotal:,.2f}", field_value_style)
             ],
             [
                 "", "",
-                Paragraph("TOTAL TAX", field_label_style),
+                label("TOTAL TAX"),
                 Paragraph(f"{tax_amount:.2f}", field_value_style)
             ],
             [
-                Paragraph("BANK DETAIL:", field_label_style),
-                Paragraph("CGST 6%", field_label_style),
+                label("BANK DETAIL:"),
+                label("CGST 6%"),
                 Paragraph(f"{cgst_amount:.2f}", field_value_style),
-                Paragraph("ROUND OFF", field_label_style),
+                label("ROUND OFF"),
                 Paragraph("0.00", field_value_style)
             ],
             [
                 Paragraph(f"BANK NAME : {company.bank_name}", field_value_style),
-                Paragraph("SGST 6%", field_label_style),
+                label("SGST 6%"),
                 Paragraph(f"{sgst_amount:.2f}", field_value_style),
-                Paragraph("TOTAL", field_label_style),
+                label("TOTAL"),
                 Paragraph(f"{total_amount:,.2f}", field_value_style)
             ],
             [
                 Paragraph(f"ACCOUNT NAME: {company.bank_account_name}", field_value_style),
-                Paragraph("IGST 12%", field_label_style),
+                label("IGST 12%"),
                 "", "", ""
             ],
             [
                 Paragraph(f"AC NO: {company.bank_account_number} & IFSC CODE: {company.bank_ifsc_code}", field_value_style),
-                Paragraph("TOTAL GST", field_label_style),
+                label("TOTAL GST"),
                 Paragraph(f"{tax_amount:.2f}", field_value_style),
                 "", ""
             ]
         ]
 
-        totals_col_widths = [page_width*0.32, page_width*0.16, page_width*0.14, page_width*0.19, page_width*0.19]
-        totals_table = Table(totals_data, colWidths=totals_col_widths)
-        totals_table.setStyle(TableStyle([
-            ('VALIGN', (0, 0), (-1, -1), 'TOP'),
-            ('ALIGN', (2, 0), (-1, -1), 'RIGHT'),
-            ('TOPPADDING', (0, 0), (-1, -1), 2),
-            ('BOTTOMPADDING', (0, 0), (-1, -1), 2),
-            ('LEFTPADDING', (0, 0), (-1, -1), 5),
-            ('RIGHTPADDING', (0, 0), (-1, -1), 5),
-            # Strong section divider line above
-            ('LINEABOVE', (0, 0), (-1, 0), 0.8, colors.black),
-        ]))
+        totals_table = Table(totals_data, colWidths=self.totals_col_widths)
+        totals_table.setStyle(self.totals_style)
         main_sections.append([totals_table])
 
-        # ===== SECTION 9: TERMS & SIGNATURE (with section line) =====
-        terms_data = [
-            [
-                Paragraph("Terms & Condition :", field_label_style),
-                Paragraph("RUBY ENTERPRISE", field_label_style)
-            ],
-            [
-                Paragraph('1) "SUBJECT TO "RAJKOT"JURIDICTION ONLY. E.& O.E"', field_value_style),
-                ""
-            ],
-            [
-                "", ""
-            ],
-            [
-                "",
-                Paragraph("Authorised Signatory", field_value_style)
-            ]
-        ]
-
-        terms_table = Table(terms_data, colWidths=[page_width*0.65, page_width*0.35])
-        terms_table.setStyle(TableStyle([
-            ('VALIGN', (0, 0), (-1, -1), 'TOP'),
-            ('VALIGN', (1, -1), (1, -1), 'BOTTOM'),
-            ('ALIGN', (1, 0), (1, -1), 'CENTER'),
-            ('TOPPADDING', (0, 0), (-1, -1), 3),
-            ('BOTTOMPADDING', (0, 0), (-1, -1), 5),
-            ('LEFTPADDING', (0, 0), (-1, -1), 5),
-            ('RIGHTPADDING', (0, 0), (-1, -1), 5),
-            # Strong section divider line above
-            ('LINEABOVE', (0, 0), (-1, 0), 0.8, colors.black),
-        ]))
-        main_sections.append([terms_table])
+        main_sections.append([self.terms_table])
 
         # ===== CREATE MAIN TABLE =====
-        main_table = Table(main_sections, colWidths=[page_width])
-        main_table.setStyle(TableStyle([
-            # Strong outer border
-            ('BOX', (0, 0), (-1, -1), 1.2, colors.black),
-            ('VALIGN', (0, 0), (-1, -1), 'TOP'),
-            ('TOPPADDING', (0, 0), (-1, -1), 0),
-            ('BOTTOMPADDING', (0, 0), (-1, -1), 0),
-            ('LEFTPADDING', (0, 0), (-1, -1), 0),
-            ('RIGHTPADDING', (0, 0), (-1, -1), 0),
-        ]))
-
-        elements.append(main_table)
+        main_table = Table(main_sections, colWidths=[self.page_width])
+        main_table.setStyle(self.main_style)
 
         # Build PDF
-        doc.build(elements)
+        doc.build([main_table])
 
         # Get PDF content
         pdf_content = buffer.getvalue()
         buffer.close()
 
         return pdf_content
-
-    except Exception as e:
-        logger.error(f"Error generating RUBY ENTERPRISE PDF: {e}")
-        return None
\ No newline at end of file
@@ -0,0 +1,51 @@
+"""Minimal ASGI request driver for middleware and router tests (httpx, which TestClient needs, is not a dependency)"""
+import asyncio
+
+from starlette.datastructures import Headers
+
+
+class AsgiResponse:
+    def __init__(self, status, headers, chunks):
+        self.status_code = status
+        self.headers = headers
+        self.chunks = chunks
+
+    @property
+    def body(self) -> bytes:
+        return b"".join(self.chunks)
+
+
+def request(app, path: str, headers: dict = None, method: str = "GET") -> AsgiResponse:
+    """Send one request through ``app`` and collect the response, keeping body chunks as sent"""
+    path, _, query = path.partition("?")
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": method,
+        "scheme": "http",
+        "path": path,
+        "raw_path": path.encode(),
+        "root_path": "",
+        "query_string": query.encode(),
+        "headers": [(name.lower().encode(), value.encode()) for name, value in (headers or {}).items()],
+        "client": ("testclient", 50000),
+        "server": ("testserver", 80),
+    }
+    messages = []
+    requests = [{"type": "http.request", "body": b"", "more_body": False}]
+
+    async def receive():
+        if requests:
+            return requests.pop()
+        # The client stays connected; the app's disconnect listener waits here until cancelled
+        await asyncio.Event().wait()
+
+    async def send(message):
+        messages.append(message)
+
+    asyncio.run(app(scope, receive, send))
+
+    [start] = [message for message in messages if message["type"] == "http.response.start"]
+    chunks = [message.get("body", b"") for message in messages if message["type"] == "http.response.body"]
+    return AsgiResponse(start["status"], Headers(raw=start["headers"]), chunks)
@@ -0,0 +1,83 @@
+"""In-memory stand-ins for psycopg2 connections, enough for the pool and transaction code"""
+import psycopg2
+import psycopg2.extensions
+
+
+class FakeCursor:
+    def __init__(self, conn):
+        self.conn = conn
+        self.rowcount = 0
+        self._rows = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+    def execute(self, query, params=None):
+        if not self.conn.alive:
+            raise psycopg2.OperationalError("server closed the connection unexpectedly")
+        self.conn.log.append(query)
+        if not self.conn.autocommit:
+            self.conn.in_transaction = True
+        error = self.conn.errors.get(query)
+        if error is not None:
+            raise error
+        self._rows = list(self.conn.results.get(query, []))
+        self.rowcount = len(self._rows)
+
+    def fetchone(self):
+        return self._rows[0] if self._rows else None
+
+    def fetchall(self):
+        return self._rows
+
+
+class FakeConnection:
+    """Records statements, commits and rollbacks; ``errors``/``results`` map a statement to its outcome"""
+
+    def __init__(self, log=None):
+        self.log = log if log is not None else []
+        self.errors = {}
+        self.results = {}
+        self.autocommit = False
+        self.closed = 0
+        self.alive = True
+        self.in_transaction = False
+
+    def cursor(self, cursor_factory=None):
+        return FakeCursor(self)
+
+    def commit(self):
+        self.log.append("COMMIT")
+        self.in_transaction = False
+
+    def rollback(self):
+        if not self.alive:
+            raise psycopg2.OperationalError("server closed the connection unexpectedly")
+        # Like psycopg2, nothing is sent when no transaction is open
+        if self.in_transaction:
+            self.log.append("ROLLBACK")
+        self.in_transaction = False
+
+    def get_transaction_status(self):
+        if self.in_transaction:
+            return psycopg2.extensions.TRANSACTION_STATUS_INTRANS
+        return psycopg2.extensions.TRANSACTION_STATUS_IDLE
+
+    def close(self):
+        self.closed = 1
+
+
+class FakeConnector:
+    """Replacement for ``psycopg2.connect`` that keeps every connection it opened"""
+
+    def __init__(self):
+        self.log = []
+        self.opened = []
+
+    def __call__(self, **kwargs):
+        conn = FakeConnection(self.log)
+        self.opened.append(conn)
+        return conn
@@ -0,0 +1,125 @@
+import gzip
+import zlib
+
+import pytest
+from starlette.applications import Starlette
+from starlette.responses import JSONResponse, Response, StreamingResponse
+from starlette.routing import Route
+
+from asgi_client import request
+from compression import CompressionMiddleware, choose_encoding
+
+LARGE = {"rows": [{"id": n, "name": f"Customer {n}"} for n in range(200)]}
+
+
+async def small(request):
+    return JSONResponse({"ok": True})
+
+
+async def large(request):
+    return JSONResponse(LARGE)
+
+
+async def no_content(request):
+    return Response(status_code=204, media_type="application/json")
+
+
+async def not_modified(request):
+    return Response(status_code=304, media_type="application/json", headers={"ETag": 'W/"v1"'})
+
+
+async def pre_encoded(request):
+    return Response(gzip.compress(b'{"already": "gzipped"}'), media_type="application/json", headers={"Content-Encoding": "gzip"})
+
+
+async def pdf(request):
+    return Response(b"%PDF-1.4" + b"0" * 5000, media_type="application/pdf")
+
+
+async def export(request):
+    async def lines():
+        for n in range(3):
+            yield f'{{"row": {n}}}\n'
+    return StreamingResponse(lines(), media_type="application/x-ndjson")
+
+
+def _app(minimum_size):
+    routes = [
+        Route("/small", small), Route("/large", large), Route("/no-content", no_content),
+        Route("/not-modified", not_modified), Route("/pre-encoded", pre_encoded),
+        Route("/pdf", pdf), Route("/export", export),
+    ]
+    return CompressionMiddleware(Starlette(routes=routes), minimum_size=minimum_size)
+
+
+@pytest.fixture
+def app():
+    return _app(minimum_size=500)
+
+
+def test_large_json_is_gzipped_with_vary(app):
+    response = request(app, "/large", {"Accept-Encoding": "gzip"})
+
+    assert response.headers["content-encoding"] == "gzip"
+    assert response.headers["vary"] == "Accept-Encoding"
+    assert int(response.headers["content-length"]) == len(response.body)
+    assert gzip.decompress(response.body) == JSONResponse(LARGE).body
+
+
+def test_small_body_is_passed_through_but_still_varies(app):
+    response = request(app, "/small", {"Accept-Encoding": "gzip"})
+
+    assert "content-encoding" not in response.headers
+    assert response.body == b'{"ok":true}'
+    # A larger version of the same resource could be compressed, so caches must key on it
+    assert response.headers["vary"] == "Accept-Encoding"
+
+
+def test_client_without_gzip_gets_identity(app):
+    response = request(app, "/large")
+
+    assert "content-encoding" not in response.headers
+    assert response.body == JSONResponse(LARGE).body
+
+
+@pytest.mark.parametrize("path", ["/no-content", "/not-modified"])
+def test_bodiless_statuses_are_skipped(path):
+    # Even with no minimum size, 204 and 304 stay without Content-Encoding
+    response = request(_app(minimum_size=0), path, {"Accept-Encoding": "gzip"})
+
+    assert "content-encoding" not in response.headers
+    assert response.body == b""
+
+
+def test_already_encoded_response_is_not_compressed_twice(app):
+    response = request(app, "/pre-encoded", {"Accept-Encoding": "gzip"})
+
+    assert response.headers["content-encoding"] == "gzip"
+    assert gzip.decompress(response.body) == b'{"already": "gzipped"}'
+
+
+def test_pdf_is_sent_as_is(app):
+    response = request(app, "/pdf", {"Accept-Encoding": "gzip"})
+
+    assert "content-encoding" not in response.headers
+    assert response.body.startswith(b"%PDF")
+
+
+def test_streamed_ndjson_is_compressed_and_flushed_per_chunk(app):
+    response = request(app, "/export", {"Accept-Encoding": "gzip"})
+
+    assert response.headers["content-encoding"] == "gzip"
+    assert "content-length" not in response.headers
+    # Each chunk decompresses on arrival, so rows are not held back
+    decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS)
+    lines = [decompressor.decompress(chunk) for chunk in response.chunks]
+    assert lines[:3] == [b'{"row": 0}\n', b'{"row": 1}\n', b'{"row": 2}\n']
+    assert b"".join(lines) == b'{"row": 0}\n{"row": 1}\n{"row": 2}\n'
+    assert decompressor.eof
+
+
+def test_choose_encoding():
+    assert choose_encoding("gzip, deflate") == "gzip"
+    assert choose_encoding("*") == "gzip"
+    assert choose_encoding("gzip;q=0, identity") is None
+    assert choose_encoding("") is None
@@ -0,0 +1,117 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+from services.dashboard_cache import CacheEntry, DashboardCache, MemoryDashboardCache, SqliteDashboardCache
+
+KEY = "dashboard:stats"
+
+
+class CountingCompute:
+    """Blocking compute that counts its calls and can hold them until released"""
+
+    def __init__(self, hold=False):
+        self.calls = 0
+        self.release = threading.Event()
+        if not hold:
+            self.release.set()
+
+    def __call__(self):
+        self.calls += 1
+        call = self.calls
+        self.release.wait(5)
+        return {"call": call}
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def backend(request, tmp_path):
+    if request.param == "memory":
+        return MemoryDashboardCache()
+    return SqliteDashboardCache(str(tmp_path / "cache.sqlite3"))
+
+
+def test_concurrent_misses_share_one_computation(backend):
+    cache = DashboardCache(backend, ttl=60, stale_ttl=60)
+    compute = CountingCompute(hold=True)
+
+    async def scenario():
+        callers = [asyncio.ensure_future(cache.get_or_compute(KEY, compute)) for _ in range(10)]
+        await asyncio.sleep(0.05)
+        compute.release.set()
+        return await asyncio.gather(*callers)
+
+    results = asyncio.run(scenario())
+
+    assert compute.calls == 1
+    assert results == [{"call": 1}] * 10
+    assert cache.stats()["misses"] == 10 and cache.stats()["recomputes"] == 1
+    # Later callers hit the stored entry
+    assert asyncio.run(cache.get_or_compute(KEY, compute)) == {"call": 1}
+    assert compute.calls == 1 and cache.hits == 1
+
+
+def test_stale_entry_is_served_while_one_refresh_runs(backend):
+    cache = DashboardCache(backend, ttl=60, stale_ttl=60)
+    compute = CountingCompute()
+
+    async def scenario():
+        await cache.get_or_compute(KEY, compute)
+        # Age the entry past its fresh window
+        cache.put(KEY, {"call": 1}, ttl=-1, stale_ttl=60)
+        served = await asyncio.gather(*(cache.get_or_compute(KEY, compute) for _ in range(3)))
+        refresh = cache._inflight.get(KEY)
+        assert refresh is not None
+        await refresh
+        return served
+
+    served = asyncio.run(scenario())
+
+    assert served == [{"call": 1}] * 3
+    assert cache.stale_hits == 3
+    assert compute.calls == 2
+    assert backend.get(KEY).value == {"call": 2}
+
+
+def test_value_computed_across_an_invalidation_is_not_stored(backend):
+    cache = DashboardCache(backend, ttl=60, stale_ttl=60)
+
+    def compute():
+        time.sleep(0.01)
+        # A write lands while the old numbers are being computed
+        cache.invalidate(KEY)
+        return {"call": 1}
+
+    assert asyncio.run(cache.get_or_compute(KEY, compute)) == {"call": 1}
+    assert backend.get(KEY) is None
+
+
+def test_set_is_refused_after_invalidate(backend):
+    computed_since = time.time()
+    time.sleep(0.01)
+    backend.invalidate(KEY)
+
+    entry = CacheEntry({"call": 1}, time.time() + 60, time.time() + 120)
+    assert backend.set(KEY, entry, computed_since) is False
+    assert backend.get(KEY) is None
+    # A computation that started after the invalidation may store its result
+    assert backend.set(KEY, entry, time.time()) is True
+
+
+def test_workers_sharing_sqlite_compute_once(tmp_path):
+    path = str(tmp_path / "cache.sqlite3")
+    first = DashboardCache(SqliteDashboardCache(path), ttl=60, stale_ttl=60, lease_ttl=5)
+    second = DashboardCache(SqliteDashboardCache(path), ttl=60, stale_ttl=60, lease_ttl=5)
+    compute = CountingCompute(hold=True)
+
+    async def scenario():
+        leader = asyncio.ensure_future(first.get_or_compute(KEY, compute))
+        await asyncio.sleep(0.05)
+        follower = asyncio.ensure_future(second.get_or_compute(KEY, compute))
+        await asyncio.sleep(0.05)
+        compute.release.set()
+        return await asyncio.gather(leader, follower)
+
+    assert asyncio.run(scenario()) == [{"call": 1}, {"call": 1}]
+    assert compute.calls == 1
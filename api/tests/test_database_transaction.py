@@ -0,0 +1,190 @@
+import asyncio
+from contextlib import asynccontextmanager
+
+import psycopg2
+import pytest
+
+from db.async_database import AsyncDatabase
+from db.database import Database
+from db.pool import ConnectionPool
+from pg_fakes import FakeConnector
+
+
+@pytest.fixture
+def connector(monkeypatch):
+    connector = FakeConnector()
+    monkeypatch.setattr(psycopg2, "connect", connector)
+    return connector
+
+
+@pytest.fixture
+def db(connector):
+    # A single connection: a query that checked out a second one would time out
+    database = Database()
+    database.pool = ConnectionPool(minconn=0, maxconn=1, timeout=0.1)
+    yield database
+    database.close()
+
+
+def test_queries_inside_the_block_share_one_connection_and_commit_once(db, connector):
+    with db.transaction() as conn:
+        db.execute("INSERT a")
+        db.fetch_one("SELECT b")
+        db.fetch_all("SELECT c")
+        db.fetch_returning("UPDATE d RETURNING *")
+        assert not conn.autocommit
+
+    assert len(connector.opened) == 1
+    assert connector.log == ["INSERT a", "SELECT b", "SELECT c", "UPDATE d RETURNING *", "COMMIT"]
+
+
+def test_nested_failure_rolls_back_only_its_savepoint(db, connector):
+    with db.transaction():
+        db.execute("INSERT a")
+        with pytest.raises(ValueError):
+            with db.transaction():
+                db.execute("INSERT b")
+                raise ValueError("line rejected")
+        with db.transaction():
+            db.execute("INSERT c")
+
+    assert connector.log == [
+        "INSERT a",
+        "SAVEPOINT sp_1", "INSERT b", "ROLLBACK TO SAVEPOINT sp_1",
+        "SAVEPOINT sp_1", "INSERT c", "RELEASE SAVEPOINT sp_1",
+        "COMMIT",
+    ]
+
+
+def test_failed_statement_in_a_savepoint_is_recoverable(db, connector):
+    with db.transaction() as conn:
+        conn.errors["INSERT duplicate"] = psycopg2.IntegrityError("duplicate key")
+        with pytest.raises(Exception, match="Data integrity violation"):
+            with db.transaction():
+                db.execute("INSERT duplicate")
+        db.execute("INSERT other")
+
+    assert connector.log[-3:] == ["ROLLBACK TO SAVEPOINT sp_1", "INSERT other", "COMMIT"]
+
+
+def test_outer_failure_rolls_everything_back(db, connector):
+    with pytest.raises(ValueError):
+        with db.transaction():
+            db.execute("INSERT a")
+            with db.transaction():
+                db.execute("INSERT b")
+            raise ValueError("invoice rejected")
+
+    assert "COMMIT" not in connector.log
+    assert connector.log[-1] == "ROLLBACK"
+
+
+def test_driver_errors_are_mapped(db, connector):
+    with pytest.raises(Exception, match="Database query failed"):
+        with db.transaction() as conn:
+            conn.errors["SELECT broken"] = psycopg2.ProgrammingError("syntax error")
+            with conn.cursor() as cursor:
+                cursor.execute("SELECT broken")
+    assert connector.log[-1] == "ROLLBACK"
+
+
+def test_autocommit_is_restored_when_the_connection_returns(db, connector):
+    with db.transaction():
+        db.execute("INSERT a")
+
+    [conn] = connector.opened
+    assert conn.autocommit
+    # Outside a transaction the same connection is reused and autocommits again
+    db.execute("INSERT b")
+    assert len(connector.opened) == 1
+    assert connector.log[-1] == "INSERT b"
+    assert db.pool.stats()["in_use"] == 0
+
+
+class _FakeAsyncTransaction:
+    def __init__(self, conn, nested):
+        self.conn = conn
+        self.nested = nested
+
+    async def start(self):
+        self.conn.log.append("SAVEPOINT" if self.nested else "BEGIN")
+
+    async def commit(self):
+        self.conn.log.append("RELEASE SAVEPOINT" if self.nested else "COMMIT")
+
+    async def rollback(self):
+        self.conn.log.append("ROLLBACK TO SAVEPOINT" if self.nested else "ROLLBACK")
+
+    async def __aenter__(self):
+        await self.start()
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            await self.commit()
+        else:
+            await self.rollback()
+        return False
+
+
+class _FakeAsyncConnection:
+    def __init__(self, log):
+        self.log = log
+        self.started = 0
+
+    def transaction(self):
+        self.started += 1
+        return _FakeAsyncTransaction(self, nested=self.started > 1)
+
+    async def execute(self, query, *args):
+        self.log.append(query)
+        return "INSERT 0 1"
+
+    async def fetchrow(self, query, *args):
+        self.log.append(query)
+        return None
+
+
+class _FakeAsyncPool:
+    def __init__(self):
+        self.log = []
+        self.acquired = 0
+
+    @asynccontextmanager
+    async def acquire(self, timeout=None):
+        self.acquired += 1
+        yield _FakeAsyncConnection(self.log)
+
+
+def test_async_transaction_shares_the_connection_and_uses_savepoints():
+    database = AsyncDatabase()
+    database.pool = _FakeAsyncPool()
+
+    async def scenario():
+        async with database.transaction():
+            await database.execute("INSERT a")
+            with pytest.raises(ValueError):
+                async with database.transaction():
+                    await database.execute("INSERT b")
+                    raise ValueError("line rejected")
+            await database.fetch_one("SELECT c")
+
+    asyncio.run(scenario())
+    assert database.pool.acquired == 1
+    assert database.pool.log == [
+        "BEGIN", "INSERT a", "SAVEPOINT", "INSERT b", "ROLLBACK TO SAVEPOINT", "SELECT c", "COMMIT"
+    ]
+
+
+def test_async_outer_failure_rolls_back():
+    database = AsyncDatabase()
+    database.pool = _FakeAsyncPool()
+
+    async def scenario():
+        async with database.transaction():
+            await database.execute("INSERT a")
+            raise ValueError("invoice rejected")
+
+    with pytest.raises(ValueError):
+        asyncio.run(scenario())
+    assert database.pool.log == ["BEGIN", "INSERT a", "ROLLBACK"]
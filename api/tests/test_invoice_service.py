@@ -0,0 +1,256 @@
+import asyncio
+import uuid
+from datetime import date
+from decimal import Decimal
+from contextlib import contextmanager
+
+import pytest
+from fastapi import HTTPException
+
+from db.instrumentation import assert_query_budget, record_query
+from models.invoice_models import InvoiceCreateRequest, InvoiceItemRequest, InvoiceResponse, InvoiceUpdateRequest
+from services import invoice_service
+
+CUSTOMER_ID = str(uuid.uuid4())
+PRODUCT_ID = str(uuid.uuid4())
+
+
+class _FakeDb:
+    """Answers the bulk lookups the way Postgres does: ids match case-insensitively, rows carry lowercase ids"""
+
+    def fetch_all(self, query, params=None):
+        requested = {value.lower() for value in params[0]}
+        if "FROM customers" in query:
+            rows = [{'id': CUSTOMER_ID, 'billing_address': None}]
+        else:
+            rows = [{'id': PRODUCT_ID, 'name': "Widget", 'price': 10, 'tax_rate': 18}]
+        return [row for row in rows if row['id'] in requested]
+
+
+def test_bulk_create_accepts_uppercase_ids(monkeypatch):
+    inserted = []
+
+    def fake_insert(header_rows, item_rows):
+        inserted.extend(item_rows)
+        return {row[0]: f"INV-{n}" for n, row in enumerate(header_rows)}
+
+    monkeypatch.setattr(invoice_service, "db", _FakeDb())
+    monkeypatch.setattr(invoice_service, "_insert_invoices_batch", fake_insert)
+    monkeypatch.setattr(invoice_service, "invalidate_dashboard_stats", lambda: None)
+
+    request = InvoiceCreateRequest(
+        customer_id=CUSTOMER_ID.upper(),
+        items=[InvoiceItemRequest(product_id=PRODUCT_ID.upper(), description="", quantity=2, unit_price=0)]
+    )
+    response = invoice_service.create_invoices_bulk([request])
+
+    assert response.created == 1, response.results[0].error
+    assert response.failed == 0
+    # Product defaults were found through the uppercase id
+    assert inserted[0][3] == "Widget"
+    assert inserted[0][5] == 10.0
+
+
+INVOICE_ID = str(uuid.uuid4())
+KEPT_ID = str(uuid.uuid4())
+CHANGED_ID = str(uuid.uuid4())
+REMOVED_ID = str(uuid.uuid4())
+
+
+def _stored_item(item_id, description, quantity, unit_price=10.0, product_id=None):
+    taxable = quantity * unit_price
+    return {
+        'id': item_id, 'product_id': product_id, 'description': description, 'quantity': quantity,
+        'unit_price': unit_price, 'tax_rate': 18.0, 'discount_percentage': 0.0, 'discount_amount': 0.0,
+        'taxable_amount': taxable, 'tax_amount': taxable * 0.18, 'line_total': taxable * 1.18,
+    }
+
+
+class _FakeCursor:
+    """Plays the statements of an invoice update against in-memory rows and reports them like RecordingCursor"""
+
+    def __init__(self, db):
+        self.db = db
+        self.rows = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+    def execute(self, query, params=None):
+        record_query(query, 0.0, 0)
+        self.db.statements.append((query, params))
+        if query == invoice_service.LOCK_INVOICE_QUERY:
+            self.rows = [{'id': INVOICE_ID}] if self.db.invoice_exists else []
+        elif query == invoice_service.EXISTING_ITEMS_QUERY:
+            self.rows = self.db.stored_items
+        elif "FROM products" in query:
+            self.rows = [row for row in self.db.products if row['id'] in params[0]]
+        else:
+            self.rows = []
+
+    def fetchone(self):
+        return self.rows[0] if self.rows else None
+
+    def fetchall(self):
+        return self.rows
+
+
+class _FakeConnection:
+    def __init__(self, db):
+        self.db = db
+
+    def cursor(self, cursor_factory=None):
+        return _FakeCursor(self.db)
+
+
+class _TransactionDb:
+    def __init__(self, stored_items, products=()):
+        self.stored_items = stored_items
+        self.products = list(products)
+        self.invoice_exists = True
+        self.statements = []
+        self.committed = False
+
+    @contextmanager
+    def transaction(self):
+        yield _FakeConnection(self)
+        self.committed = True
+
+    def executed(self, query):
+        return [params for statement, params in self.statements if statement == query]
+
+
+@pytest.fixture
+def update_db(monkeypatch):
+    db = _TransactionDb([
+        _stored_item(KEPT_ID, "Kept", 2),
+        _stored_item(CHANGED_ID, "Changed", 1),
+        _stored_item(REMOVED_ID, "Removed", 5),
+    ], products=[{'id': PRODUCT_ID, 'name': "Widget", 'price': 7, 'tax_rate': 5}])
+
+    # One statement per call, as for a single page of rows
+    def fake_execute_batch(cursor, query, rows, page_size=100):
+        cursor.execute(query, list(rows))
+
+    def fake_execute_values(cursor, query, rows, page_size=100, fetch=False):
+        cursor.execute(query, list(rows))
+
+    monkeypatch.setattr(invoice_service, "db", db)
+    monkeypatch.setattr(invoice_service, "execute_batch", fake_execute_batch)
+    monkeypatch.setattr(invoice_service, "execute_values", fake_execute_values)
+    return db
+
+
+def _line(description, quantity, item_id=None, unit_price=10, product_id=None):
+    return InvoiceItemRequest(
+        id=item_id, product_id=product_id, description=description, quantity=quantity, unit_price=unit_price, tax_rate=18
+    )
+
+
+def test_update_diffs_items_against_stored_lines(update_db):
+    updated = invoice_service._apply_invoice_update(INVOICE_ID, InvoiceUpdateRequest(items=[
+        _line("Kept", 2, KEPT_ID),
+        _line("Changed", 3, CHANGED_ID),
+        _line("New", 4),
+    ]))
+
+    assert updated and update_db.committed
+    # The changed line goes through the batched UPDATE; the unchanged one is not rewritten
+    [updates] = update_db.executed(invoice_service.UPDATE_INVOICE_ITEM_QUERY)
+    assert [row[-2] for row in updates] == [CHANGED_ID]
+    assert updates[0][2] == 3.0
+    # New lines are inserted, omitted ones deleted
+    [inserts] = [params for statement, params in update_db.statements if statement.startswith("\n    INSERT INTO invoice_items")]
+    assert [row[3] for row in inserts] == ["New"]
+    assert update_db.executed(invoice_service.DELETE_INVOICE_ITEMS_QUERY) == [(INVOICE_ID, [REMOVED_ID])]
+
+
+def test_unchanged_lines_keep_their_stored_amounts(update_db):
+    # Amounts equal at the stored NUMERIC(_,2) precision are not rewritten
+    update_db.stored_items[0]['taxable_amount'] = 20.001
+    update_db.stored_items[0]['tax_amount'] = 3.6004
+    invoice_service._apply_invoice_update(INVOICE_ID, InvoiceUpdateRequest(items=[
+        _line("Kept", 2, KEPT_ID),
+        _line("Changed", 1, CHANGED_ID),
+    ]))
+
+    assert update_db.executed(invoice_service.UPDATE_INVOICE_ITEM_QUERY) == []
+    assert update_db.executed(invoice_service.DELETE_INVOICE_ITEMS_QUERY) == [(INVOICE_ID, [REMOVED_ID])]
+
+
+def test_update_leaves_invoice_totals_to_the_items_trigger(update_db):
+    invoice_service._apply_invoice_update(INVOICE_ID, InvoiceUpdateRequest(items=[_line("New", 4)]))
+
+    assert update_db.committed
+    assert not [statement for statement, _ in update_db.statements if "UPDATE invoices" in statement]
+
+
+def test_update_accepts_uppercase_item_and_product_ids(update_db):
+    invoice_service._apply_invoice_update(INVOICE_ID, InvoiceUpdateRequest(items=[
+        _line("Kept", 2, KEPT_ID.upper()),
+        _line("Changed", 1, CHANGED_ID.upper()),
+        _line("", 1, unit_price=0, product_id=PRODUCT_ID.upper()),
+    ]))
+
+    assert update_db.executed(invoice_service.UPDATE_INVOICE_ITEM_QUERY) == []
+    [inserts] = [params for statement, params in update_db.statements if statement.startswith("\n    INSERT INTO invoice_items")]
+    # Product defaults were found through the uppercase id
+    assert inserts[0][3] == "Widget"
+    assert inserts[0][5] == 7.0
+
+
+def test_duplicate_item_ids_are_rejected(update_db):
+    with pytest.raises(ValueError, match="only once"):
+        invoice_service._apply_invoice_update(INVOICE_ID, InvoiceUpdateRequest(items=[
+            _line("Kept", 2, KEPT_ID),
+            _line("Kept again", 2, KEPT_ID.upper()),
+        ]))
+    assert not update_db.committed
+
+
+def test_foreign_item_id_returns_400(update_db):
+    from routers.invoices import update_existing_invoice
+
+    foreign_id = str(uuid.uuid4())
+    with pytest.raises(HTTPException) as raised:
+        asyncio.run(update_existing_invoice(INVOICE_ID, InvoiceUpdateRequest(items=[_line("Foreign", 1, foreign_id)])))
+    assert raised.value.status_code == 400
+    assert "does not belong" in raised.value.detail
+    assert not update_db.committed
+
+
+def test_update_statement_count_does_not_grow_with_items(update_db):
+    items = [_line("Kept", 2, KEPT_ID), _line("Changed", 9, CHANGED_ID)]
+    items += [_line(f"New {n}", 1) for n in range(50)]
+
+    # Lock, stored items, delete, batched update, multi-row insert
+    with assert_query_budget(max_queries=5, max_repeats=1):
+        invoice_service._apply_invoice_update(INVOICE_ID, InvoiceUpdateRequest(items=items))
+
+
+def test_assembled_invoices_turn_numeric_columns_into_floats():
+    invoice_id = str(uuid.uuid4())
+    # Nullable columns the row would carry as NULL
+    invoice_row = dict.fromkeys(InvoiceResponse.model_fields)
+    invoice_row.update({
+        'id': invoice_id, 'invoice_number': "INV-1", 'customer_id': CUSTOMER_ID, 'customer_name': "Acme",
+        'date': date(2024, 4, 1), 'due_date': date(2024, 5, 1), 'status': "sent",
+        'subtotal': Decimal("20.00"), 'tax_amount': Decimal("3.60"), 'total_amount': Decimal("23.60"),
+        'amount_paid': Decimal("0.00"), 'balance_due': Decimal("23.60"),
+    })
+    del invoice_row['items'], invoice_row['additional_charges']
+    item_row = {
+        'id': KEPT_ID, 'invoice_id': invoice_id, 'product_id': None, 'product_name': None, 'description': "Kept",
+        'hsn_sac_code': None, 'quantity': Decimal("2"), 'unit_price': Decimal("10.00"), 'tax_rate': Decimal("18"),
+        'discount_percentage': Decimal("0"), 'discount_amount': Decimal("0"),
+        'taxable_amount': None, 'tax_amount': None, 'line_total': None,
+    }
+
+    [invoice] = invoice_service._assemble_invoices([invoice_row], [item_row], [])
+
+    data = invoice.dict()
+    assert type(data['total_amount']) is float and data['total_amount'] == 23.6
+    assert type(data['items'][0]['tax_amount']) is float and data['items'][0]['tax_amount'] == pytest.approx(3.6)
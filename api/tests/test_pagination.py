@@ -0,0 +1,139 @@
+import asyncio
+import uuid
+from datetime import datetime, timezone, timedelta
+
+import pytest
+from fastapi import HTTPException
+from starlette.responses import Response
+
+from services.pagination import (
+    Keyset,
+    encode_cursor,
+    decode_cursor,
+    set_pagination_headers,
+    NEXT_CURSOR_HEADER,
+    PREV_CURSOR_HEADER,
+)
+
+NAME_KEYSET = Keyset("name", "id", "name")
+CREATED_KEYSET = Keyset("i.created_at", "i.id", "created_at", descending=True, sort_type="timestamptz")
+
+
+def _rows(count):
+    start = datetime(2024, 1, 1, tzinfo=timezone.utc)
+    return [{"id": str(uuid.uuid4()), "name": f"row {n:02d}", "created_at": start + timedelta(hours=n)} for n in range(count)]
+
+
+def test_cursor_round_trip():
+    row_id = uuid.uuid4()
+    created_at = datetime(2024, 5, 1, 12, 30, tzinfo=timezone.utc)
+
+    assert decode_cursor(encode_cursor("Acme", row_id)) == ("Acme", str(row_id))
+    assert decode_cursor(encode_cursor(created_at, row_id), "timestamptz") == (created_at, str(row_id))
+    # Unpadded base64url, safe to put in a query string
+    assert "=" not in encode_cursor("Acme", row_id)
+
+
+@pytest.mark.parametrize("cursor", ["not-a-cursor", encode_cursor("Acme", "x")[:-3], "W10"])
+def test_tampered_cursor_is_rejected(cursor):
+    with pytest.raises(ValueError, match="Invalid pagination cursor"):
+        NAME_KEYSET.clause(10, after=cursor)
+
+
+def test_first_page_has_no_condition():
+    condition, params, order_and_limit = CREATED_KEYSET.clause(10)
+
+    assert condition is None and params == []
+    assert order_and_limit == " ORDER BY i.created_at DESC, i.id DESC LIMIT %s"
+
+
+def test_after_and_before_walk_in_opposite_directions():
+    row_id = str(uuid.uuid4())
+    cursor = encode_cursor("Acme", row_id)
+
+    condition, params, order_and_limit = NAME_KEYSET.clause(10, after=cursor)
+    assert condition == "(name, id) > (%s::text, %s::uuid)"
+    assert params == ["Acme", row_id]
+    assert order_and_limit == " ORDER BY name ASC, id ASC LIMIT %s"
+
+    condition, params, order_and_limit = NAME_KEYSET.clause(10, before=cursor)
+    assert condition == "(name, id) < (%s::text, %s::uuid)"
+    assert order_and_limit == " ORDER BY name DESC, id DESC LIMIT %s"
+
+    # A descending keyset flips both again
+    condition, _, order_and_limit = CREATED_KEYSET.clause(10, before=encode_cursor(datetime(2024, 1, 1), row_id))
+    assert condition == "(i.created_at, i.id) > (%s::timestamptz, %s::uuid)"
+    assert order_and_limit == " ORDER BY i.created_at ASC, i.id ASC LIMIT %s"
+
+
+def test_after_and_before_together_are_rejected():
+    cursor = encode_cursor("Acme", uuid.uuid4())
+    with pytest.raises(ValueError, match="either"):
+        NAME_KEYSET.clause(10, after=cursor, before=cursor)
+
+
+def test_page_trims_the_extra_row_and_sets_cursors():
+    rows = _rows(4)
+
+    page, next_cursor, prev_cursor = NAME_KEYSET.page(list(rows), 3)
+    assert page == rows[:3]
+    assert decode_cursor(next_cursor) == (rows[2]["name"], rows[2]["id"])
+    assert prev_cursor is None
+
+    # Following a cursor gives a previous-page cursor; the last page has no next one
+    page, next_cursor, prev_cursor = NAME_KEYSET.page(rows[3:], 3, after=encode_cursor(rows[2]["name"], rows[2]["id"]))
+    assert page == rows[3:]
+    assert next_cursor is None
+    assert decode_cursor(prev_cursor) == (rows[3]["name"], rows[3]["id"])
+
+
+def test_before_page_is_reversed_into_display_order():
+    rows = _rows(5)
+    # Walking backwards from rows[4], the query returns rows nearest the cursor first
+    fetched = [rows[3], rows[2], rows[1], rows[0]]
+
+    page, next_cursor, prev_cursor = NAME_KEYSET.page(fetched, 3, before=encode_cursor(rows[4]["name"], rows[4]["id"]))
+    assert page == rows[1:4]
+    assert decode_cursor(prev_cursor) == (rows[1]["name"], rows[1]["id"])
+    assert decode_cursor(next_cursor) == (rows[3]["name"], rows[3]["id"])
+
+    # Reaching the start leaves no previous page
+    page, _, prev_cursor = NAME_KEYSET.page([rows[0]], 3, before=encode_cursor(rows[1]["name"], rows[1]["id"]))
+    assert page == [rows[0]] and prev_cursor is None
+
+
+def test_timestamp_cursor_from_page():
+    rows = _rows(2)
+    _, next_cursor, _ = CREATED_KEYSET.page(list(rows), 1)
+
+    assert decode_cursor(next_cursor, "timestamptz") == (rows[0]["created_at"], rows[0]["id"])
+
+
+def test_pagination_headers():
+    response = Response()
+    set_pagination_headers(response, "next-token", None)
+
+    assert response.headers[NEXT_CURSOR_HEADER] == "next-token"
+    assert PREV_CURSOR_HEADER not in response.headers
+
+
+def test_list_endpoint_sends_cursor_headers(monkeypatch):
+    from routers import products
+
+    async def fake_page(limit, after, before, search):
+        assert (limit, after) == (2, "abc")
+        return [], "next-token", "prev-token"
+
+    monkeypatch.setattr(products, "get_products_page", fake_page)
+    response = asyncio.run(products.get_products(search=None, limit=2, after="abc", before=None))
+
+    assert response.headers[NEXT_CURSOR_HEADER] == "next-token"
+    assert response.headers[PREV_CURSOR_HEADER] == "prev-token"
+
+
+def test_list_endpoint_rejects_a_tampered_cursor_with_400():
+    from routers import products
+
+    with pytest.raises(HTTPException) as raised:
+        asyncio.run(products.get_products(search=None, limit=2, after="not-a-cursor", before=None))
+    assert raised.value.status_code == 400
@@ -0,0 +1,120 @@
+import asyncio
+import threading
+
+import pytest
+
+from services import pdf_batch_service
+from services import pdf_renderer as renderer_module
+from services.pdf_batch_service import BatchEntry, render_batch
+from services.pdf_renderer import PdfRenderBusy, PdfRenderer
+
+
+class _NoCache:
+    def get(self, invoice_id, fingerprint):
+        return None
+
+    def set(self, invoice_id, fingerprint, pdf_content):
+        pass
+
+
+@pytest.fixture
+def renderer(monkeypatch):
+    """One-worker renderer whose renders wait for ``renderer.release``"""
+    renderer = PdfRenderer(workers=0, max_queued=8)
+    renderer.release = threading.Event()
+    renderer.started = threading.Event()
+    renderer.ran = []
+
+    def fake_render(payload):
+        renderer.started.set()
+        renderer.release.wait(5)
+        renderer.ran.append(payload["name"])
+        return b"%PDF", 0.0
+
+    async def fake_load_payloads(invoice_ids):
+        return {invoice_id: {"name": invoice_id} for invoice_id in invoice_ids}
+
+    monkeypatch.setattr(renderer_module, "_timed_render", fake_render)
+    monkeypatch.setattr(pdf_batch_service, "pdf_renderer", renderer)
+    monkeypatch.setattr(pdf_batch_service, "pdf_cache", _NoCache())
+    monkeypatch.setattr(pdf_batch_service, "_load_payloads", fake_load_payloads)
+    yield renderer
+    renderer.release.set()
+    renderer.shutdown()
+
+
+def test_disconnect_mid_batch_cancels_queued_renders(renderer):
+    async def scenario():
+        # Another request's render holds the only worker, so the batch's render queues
+        other = renderer.submit({"name": "other"})
+        assert renderer.started.wait(5)
+
+        batch = render_batch([BatchEntry("a", "INV-1", "f1"), BatchEntry("b", "INV-2", "f2")])
+        download = asyncio.ensure_future(batch.__anext__())
+        await asyncio.sleep(0.05)
+        assert renderer.stats()["in_flight"] == 2
+
+        # The client drops the download while the batch waits on its render
+        download.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await download
+
+        assert renderer.stats()["cancelled"] == 1
+        renderer.release.set()
+        await asyncio.wrap_future(other)
+        return renderer.stats()
+
+    stats = asyncio.run(scenario())
+    assert renderer.ran == ["other"]
+    assert stats["in_flight"] == 0
+
+
+class _SaturatedRenderer:
+    """Renderer whose queue is always full of other requests' work"""
+    workers = 1
+
+    def __init__(self):
+        self.attempts = 0
+
+    def submit(self, payload):
+        self.attempts += 1
+        raise PdfRenderBusy("PDF renderer is busy (20 jobs queued or running)")
+
+
+@pytest.fixture
+def saturated(monkeypatch):
+    renderer = _SaturatedRenderer()
+
+    async def fake_load_payloads(invoice_ids):
+        return {invoice_id: {"name": invoice_id} for invoice_id in invoice_ids}
+
+    monkeypatch.setattr(pdf_batch_service, "pdf_renderer", renderer)
+    monkeypatch.setattr(pdf_batch_service, "pdf_cache", _NoCache())
+    monkeypatch.setattr(pdf_batch_service, "_load_payloads", fake_load_payloads)
+    monkeypatch.setattr(pdf_batch_service, "PDF_BATCH_BUSY_TIMEOUT", 0.3)
+    return renderer
+
+
+def test_batch_gives_up_on_a_saturated_renderer(saturated):
+    async def drain():
+        return [item async for item in render_batch([BatchEntry("a", "INV-1", "f1")])]
+
+    with pytest.raises(PdfRenderBusy):
+        asyncio.run(asyncio.wait_for(drain(), timeout=5))
+    # Retried for the busy timeout rather than once or forever
+    assert 1 < saturated.attempts < 10
+
+
+def test_saturated_batch_download_returns_503(saturated, monkeypatch):
+    from fastapi import HTTPException
+    from models.invoice_models import InvoicePdfBatchRequest
+    from routers import invoices
+
+    async def fake_select_invoices(*args):
+        return [BatchEntry("a", "INV-1", "f1")]
+
+    monkeypatch.setattr(invoices, "select_invoices", fake_select_invoices)
+    with pytest.raises(HTTPException) as raised:
+        asyncio.run(invoices.download_invoice_pdfs(InvoicePdfBatchRequest(status="sent")))
+    assert raised.value.status_code == 503
+    assert raised.value.headers["Retry-After"] == "2"
@@ -0,0 +1,67 @@
+import threading
+
+import pytest
+
+from services import pdf_renderer as renderer_module
+from services.pdf_renderer import PdfRenderer
+
+
+@pytest.fixture
+def blocking_render(monkeypatch):
+    """Replace the render with one that waits for ``release`` and records each payload it ran"""
+    release = threading.Event()
+    started = threading.Event()
+    ran = []
+
+    def fake_render(payload):
+        started.set()
+        release.wait(5)
+        ran.append(payload["name"])
+        return b"%PDF " + payload["name"].encode(), 0.0
+
+    monkeypatch.setattr(renderer_module, "_timed_render", fake_render)
+    return release, started, ran
+
+
+def test_cancelled_queued_render_never_runs(blocking_render):
+    release, started, ran = blocking_render
+    renderer = PdfRenderer(workers=0, max_queued=4)
+    try:
+        running = renderer.submit({"name": "running"})
+        assert started.wait(5)
+        queued = renderer.submit({"name": "queued"})
+        kept = renderer.submit({"name": "kept"})
+
+        assert queued.cancel()
+        release.set()
+
+        assert running.result(5) == b"%PDF running"
+        assert kept.result(5) == b"%PDF kept"
+        assert ran == ["running", "kept"]
+        stats = renderer.stats()
+        assert stats["in_flight"] == 0
+        assert stats["cancelled"] == 1
+        assert stats["failures"] == 0
+    finally:
+        release.set()
+        renderer.shutdown()
+
+
+def test_cancelling_a_running_render_does_not_break_completion(blocking_render, caplog):
+    release, started, ran = blocking_render
+    renderer = PdfRenderer(workers=0, max_queued=4)
+    try:
+        running = renderer.submit({"name": "running"})
+        assert started.wait(5)
+        assert running.cancel()
+        release.set()
+
+        # The render finishes anyway; its slot is released without errors
+        follow_up = renderer.submit({"name": "next"})
+        assert follow_up.result(5) == b"%PDF next"
+        assert ran == ["running", "next"]
+        assert renderer.stats()["in_flight"] == 0
+        assert "exception calling callback" not in caplog.text
+    finally:
+        release.set()
+        renderer.shutdown()
@@ -0,0 +1,89 @@
+import threading
+
+import psycopg2
+import pytest
+
+from db.database import Database
+from db.pool import ConnectionPool, PoolTimeout, PoolClosed
+from pg_fakes import FakeConnector
+
+
+@pytest.fixture
+def connector(monkeypatch):
+    connector = FakeConnector()
+    monkeypatch.setattr(psycopg2, "connect", connector)
+    return connector
+
+
+def test_exhausted_pool_times_out(connector):
+    pool = ConnectionPool(minconn=0, maxconn=1, timeout=0.05)
+    pool.getconn()
+
+    with pytest.raises(PoolTimeout):
+        pool.getconn()
+    assert pool.stats()["timeouts"] == 1
+    assert len(connector.opened) == 1
+
+
+def test_waiter_gets_the_returned_connection(connector):
+    pool = ConnectionPool(minconn=0, maxconn=1, timeout=2)
+    conn = pool.getconn()
+    threading.Timer(0.05, pool.putconn, (conn,)).start()
+
+    assert pool.getconn() is conn
+    assert pool.stats()["waits"] == 1
+
+
+def test_putconn_rolls_back_and_restores_autocommit(connector):
+    pool = ConnectionPool(minconn=0, maxconn=1, timeout=0.05)
+    conn = pool.getconn()
+    assert conn.autocommit
+    conn.autocommit = False
+    with conn.cursor() as cursor:
+        cursor.execute("UPDATE a")
+
+    pool.putconn(conn)
+
+    assert connector.log == ["UPDATE a", "ROLLBACK"]
+    assert conn.autocommit and not conn.closed
+    assert pool.getconn() is conn
+
+
+def test_dead_connection_fails_health_check_and_is_replaced(connector):
+    pool = ConnectionPool(minconn=1, maxconn=1, timeout=0.05, health_check_interval=0)
+    [dead] = connector.opened
+    dead.alive = False
+
+    conn = pool.getconn()
+
+    assert conn is not dead
+    assert dead.closed
+    assert pool.stats()["reconnects"] == 1
+    assert pool.stats()["size"] == 1
+
+
+def test_connection_lost_during_use_is_discarded(connector):
+    pool = ConnectionPool(minconn=0, maxconn=1, timeout=0.05)
+    with pytest.raises(psycopg2.OperationalError):
+        with pool.connection() as conn:
+            conn.alive = False
+            with conn.cursor() as cursor:
+                cursor.execute("SELECT 1")
+
+    assert conn.closed
+    assert pool.stats()["size"] == 0
+    assert pool.getconn() is not conn
+
+
+def test_closed_pool_raises_pool_closed(connector):
+    pool = ConnectionPool(minconn=1, maxconn=1, timeout=0.05)
+    pool.closeall()
+
+    with pytest.raises(PoolClosed):
+        pool.getconn()
+    assert connector.opened[0].closed
+
+    database = Database()
+    database.pool = pool
+    with pytest.raises(Exception, match="Database query failed: Connection pool is closed"):
+        database.fetch_one("SELECT 1")
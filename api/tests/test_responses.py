@@ -0,0 +1,77 @@
+import pytest
+from fastapi import FastAPI
+
+from asgi_client import request
+from compression import CompressionMiddleware
+from responses import cache_headers, etag_matches
+
+PRODUCT_ID = "5b0f4c1e-8d43-4c4e-9a57-2f7d0a6f9b11"
+
+
+def test_cache_headers_send_a_weak_etag():
+    assert cache_headers("abc") == {"ETag": 'W/"abc"', "Cache-Control": "private, no-cache"}
+
+
+@pytest.mark.parametrize("header, matches", [
+    ('W/"abc"', True),
+    ('"abc"', True),
+    ('"old", W/"abc"', True),
+    ("*", True),
+    ('W/"old"', False),
+    ("", False),
+    (None, False),
+])
+def test_etag_matches_uses_weak_comparison(header, matches):
+    assert etag_matches(header, "abc") is matches
+
+
+@pytest.fixture
+def app(monkeypatch):
+    from routers import products
+
+    loads = []
+
+    async def fake_version(product_id):
+        return "v1" if product_id == PRODUCT_ID else None
+
+    async def fake_product(product_id):
+        loads.append(product_id)
+        return {"id": product_id, "name": "Widget"}
+
+    monkeypatch.setattr(products, "get_product_version", fake_version)
+    monkeypatch.setattr(products, "get_product_by_id", fake_product)
+    app = FastAPI()
+    app.include_router(products.router)
+    app.state.loads = loads
+    return CompressionMiddleware(app, minimum_size=0)
+
+
+def test_get_sends_validators(app):
+    response = request(app, f"/products/{PRODUCT_ID}")
+
+    assert response.status_code == 200
+    assert response.headers["etag"] == 'W/"v1"'
+    assert response.headers["cache-control"] == "private, no-cache"
+
+
+@pytest.mark.parametrize("tag", ['W/"v1"', '"v1"'])
+def test_matching_if_none_match_returns_304_without_loading(app, tag):
+    response = request(app, f"/products/{PRODUCT_ID}", {"If-None-Match": tag, "Accept-Encoding": "gzip"})
+
+    assert response.status_code == 304
+    assert response.body == b""
+    assert response.headers["etag"] == 'W/"v1"'
+    assert "content-encoding" not in response.headers
+    assert app.app.state.loads == []
+
+
+def test_stale_if_none_match_returns_the_resource(app):
+    response = request(app, f"/products/{PRODUCT_ID}", {"If-None-Match": 'W/"v0"'})
+
+    assert response.status_code == 200
+    assert response.body == b'{"id":"%s","name":"Widget"}' % PRODUCT_ID.encode()
+    assert app.app.state.loads == [PRODUCT_ID]
+
+
+def test_unknown_resource_is_404(app):
+    assert request(app, "/products/00000000-0000-0000-0000-000000000000").status_code == 404
@@ -0,0 +1,97 @@
+import asyncio
+from datetime import date
+
+import pytest
+
+from db.errors import UndefinedTableError, query_failed
+from services import dashboard_service, revenue_service
+from services.rollups import RollupAvailability
+
+
+class _UndefinedTable(Exception):
+    pgcode = "42P01"
+
+
+def test_query_failed_maps_undefined_table():
+    assert isinstance(query_failed(_UndefinedTable('relation "dashboard_rollups" does not exist')), UndefinedTableError)
+    error = query_failed(Exception("syntax error"))
+    assert not isinstance(error, UndefinedTableError)
+    assert str(error) == "Database query failed: syntax error"
+
+
+class _StatsDb:
+    def __init__(self, rollups_exist):
+        self.rollups_exist = rollups_exist
+        self.queries = []
+
+    def fetch_one(self, query, params=None):
+        self.queries.append(query)
+        if query is dashboard_service.ROLLUP_STATS_QUERY and not self.rollups_exist:
+            raise UndefinedTableError('Database query failed: relation "dashboard_rollups" does not exist')
+        return {key: 0 for key in (
+            'total_invoices', 'total_customers', 'total_products', 'total_revenue', 'paid_revenue',
+            'pending_revenue', 'overdue_revenue', 'paid_count', 'pending_count', 'overdue_count'
+        )}
+
+    def fetch_all(self, query, params=None):
+        return []
+
+
+@pytest.fixture
+def rollups(monkeypatch):
+    rollups = RollupAvailability(recheck_interval=60)
+    monkeypatch.setattr(dashboard_service, "dashboard_rollups", rollups)
+    monkeypatch.setattr(revenue_service, "dashboard_rollups", rollups)
+    return rollups
+
+
+def test_stats_fall_back_and_reprobe_once_migration_is_applied(rollups, monkeypatch, caplog):
+    clock = [1000.0]
+    monkeypatch.setattr("services.rollups.time.monotonic", lambda: clock[0])
+    db = _StatsDb(rollups_exist=False)
+
+    dashboard_service.get_optimized_stats(db)
+    assert db.queries == [dashboard_service.ROLLUP_STATS_QUERY, dashboard_service.AGGREGATE_STATS_QUERY]
+    assert "apply dashboard_rollups.sql" in caplog.text
+
+    # Within the recheck interval the rollups are not probed again
+    db.queries.clear()
+    dashboard_service.get_optimized_stats(db)
+    assert db.queries == [dashboard_service.AGGREGATE_STATS_QUERY]
+
+    # After it, the applied migration is picked up without a restart
+    db.rollups_exist = True
+    db.queries.clear()
+    clock[0] += 61
+    dashboard_service.get_optimized_stats(db)
+    assert db.queries == [dashboard_service.ROLLUP_STATS_QUERY]
+    assert rollups.available()
+
+
+def test_other_errors_are_not_treated_as_missing_rollups(rollups):
+    class BrokenDb(_StatsDb):
+        def fetch_one(self, query, params=None):
+            raise Exception("Database query failed: connection reset")
+
+    with pytest.raises(Exception, match="connection reset"):
+        dashboard_service.get_optimized_stats(BrokenDb(rollups_exist=True))
+    assert rollups.available()
+
+
+def test_revenue_shares_the_rollup_check(rollups, monkeypatch):
+    queries = []
+
+    class FakeAsyncDb:
+        async def fetch_all(self, query, params=None):
+            queries.append(query)
+            if query in revenue_service.ROLLUP_REVENUE_QUERIES.values():
+                raise UndefinedTableError('Database query failed: relation "revenue_daily" does not exist')
+            return []
+
+    monkeypatch.setattr(revenue_service, "async_db", FakeAsyncDb())
+    rows = asyncio.run(revenue_service._fetch_daily(None, date(2025, 1, 1), date(2025, 1, 31)))
+
+    assert rows == []
+    assert queries == [revenue_service.ROLLUP_REVENUE_QUERIES[None], revenue_service.AGGREGATE_REVENUE_QUERIES[None]]
+    # The dashboard stats skip the rollups too until the next recheck
+    assert not rollups.available()
@@ -0,0 +1,282 @@
+-- =====================================================
+-- DASHBOARD ROLLUPS
+-- =====================================================
+-- The dashboard used to aggregate the whole invoices table (and count all
+-- customers and products) on every cache miss. These tables hold the same
+-- numbers pre-aggregated and are kept current by triggers, so the dashboard
+-- reads a few dozen rows regardless of history size. revenue_daily and
+-- revenue_daily_products hold the same amounts per invoice date for the
+-- revenue analytics endpoint (GET /dashboard/revenue).
+--
+-- Payments change invoices.amount_paid and status through
+-- trg_payment_update_invoice, and item changes update invoice totals, so the
+-- triggers on invoices see every write that moves the numbers.
+--
+-- Safe to re-run. After loading data outside the app (or to check for
+-- drift) run:  SELECT public.rebuild_dashboard_rollups();
+-- or:          python scripts/rebuild_dashboard_rollups.py
+
+-- One row per invoice month (from created_at, UTC) and status
+CREATE TABLE IF NOT EXISTS public.dashboard_rollups (
+  month DATE NOT NULL,
+  status TEXT NOT NULL,
+  invoice_count BIGINT NOT NULL DEFAULT 0,
+  total_amount NUMERIC(16,2) NOT NULL DEFAULT 0,
+  amount_paid NUMERIC(16,2) NOT NULL DEFAULT 0,
+  PRIMARY KEY (month, status)
+);
+
+-- Running counts that are not per month (active customers, active products)
+CREATE TABLE IF NOT EXISTS public.dashboard_counters (
+  name TEXT PRIMARY KEY,
+  value BIGINT NOT NULL DEFAULT 0
+);
+
+-- Invoice amounts per invoice date, customer and status
+CREATE TABLE IF NOT EXISTS public.revenue_daily (
+  day DATE NOT NULL,
+  customer_id UUID NOT NULL,
+  status TEXT NOT NULL,
+  invoice_count BIGINT NOT NULL DEFAULT 0,
+  total_amount NUMERIC(16,2) NOT NULL DEFAULT 0,
+  amount_paid NUMERIC(16,2) NOT NULL DEFAULT 0,
+  PRIMARY KEY (day, customer_id, status)
+);
+
+-- Line item amounts per invoice date, product and invoice status (lines without a product are not counted)
+CREATE TABLE IF NOT EXISTS public.revenue_daily_products (
+  day DATE NOT NULL,
+  product_id UUID NOT NULL,
+  status TEXT NOT NULL,
+  quantity NUMERIC(16,2) NOT NULL DEFAULT 0,
+  line_total NUMERIC(16,2) NOT NULL DEFAULT 0,
+  PRIMARY KEY (day, product_id, status)
+);
+
+-- Add (or, with negative deltas, remove) one invoice's contribution
+CREATE OR REPLACE FUNCTION public.apply_dashboard_rollup(
+  p_created_at TIMESTAMPTZ, p_status TEXT, p_count INTEGER, p_total NUMERIC, p_paid NUMERIC
+)
+RETURNS VOID AS $$
+BEGIN
+  INSERT INTO public.dashboard_rollups AS r (month, status, invoice_count, total_amount, amount_paid)
+  VALUES (date_trunc('month', p_created_at AT TIME ZONE 'UTC')::date, p_status, p_count, p_total, p_paid)
+  ON CONFLICT (month, status) DO UPDATE
+  SET
+    invoice_count = r.invoice_count + EXCLUDED.invoice_count,
+    total_amount = r.total_amount + EXCLUDED.total_amount,
+    amount_paid = r.amount_paid + EXCLUDED.amount_paid;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION public.apply_revenue_daily(
+  p_day DATE, p_customer_id UUID, p_status TEXT, p_count INTEGER, p_total NUMERIC, p_paid NUMERIC
+)
+RETURNS VOID AS $$
+BEGIN
+  INSERT INTO public.revenue_daily AS r (day, customer_id, status, invoice_count, total_amount, amount_paid)
+  VALUES (p_day, p_customer_id, p_status, p_count, p_total, p_paid)
+  ON CONFLICT (day, customer_id, status) DO UPDATE
+  SET
+    invoice_count = r.invoice_count + EXCLUDED.invoice_count,
+    total_amount = r.total_amount + EXCLUDED.total_amount,
+    amount_paid = r.amount_paid + EXCLUDED.amount_paid;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Add (p_sign = 1) or remove (p_sign = -1) the line items of one invoice under the given date and status
+CREATE OR REPLACE FUNCTION public.apply_revenue_daily_products(
+  p_invoice_id UUID, p_day DATE, p_status TEXT, p_sign INTEGER
+)
+RETURNS VOID AS $$
+BEGIN
+  INSERT INTO public.revenue_daily_products AS r (day, product_id, status, quantity, line_total)
+  SELECT p_day, ii.product_id, p_status, p_sign * SUM(ii.quantity), p_sign * SUM(COALESCE(ii.line_total, 0))
+  FROM public.invoice_items ii
+  WHERE ii.invoice_id = p_invoice_id AND ii.product_id IS NOT NULL
+  GROUP BY ii.product_id
+  ON CONFLICT (day, product_id, status) DO UPDATE
+  SET
+    quantity = r.quantity + EXCLUDED.quantity,
+    line_total = r.line_total + EXCLUDED.line_total;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION public.update_dashboard_rollups()
+RETURNS TRIGGER AS $$
+BEGIN
+  IF TG_OP = 'UPDATE' OR TG_OP = 'DELETE' THEN
+    PERFORM public.apply_dashboard_rollup(
+      OLD.created_at, OLD.status, -1, -COALESCE(OLD.total_amount, 0), -COALESCE(OLD.amount_paid, 0)
+    );
+    PERFORM public.apply_revenue_daily(
+      OLD.date, OLD.customer_id, OLD.status, -1, -COALESCE(OLD.total_amount, 0), -COALESCE(OLD.amount_paid, 0)
+    );
+  END IF;
+  IF TG_OP = 'INSERT' OR TG_OP = 'UPDATE' THEN
+    PERFORM public.apply_dashboard_rollup(
+      NEW.created_at, NEW.status, 1, COALESCE(NEW.total_amount, 0), COALESCE(NEW.amount_paid, 0)
+    );
+    PERFORM public.apply_revenue_daily(
+      NEW.date, NEW.customer_id, NEW.status, 1, COALESCE(NEW.total_amount, 0), COALESCE(NEW.amount_paid, 0)
+    );
+  END IF;
+  -- A new date or status moves the invoice's line items to another product bucket
+  IF TG_OP = 'UPDATE' AND (OLD.date IS DISTINCT FROM NEW.date OR OLD.status IS DISTINCT FROM NEW.status) THEN
+    PERFORM public.apply_revenue_daily_products(OLD.id, OLD.date, OLD.status, -1);
+    PERFORM public.apply_revenue_daily_products(NEW.id, NEW.date, NEW.status, 1);
+  END IF;
+
+  RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Runs before the cascade removes the items, while they can still be summed
+CREATE OR REPLACE FUNCTION public.remove_invoice_revenue_daily_products()
+RETURNS TRIGGER AS $$
+BEGIN
+  PERFORM public.apply_revenue_daily_products(OLD.id, OLD.date, OLD.status, -1);
+  RETURN OLD;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION public.update_revenue_daily_products()
+RETURNS TRIGGER AS $$
+DECLARE
+  inv RECORD;
+BEGIN
+  IF (TG_OP = 'UPDATE' OR TG_OP = 'DELETE') AND OLD.product_id IS NOT NULL THEN
+    -- Not found when the whole invoice is being deleted; its items were already removed
+    SELECT date, status INTO inv FROM public.invoices WHERE id = OLD.invoice_id;
+    IF FOUND THEN
+      INSERT INTO public.revenue_daily_products AS r (day, product_id, status, quantity, line_total)
+      VALUES (inv.date, OLD.product_id, inv.status, -OLD.quantity, -COALESCE(OLD.line_total, 0))
+      ON CONFLICT (day, product_id, status) DO UPDATE
+      SET quantity = r.quantity + EXCLUDED.quantity, line_total = r.line_total + EXCLUDED.line_total;
+    END IF;
+  END IF;
+  IF (TG_OP = 'INSERT' OR TG_OP = 'UPDATE') AND NEW.product_id IS NOT NULL THEN
+    SELECT date, status INTO inv FROM public.invoices WHERE id = NEW.invoice_id;
+    IF FOUND THEN
+      INSERT INTO public.revenue_daily_products AS r (day, product_id, status, quantity, line_total)
+      VALUES (inv.date, NEW.product_id, inv.status, NEW.quantity, COALESCE(NEW.line_total, 0))
+      ON CONFLICT (day, product_id, status) DO UPDATE
+      SET quantity = r.quantity + EXCLUDED.quantity, line_total = r.line_total + EXCLUDED.line_total;
+    END IF;
+  END IF;
+
+  RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS trg_invoices_dashboard_rollups ON public.invoices;
+CREATE TRIGGER trg_invoices_dashboard_rollups
+AFTER INSERT OR DELETE ON public.invoices
+FOR EACH ROW
+EXECUTE FUNCTION public.update_dashboard_rollups();
+
+-- Updates that leave the aggregated columns alone (notes, transport details, ...) skip the trigger
+DROP TRIGGER IF EXISTS trg_invoices_dashboard_rollups_update ON public.invoices;
+CREATE TRIGGER trg_invoices_dashboard_rollups_update
+AFTER UPDATE ON public.invoices
+FOR EACH ROW
+WHEN (
+  OLD.status IS DISTINCT FROM NEW.status
+  OR OLD.total_amount IS DISTINCT FROM NEW.total_amount
+  OR OLD.amount_paid IS DISTINCT FROM NEW.amount_paid
+  OR OLD.created_at IS DISTINCT FROM NEW.created_at
+  OR OLD.date IS DISTINCT FROM NEW.date
+  OR OLD.customer_id IS DISTINCT FROM NEW.customer_id
+)
+EXECUTE FUNCTION public.update_dashboard_rollups();
+
+DROP TRIGGER IF EXISTS trg_invoices_revenue_daily_products_delete ON public.invoices;
+CREATE TRIGGER trg_invoices_revenue_daily_products_delete
+BEFORE DELETE ON public.invoices
+FOR EACH ROW
+EXECUTE FUNCTION public.remove_invoice_revenue_daily_products();
+
+DROP TRIGGER IF EXISTS trg_invoice_items_revenue_daily_products ON public.invoice_items;
+CREATE TRIGGER trg_invoice_items_revenue_daily_products
+AFTER INSERT OR UPDATE OF product_id, quantity, line_total, invoice_id OR DELETE ON public.invoice_items
+FOR EACH ROW
+EXECUTE FUNCTION public.update_revenue_daily_products();
+
+-- Keeps dashboard_counters.<TG_ARGV[0]> equal to the number of active rows
+CREATE OR REPLACE FUNCTION public.update_dashboard_active_count()
+RETURNS TRIGGER AS $$
+DECLARE
+  delta INTEGER := 0;
+BEGIN
+  IF TG_OP = 'UPDATE' OR TG_OP = 'DELETE' THEN
+    delta := delta - CASE WHEN COALESCE(OLD.is_active, FALSE) THEN 1 ELSE 0 END;
+  END IF;
+  IF TG_OP = 'INSERT' OR TG_OP = 'UPDATE' THEN
+    delta := delta + CASE WHEN COALESCE(NEW.is_active, FALSE) THEN 1 ELSE 0 END;
+  END IF;
+
+  IF delta <> 0 THEN
+    INSERT INTO public.dashboard_counters AS c (name, value)
+    VALUES (TG_ARGV[0], delta)
+    ON CONFLICT (name) DO UPDATE SET value = c.value + EXCLUDED.value;
+  END IF;
+
+  RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS trg_customers_dashboard_count ON public.customers;
+CREATE TRIGGER trg_customers_dashboard_count
+AFTER INSERT OR UPDATE OF is_active OR DELETE ON public.customers
+FOR EACH ROW
+EXECUTE FUNCTION public.update_dashboard_active_count('active_customers');
+
+DROP TRIGGER IF EXISTS trg_products_dashboard_count ON public.products;
+CREATE TRIGGER trg_products_dashboard_count
+AFTER INSERT OR UPDATE OF is_active OR DELETE ON public.products
+FOR EACH ROW
+EXECUTE FUNCTION public.update_dashboard_active_count('active_products');
+
+-- Recompute everything from the base tables. Writers are blocked (readers
+-- are not) for the duration, so no change is lost or counted twice.
+CREATE OR REPLACE FUNCTION public.rebuild_dashboard_rollups()
+RETURNS VOID AS $$
+BEGIN
+  LOCK TABLE public.invoices, public.invoice_items, public.customers, public.products IN SHARE MODE;
+  LOCK TABLE public.dashboard_rollups, public.dashboard_counters,
+    public.revenue_daily, public.revenue_daily_products IN EXCLUSIVE MODE;
+
+  DELETE FROM public.dashboard_rollups;
+  INSERT INTO public.dashboard_rollups (month, status, invoice_count, total_amount, amount_paid)
+  SELECT
+    date_trunc('month', created_at AT TIME ZONE 'UTC')::date,
+    status,
+    COUNT(*),
+    COALESCE(SUM(total_amount), 0),
+    COALESCE(SUM(amount_paid), 0)
+  FROM public.invoices
+  GROUP BY 1, 2;
+
+  DELETE FROM public.revenue_daily;
+  INSERT INTO public.revenue_daily (day, customer_id, status, invoice_count, total_amount, amount_paid)
+  SELECT date, customer_id, status, COUNT(*), COALESCE(SUM(total_amount), 0), COALESCE(SUM(amount_paid), 0)
+  FROM public.invoices
+  GROUP BY 1, 2, 3;
+
+  DELETE FROM public.revenue_daily_products;
+  INSERT INTO public.revenue_daily_products (day, product_id, status, quantity, line_total)
+  SELECT i.date, ii.product_id, i.status, SUM(ii.quantity), COALESCE(SUM(ii.line_total), 0)
+  FROM public.invoice_items ii
+  JOIN public.invoices i ON i.id = ii.invoice_id
+  WHERE ii.product_id IS NOT NULL
+  GROUP BY 1, 2, 3;
+
+  DELETE FROM public.dashboard_counters;
+  INSERT INTO public.dashboard_counters (name, value)
+  SELECT 'active_customers', COUNT(*) FROM public.customers WHERE is_active = TRUE
+  UNION ALL
+  SELECT 'active_products', COUNT(*) FROM public.products WHERE is_active = TRUE;
+END;
+$$ LANGUAGE plpgsql;
+
+SELECT public.rebuild_dashboard_rollups();
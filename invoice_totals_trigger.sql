@@ -0,0 +1,91 @@
+-- =====================================================
+-- STATEMENT-LEVEL INVOICE TOTALS TRIGGER
+-- =====================================================
+-- Replaces the row-level trg_invoice_items_update_totals, which ran three
+-- SUM subqueries per changed item row (and referenced a nonexistent
+-- invoice_items.amount column). The statement-level triggers below read the
+-- changed rows from transition tables and recompute subtotal, tax_amount and
+-- total_amount once per affected invoice, in one aggregate pass, at the end
+-- of each INSERT/UPDATE/DELETE on invoice_items. Bulk item writes therefore
+-- cost one pass over the touched invoices' items instead of one per row.
+--
+-- Totals are the sums of the items' taxable_amount and tax_amount (computed
+-- from quantity, price, discount and tax rate for older rows stored without
+-- them), matching how the API computes them. Invoices whose totals already
+-- match are not rewritten.
+--
+-- Safe to re-run. Existing invoice totals are left as they are until one of
+-- their items changes.
+
+DROP TRIGGER IF EXISTS trg_invoice_items_update_totals ON public.invoice_items;
+
+CREATE OR REPLACE FUNCTION public.update_invoice_totals()
+RETURNS TRIGGER AS $$
+DECLARE
+  affected UUID[];
+BEGIN
+  -- Transition tables exist only for the events that define them, so each
+  -- branch names only the ones its trigger provides
+  IF TG_OP = 'INSERT' THEN
+    SELECT array_agg(DISTINCT invoice_id) INTO affected FROM new_items;
+  ELSIF TG_OP = 'UPDATE' THEN
+    SELECT array_agg(DISTINCT invoice_id) INTO affected
+    FROM (SELECT invoice_id FROM new_items UNION SELECT invoice_id FROM old_items) changed;
+  ELSE
+    SELECT array_agg(DISTINCT invoice_id) INTO affected FROM old_items;
+  END IF;
+
+  IF affected IS NULL THEN
+    RETURN NULL;
+  END IF;
+
+  UPDATE public.invoices i
+  SET
+    subtotal = t.subtotal,
+    tax_amount = t.tax_amount,
+    total_amount = t.subtotal + t.tax_amount
+  FROM (
+    SELECT
+      a.invoice_id,
+      ROUND(COALESCE(SUM(x.taxable_amount), 0), 2) AS subtotal,
+      ROUND(COALESCE(SUM(COALESCE(ii.tax_amount, x.taxable_amount * ii.tax_rate / 100)), 0), 2) AS tax_amount
+    FROM unnest(affected) AS a(invoice_id)
+    LEFT JOIN public.invoice_items ii ON ii.invoice_id = a.invoice_id
+    LEFT JOIN LATERAL (
+      SELECT COALESCE(
+        ii.taxable_amount,
+        ii.quantity * ii.unit_price
+          - COALESCE(ii.discount_amount, 0)
+          - ii.quantity * ii.unit_price * COALESCE(ii.discount_percentage, 0) / 100
+      ) AS taxable_amount
+    ) x ON TRUE
+    GROUP BY a.invoice_id
+  ) t
+  WHERE i.id = t.invoice_id
+    AND (i.subtotal, i.tax_amount, i.total_amount)
+        IS DISTINCT FROM (t.subtotal, t.tax_amount, t.subtotal + t.tax_amount);
+
+  RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS trg_invoice_items_totals_insert ON public.invoice_items;
+CREATE TRIGGER trg_invoice_items_totals_insert
+AFTER INSERT ON public.invoice_items
+REFERENCING NEW TABLE AS new_items
+FOR EACH STATEMENT
+EXECUTE FUNCTION public.update_invoice_totals();
+
+DROP TRIGGER IF EXISTS trg_invoice_items_totals_update ON public.invoice_items;
+CREATE TRIGGER trg_invoice_items_totals_update
+AFTER UPDATE ON public.invoice_items
+REFERENCING OLD TABLE AS old_items NEW TABLE AS new_items
+FOR EACH STATEMENT
+EXECUTE FUNCTION public.update_invoice_totals();
+
+DROP TRIGGER IF EXISTS trg_invoice_items_totals_delete ON public.invoice_items;
+CREATE TRIGGER trg_invoice_items_totals_delete
+AFTER DELETE ON public.invoice_items
+REFERENCING OLD TABLE AS old_items
+FOR EACH STATEMENT
+EXECUTE FUNCTION public.update_invoice_totals();
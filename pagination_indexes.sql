@@ -0,0 +1,11 @@
+-- =====================================================
+-- KEYSET PAGINATION INDEXES
+-- =====================================================
+-- The list endpoints page with row comparisons such as
+--   WHERE (created_at, id) < ($1, $2) ORDER BY created_at DESC, id DESC LIMIT n
+-- These composite indexes turn every page into a single index range scan.
+
+CREATE INDEX IF NOT EXISTS idx_invoices_created_id ON public.invoices (created_at DESC, id DESC);
+CREATE INDEX IF NOT EXISTS idx_payments_created_id ON public.payments (created_at DESC, id DESC);
+CREATE INDEX IF NOT EXISTS idx_customers_active_name_id ON public.customers (name, id) WHERE is_active = TRUE;
+CREATE INDEX IF NOT EXISTS idx_products_active_name_id ON public.products (name, id) WHERE is_active = TRUE;
@@ -0,0 +1,138 @@
+-- =====================================================
+-- INCREMENTAL PAYMENT TOTALS TRIGGER
+-- =====================================================
+-- Replaces update_invoice_status(), which summed every payment of the
+-- invoice three times per payment row and ignored refunds. The trigger now
+-- adds the changed row's signed amount (refunds count negative) to
+-- invoices.amount_paid and derives the status from the new value, so
+-- recording a payment is one single-row UPDATE however many payments the
+-- invoice already has. Deleting a payment or moving it to another invoice
+-- is handled too.
+--
+-- Status rules (invoice_payment_status): cancelled invoices keep their
+-- status; fully paid -> paid; partly paid -> partially_paid; nothing paid
+-- -> draft stays draft, otherwise overdue past the due date, else sent.
+--
+-- Safe to re-run. To rebuild amount_paid and status from all payments (after
+-- this migration, or whenever drift is suspected) run:
+--   SELECT public.rebuild_invoice_amount_paid();
+-- or:
+--   python scripts/repair_invoice_payments.py [--check]
+
+CREATE OR REPLACE FUNCTION public.invoice_payment_status(
+  p_status TEXT, p_total NUMERIC, p_paid NUMERIC, p_due_date DATE
+)
+RETURNS TEXT AS $$
+  SELECT CASE
+    WHEN p_status = 'cancelled' THEN p_status
+    WHEN p_paid > 0 AND p_paid >= p_total THEN 'paid'
+    WHEN p_paid > 0 THEN 'partially_paid'
+    WHEN p_status = 'draft' THEN p_status
+    WHEN p_due_date < CURRENT_DATE THEN 'overdue'
+    ELSE 'sent'
+  END
+$$ LANGUAGE sql STABLE;
+
+CREATE OR REPLACE FUNCTION public.apply_invoice_payment(p_invoice_id UUID, p_delta NUMERIC)
+RETURNS VOID AS $$
+BEGIN
+  UPDATE public.invoices i
+  SET
+    amount_paid = COALESCE(i.amount_paid, 0) + p_delta,
+    status = public.invoice_payment_status(i.status, i.total_amount, COALESCE(i.amount_paid, 0) + p_delta, i.due_date)
+  WHERE i.id = p_invoice_id;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION public.update_invoice_status()
+RETURNS TRIGGER AS $$
+DECLARE
+  old_amount NUMERIC := 0;
+  new_amount NUMERIC := 0;
+BEGIN
+  IF TG_OP = 'UPDATE' OR TG_OP = 'DELETE' THEN
+    old_amount := CASE WHEN COALESCE(OLD.is_refund, FALSE) THEN -OLD.amount ELSE OLD.amount END;
+  END IF;
+  IF TG_OP = 'INSERT' OR TG_OP = 'UPDATE' THEN
+    new_amount := CASE WHEN COALESCE(NEW.is_refund, FALSE) THEN -NEW.amount ELSE NEW.amount END;
+  END IF;
+
+  IF TG_OP = 'UPDATE' THEN
+    IF OLD.invoice_id IS NOT DISTINCT FROM NEW.invoice_id THEN
+      -- Same invoice: one UPDATE with the net change
+      IF NEW.invoice_id IS NOT NULL AND new_amount <> old_amount THEN
+        PERFORM public.apply_invoice_payment(NEW.invoice_id, new_amount - old_amount);
+      END IF;
+      RETURN NULL;
+    END IF;
+  END IF;
+
+  IF TG_OP <> 'INSERT' THEN
+    IF OLD.invoice_id IS NOT NULL THEN
+      PERFORM public.apply_invoice_payment(OLD.invoice_id, -old_amount);
+    END IF;
+  END IF;
+  IF TG_OP <> 'DELETE' THEN
+    IF NEW.invoice_id IS NOT NULL THEN
+      PERFORM public.apply_invoice_payment(NEW.invoice_id, new_amount);
+    END IF;
+  END IF;
+
+  RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS trg_payment_update_invoice ON public.payments;
+CREATE TRIGGER trg_payment_update_invoice
+AFTER INSERT OR DELETE ON public.payments
+FOR EACH ROW
+EXECUTE FUNCTION public.update_invoice_status();
+
+-- Edits to notes, method or reference do not touch the invoice
+DROP TRIGGER IF EXISTS trg_payment_update_invoice_update ON public.payments;
+CREATE TRIGGER trg_payment_update_invoice_update
+AFTER UPDATE ON public.payments
+FOR EACH ROW
+WHEN (
+  OLD.amount IS DISTINCT FROM NEW.amount
+  OR OLD.is_refund IS DISTINCT FROM NEW.is_refund
+  OR OLD.invoice_id IS DISTINCT FROM NEW.invoice_id
+)
+EXECUTE FUNCTION public.update_invoice_status();
+
+-- amount_paid and status recomputed from every payment in one aggregate pass.
+-- Payment writes wait while it runs. Returns the number of invoices corrected.
+CREATE OR REPLACE FUNCTION public.rebuild_invoice_amount_paid()
+RETURNS INTEGER AS $$
+DECLARE
+  corrected INTEGER;
+BEGIN
+  LOCK TABLE public.payments IN SHARE MODE;
+
+  WITH paid AS (
+    SELECT
+      i.id,
+      COALESCE(SUM(CASE WHEN COALESCE(p.is_refund, FALSE) THEN -p.amount ELSE p.amount END), 0) AS amount_paid
+    FROM public.invoices i
+    LEFT JOIN public.payments p ON p.invoice_id = i.id
+    GROUP BY i.id
+  )
+  UPDATE public.invoices i
+  SET
+    amount_paid = paid.amount_paid,
+    status = public.invoice_payment_status(i.status, i.total_amount, paid.amount_paid, i.due_date)
+  FROM paid
+  WHERE i.id = paid.id
+    AND (
+      COALESCE(i.amount_paid, 0) <> paid.amount_paid
+      -- Statuses that contradict the payments; unpaid invoices are not re-aged here
+      OR (
+        (paid.amount_paid > 0 OR i.status IN ('paid', 'partially_paid'))
+        AND i.status <> public.invoice_payment_status(i.status, i.total_amount, paid.amount_paid, i.due_date)
+      )
+    );
+
+  GET DIAGNOSTICS corrected = ROW_COUNT;
+  RETURN corrected;
+END;
+$$ LANGUAGE plpgsql;
@@ -81,6 +81,7 @@ CREATE TABLE public.customers (
 CREATE INDEX idx_customers_name ON public.customers (name);
 CREATE INDEX idx_customers_email ON public.customers (email);
 CREATE INDEX idx_customers_phone ON public.customers (phone);
+CREATE INDEX idx_customers_active_name_id ON public.customers (name, id) WHERE is_active = TRUE;
 
 -- 📦 PRODUCTS TABLE
 CREATE TABLE public.products (
@@ -100,6 +101,7 @@ CREATE TABLE public.products (
 -- Create index for product search
 CREATE INDEX idx_products_name ON public.products (name);
 CREATE INDEX idx_products_hsn_sac ON public.products (hsn_sac_code);
+CREATE INDEX idx_products_active_name_id ON public.products (name, id) WHERE is_active = TRUE;
 
 -- 🧾 INVOICES TABLE
 CREATE TABLE public.invoices (
@@ -159,6 +161,7 @@ CREATE INDEX idx_invoices_customer ON public.invoices (customer_id);
 CREATE INDEX idx_invoices_status ON public.invoices (status);
 CREATE INDEX idx_invoices_date ON public.invoices (date);
 CREATE INDEX idx_invoices_due_date ON public.invoices (due_date);
+CREATE INDEX idx_invoices_created_id ON public.invoices (created_at DESC, id DESC);
 
 -- 📄 INVOICE ITEMS TABLE
 CREATE TABLE public.invoice_items (
@@ -218,82 +221,194 @@ CREATE TABLE public.payments (
 CREATE INDEX idx_payments_invoice ON public.payments (invoice_id);
 CREATE INDEX idx_payments_customer ON public.payments (customer_id);
 CREATE INDEX idx_payments_date ON public.payments (date);
+CREATE INDEX idx_payments_created_id ON public.payments (created_at DESC, id DESC);
+
+-- Keep invoice amount_paid and status in step with payments, one row update per
+-- payment change, refunds counted negative (see payment_status_trigger.sql)
+CREATE OR REPLACE FUNCTION public.invoice_payment_status(
+  p_status TEXT, p_total NUMERIC, p_paid NUMERIC, p_due_date DATE
+)
+RETURNS TEXT AS $$
+  SELECT CASE
+    WHEN p_status = 'cancelled' THEN p_status
+    WHEN p_paid > 0 AND p_paid >= p_total THEN 'paid'
+    WHEN p_paid > 0 THEN 'partially_paid'
+    WHEN p_status = 'draft' THEN p_status
+    WHEN p_due_date < CURRENT_DATE THEN 'overdue'
+    ELSE 'sent'
+  END
+$$ LANGUAGE sql STABLE;
+
+CREATE OR REPLACE FUNCTION public.apply_invoice_payment(p_invoice_id UUID, p_delta NUMERIC)
+RETURNS VOID AS $$
+BEGIN
+  UPDATE public.invoices i
+  SET
+    amount_paid = COALESCE(i.amount_paid, 0) + p_delta,
+    status = public.invoice_payment_status(i.status, i.total_amount, COALESCE(i.amount_paid, 0) + p_delta, i.due_date)
+  WHERE i.id = p_invoice_id;
+END;
+$$ LANGUAGE plpgsql;
 
--- Create function to update invoice status based on payments
 CREATE OR REPLACE FUNCTION public.update_invoice_status()
 RETURNS TRIGGER AS $$
+DECLARE
+  old_amount NUMERIC := 0;
+  new_amount NUMERIC := 0;
 BEGIN
+  IF TG_OP = 'UPDATE' OR TG_OP = 'DELETE' THEN
+    old_amount := CASE WHEN COALESCE(OLD.is_refund, FALSE) THEN -OLD.amount ELSE OLD.amount END;
+  END IF;
   IF TG_OP = 'INSERT' OR TG_OP = 'UPDATE' THEN
-    UPDATE public.invoices i
-    SET 
-      amount_paid = (
-        SELECT COALESCE(SUM(p.amount), 0)
-        FROM public.payments p
-        WHERE p.invoice_id = NEW.invoice_id
-          AND p.is_refund = FALSE
-      ),
-      status = CASE
-        WHEN i.total_amount <= (
-          SELECT COALESCE(SUM(p.amount), 0)
-          FROM public.payments p
-          WHERE p.invoice_id = NEW.invoice_id
-            AND p.is_refund = FALSE
-        ) THEN 'paid'
-        WHEN (
-          SELECT COALESCE(SUM(p.amount), 0)
-          FROM public.payments p
-          WHERE p.invoice_id = NEW.invoice_id
-            AND p.is_refund = FALSE
-        ) > 0 THEN 'partially_paid'
-        WHEN i.due_date < CURRENT_DATE THEN 'overdue'
-        ELSE 'sent'
-      END
-    WHERE i.id = NEW.invoice_id;
+    new_amount := CASE WHEN COALESCE(NEW.is_refund, FALSE) THEN -NEW.amount ELSE NEW.amount END;
   END IF;
-  
-  RETURN NEW;
+
+  IF TG_OP = 'UPDATE' THEN
+    IF OLD.invoice_id IS NOT DISTINCT FROM NEW.invoice_id THEN
+      -- Same invoice: one UPDATE with the net change
+      IF NEW.invoice_id IS NOT NULL AND new_amount <> old_amount THEN
+        PERFORM public.apply_invoice_payment(NEW.invoice_id, new_amount - old_amount);
+      END IF;
+      RETURN NULL;
+    END IF;
+  END IF;
+
+  IF TG_OP <> 'INSERT' THEN
+    IF OLD.invoice_id IS NOT NULL THEN
+      PERFORM public.apply_invoice_payment(OLD.invoice_id, -old_amount);
+    END IF;
+  END IF;
+  IF TG_OP <> 'DELETE' THEN
+    IF NEW.invoice_id IS NOT NULL THEN
+      PERFORM public.apply_invoice_payment(NEW.invoice_id, new_amount);
+    END IF;
+  END IF;
+
+  RETURN NULL;
 END;
 $$ LANGUAGE plpgsql;
 
--- Create trigger for payments
 CREATE TRIGGER trg_payment_update_invoice
-AFTER INSERT OR UPDATE ON public.payments
+AFTER INSERT OR DELETE ON public.payments
+FOR EACH ROW
+EXECUTE FUNCTION public.update_invoice_status();
+
+-- Edits to notes, method or reference do not touch the invoice
+CREATE TRIGGER trg_payment_update_invoice_update
+AFTER UPDATE ON public.payments
 FOR EACH ROW
+WHEN (
+  OLD.amount IS DISTINCT FROM NEW.amount
+  OR OLD.is_refund IS DISTINCT FROM NEW.is_refund
+  OR OLD.invoice_id IS DISTINCT FROM NEW.invoice_id
+)
 EXECUTE FUNCTION public.update_invoice_status();
 
--- Create function to update invoice totals when items change
+-- amount_paid and status recomputed from every payment in one aggregate pass.
+-- Payment writes wait while it runs. Returns the number of invoices corrected.
+CREATE OR REPLACE FUNCTION public.rebuild_invoice_amount_paid()
+RETURNS INTEGER AS $$
+DECLARE
+  corrected INTEGER;
+BEGIN
+  LOCK TABLE public.payments IN SHARE MODE;
+
+  WITH paid AS (
+    SELECT
+      i.id,
+      COALESCE(SUM(CASE WHEN COALESCE(p.is_refund, FALSE) THEN -p.amount ELSE p.amount END), 0) AS amount_paid
+    FROM public.invoices i
+    LEFT JOIN public.payments p ON p.invoice_id = i.id
+    GROUP BY i.id
+  )
+  UPDATE public.invoices i
+  SET
+    amount_paid = paid.amount_paid,
+    status = public.invoice_payment_status(i.status, i.total_amount, paid.amount_paid, i.due_date)
+  FROM paid
+  WHERE i.id = paid.id
+    AND (
+      COALESCE(i.amount_paid, 0) <> paid.amount_paid
+      -- Statuses that contradict the payments; unpaid invoices are not re-aged here
+      OR (
+        (paid.amount_paid > 0 OR i.status IN ('paid', 'partially_paid'))
+        AND i.status <> public.invoice_payment_status(i.status, i.total_amount, paid.amount_paid, i.due_date)
+      )
+    );
+
+  GET DIAGNOSTICS corrected = ROW_COUNT;
+  RETURN corrected;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Create function to update invoice totals when items change: once per statement,
+-- one aggregate pass over the affected invoices (see invoice_totals_trigger.sql)
 CREATE OR REPLACE FUNCTION public.update_invoice_totals()
 RETURNS TRIGGER AS $$
+DECLARE
+  affected UUID[];
 BEGIN
-  IF TG_OP = 'INSERT' OR TG_OP = 'UPDATE' OR TG_OP = 'DELETE' THEN
-    UPDATE public.invoices i
-    SET 
-      subtotal = (
-        SELECT COALESCE(SUM(ii.amount), 0)
-        FROM public.invoice_items ii
-        WHERE ii.invoice_id = COALESCE(NEW.invoice_id, OLD.invoice_id)
-      ),
-      tax_amount = (
-        SELECT COALESCE(SUM(ii.amount * ii.tax_rate/100), 0)
-        FROM public.invoice_items ii
-        WHERE ii.invoice_id = COALESCE(NEW.invoice_id, OLD.invoice_id)
-      ),
-      total_amount = (
-        SELECT COALESCE(SUM(ii.amount * (1 + ii.tax_rate/100)), 0)
-        FROM public.invoice_items ii
-        WHERE ii.invoice_id = COALESCE(NEW.invoice_id, OLD.invoice_id)
-      )
-    WHERE i.id = COALESCE(NEW.invoice_id, OLD.invoice_id);
+  -- Transition tables exist only for the events that define them, so each
+  -- branch names only the ones its trigger provides
+  IF TG_OP = 'INSERT' THEN
+    SELECT array_agg(DISTINCT invoice_id) INTO affected FROM new_items;
+  ELSIF TG_OP = 'UPDATE' THEN
+    SELECT array_agg(DISTINCT invoice_id) INTO affected
+    FROM (SELECT invoice_id FROM new_items UNION SELECT invoice_id FROM old_items) changed;
+  ELSE
+    SELECT array_agg(DISTINCT invoice_id) INTO affected FROM old_items;
   END IF;
-  
-  RETURN NEW;
+
+  IF affected IS NULL THEN
+    RETURN NULL;
+  END IF;
+
+  UPDATE public.invoices i
+  SET
+    subtotal = t.subtotal,
+    tax_amount = t.tax_amount,
+    total_amount = t.subtotal + t.tax_amount
+  FROM (
+    SELECT
+      a.invoice_id,
+      ROUND(COALESCE(SUM(x.taxable_amount), 0), 2) AS subtotal,
+      ROUND(COALESCE(SUM(COALESCE(ii.tax_amount, x.taxable_amount * ii.tax_rate / 100)), 0), 2) AS tax_amount
+    FROM unnest(affected) AS a(invoice_id)
+    LEFT JOIN public.invoice_items ii ON ii.invoice_id = a.invoice_id
+    LEFT JOIN LATERAL (
+      SELECT COALESCE(
+        ii.taxable_amount,
+        ii.quantity * ii.unit_price
+          - COALESCE(ii.discount_amount, 0)
+          - ii.quantity * ii.unit_price * COALESCE(ii.discount_percentage, 0) / 100
+      ) AS taxable_amount
+    ) x ON TRUE
+    GROUP BY a.invoice_id
+  ) t
+  WHERE i.id = t.invoice_id
+    AND (i.subtotal, i.tax_amount, i.total_amount)
+        IS DISTINCT FROM (t.subtotal, t.tax_amount, t.subtotal + t.tax_amount);
+
+  RETURN NULL;
 END;
 $$ LANGUAGE plpgsql;
 
--- Create trigger for invoice items
-CREATE TRIGGER trg_invoice_items_update_totals
-AFTER INSERT OR UPDATE OR DELETE ON public.invoice_items
-FOR EACH ROW
+CREATE TRIGGER trg_invoice_items_totals_insert
+AFTER INSERT ON public.invoice_items
+REFERENCING NEW TABLE AS new_items
+FOR EACH STATEMENT
+EXECUTE FUNCTION public.update_invoice_totals();
+
+CREATE TRIGGER trg_invoice_items_totals_update
+AFTER UPDATE ON public.invoice_items
+REFERENCING OLD TABLE AS old_items NEW TABLE AS new_items
+FOR EACH STATEMENT
+EXECUTE FUNCTION public.update_invoice_totals();
+
+CREATE TRIGGER trg_invoice_items_totals_delete
+AFTER DELETE ON public.invoice_items
+REFERENCING OLD TABLE AS old_items
+FOR EACH STATEMENT
 EXECUTE FUNCTION public.update_invoice_totals();
 
 -- Create function to update customer stats
@@ -321,4 +436,6 @@ EXECUTE FUNCTION public.update_customer_stats();
 CREATE TRIGGER trg_payments_update_customer
 AFTER INSERT OR UPDATE OR DELETE ON public.payments
 FOR EACH ROW
-EXECUTE FUNCTION public.update_customer_stats();
\ No newline at end of file
+EXECUTE FUNCTION public.update_customer_stats();
+
+-- Dashboard rollup tables and their triggers: run dashboard_rollups.sql after this file
\ No newline at end of file